@@ -0,0 +1,60 @@
+import os
+import sys
+import csv
+import tempfile
+
+from common import load_merger, timed
+from synthetic import case_titles
+from trashpanda_arrow import ColumnarWriter, columnar_available, iter_columnar_rows
+
+# 🏛️ Size and load time of merged_output as CSV vs Parquet vs Feather: a full load through
+# csv.DictReader / pyarrow, and a one-column load (what a timeline filter on dates needs)
+ROWS = [100000, 1000000]
+
+def merged_rows(n):
+    for idx, (title, created, model) in enumerate(case_titles(n)):
+        epoch = 1650000000000 + idx * 1000
+        yield [title, str(epoch), "2022-04-15 05:20:00", created, created, model, "jpg",
+               f"/cases/dump_{idx // 1000:03d}.zip > data/com.sec.android.gallery3d/.trash/{title}.jpg"]
+
+def main(sizes):
+    if not columnar_available():
+        sys.exit("pyarrow is not installed")
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    merger = load_merger()
+    columns = merger.MERGED_COLUMNS
+    print(f"{'rows':>9} {'format':<8} {'MB':>7} {'write s':>8} {'load s':>8} {'1 col s':>8} {'rows/s':>10}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            paths = {"csv": os.path.join(root, "merged_output.csv")}
+            def write_csv():
+                with open(paths["csv"], 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    writer.writerows(merged_rows(n))
+            results = {"csv": [timed(write_csv)[0]]}
+            for fmt in ("parquet", "feather"):
+                paths[fmt] = os.path.join(root, f"merged_output.{fmt}")
+                def write_columnar():
+                    with ColumnarWriter(paths[fmt], columns, fmt, merger.TRASH_TYPES, merger.EXIF_DATES) as writer:
+                        writer.write_rows(merged_rows(n))
+                results[fmt] = [timed(write_columnar)[0]]
+
+            def load_csv(column=None):
+                with open(paths["csv"], 'r', encoding='utf-8') as f:
+                    return sum(1 for row in csv.DictReader(f) if column is None or row[column])
+            results["csv"] += [timed(load_csv)[0], timed(load_csv, "DateCreated")[0]]
+            results["parquet"] += [timed(pq.read_table, paths["parquet"])[0],
+                                   timed(pq.read_table, paths["parquet"], columns=["DateCreated_ts"])[0]]
+            results["feather"] += [timed(feather.read_table, paths["feather"])[0],
+                                   timed(feather.read_table, paths["feather"], columns=["DateCreated_ts"])[0]]
+            # The merge handoff: typed columns turned back into CSV-equivalent strings
+            handoff, _ = timed(lambda: sum(1 for _ in iter_columnar_rows(paths["parquet"], columns, merger.TRASH_TYPES)))
+            for fmt, (write_s, load_s, column_s) in results.items():
+                size = os.path.getsize(paths[fmt]) / (1024 * 1024)
+                print(f"{n:>9} {fmt:<8} {size:>7.1f} {write_s:>8.2f} {load_s:>8.3f} {column_s:>8.3f} {n / load_s:>10.0f}")
+            print(f"{n:>9} {'parquet → rows for merge':<35} {handoff:>8.2f}s")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or ROWS)
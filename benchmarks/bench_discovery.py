@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import tempfile
+
+from common import timed
+from synthetic import build_case
+from trashpanda_scan import IMAGE, scan_tree
+
+# 🧭 Discovery: the three separate os.walk passes (images, ZIPs, trash.db) against one
+# scan_tree pass, sequential and threaded, cold and with the directory index. --latency MS
+# adds a delay to every directory listing to stand in for a network share.
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tiff', '.heic'}
+IMAGES = 20000
+DIRS_PER_LEVEL = 8
+
+def add_directories(root, n):
+    # Spread extra images over a two-level tree so there are many directories to list
+    for i in range(n):
+        folder = os.path.join(root, "tree", f"a{i % DIRS_PER_LEVEL}", f"b{i % (DIRS_PER_LEVEL ** 2)}")
+        os.makedirs(folder, exist_ok=True)
+        open(os.path.join(folder, f"{i:06d}.jpg"), 'wb').close()
+
+def walk_three_times(root):
+    images = [os.path.join(r, f) for r, _, files in os.walk(root) for f in files
+              if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS]
+    zips = [os.path.join(r, f) for r, _, files in os.walk(root) for f in files if f.lower().endswith(".zip")]
+    dbs = [os.path.join(r, f) for r, _, files in os.walk(root) for f in files if f.lower().endswith("trash.db")]
+    return images, zips, dbs
+
+def scan_once(root, workers, index_path=None):
+    found = list(scan_tree(root, IMAGE_EXTENSIONS, workers=workers, index_path=index_path))
+    return [p for kind, p in found if kind == IMAGE]
+
+def main(argv):
+    latency = 0.0
+    if "--latency" in argv:
+        latency = float(argv[argv.index("--latency") + 1]) / 1000
+        real_scandir = os.scandir
+        def slow_scandir(path="."):
+            time.sleep(latency)
+            return real_scandir(path)
+        os.scandir = slow_scandir
+    with tempfile.TemporaryDirectory() as root:
+        case = os.path.join(root, "case")
+        build_case(case, IMAGES // 10)
+        add_directories(case, IMAGES)
+        time.sleep(2)  # let directory mtimes settle so the index can trust them
+        index_path = os.path.join(root, "scan_index.db")
+        seconds, (expected, _, _) = timed(walk_three_times, case)
+        print(f"{IMAGES} images, {latency * 1000:.0f} ms per directory listing")
+        print(f"{'pass':<24} {'seconds':>8}")
+        print(f"{'os.walk x3':<24} {seconds:>8.3f}")
+        for label, workers, index in [("scan_tree, 1 thread", 1, None), ("scan_tree, 8 threads", 8, None),
+                                      ("scan_tree, index (cold)", 8, index_path),
+                                      ("scan_tree, index (warm)", 8, index_path)]:
+            seconds, found = timed(scan_once, case, workers, index)
+            assert found == expected, "scan_tree disagrees with os.walk"
+            print(f"{label:<24} {seconds:>8.3f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
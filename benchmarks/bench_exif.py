@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+
+from common import REPO_DIR, load_merger, timed
+from synthetic import case_titles, jpeg_with_exif
+from trashpanda_exif import read_exif_tags
+
+# ⚡ Files/s for the header-only parser against the Pillow and ExifTool readers.
+# Uses fake_exiftool.py unless TRASHPANDA_EXIFTOOL points at a real ExifTool.
+SCALES = [1000, 10000]
+PER_FILE_LIMIT = 200  # per-file ExifTool spawns a process per image; time a sample
+
+def write_images(root, n):
+    paths = []
+    for title, created, model in case_titles(n):
+        path = os.path.join(root, f"{title}.jpg")
+        with open(path, 'wb') as f:
+            f.write(jpeg_with_exif(model, created))
+        paths.append(path)
+    return paths
+
+# The parser over buffered read() calls instead of an mmap view, for comparison
+def read_with_file(path):
+    with open(path, 'rb') as f:
+        return read_exif_tags(f)
+
+def exiftool_batch(merger, paths):
+    results = []
+    with merger.ExifToolSession() as session:
+        for start in range(0, len(paths), merger.EXIFTOOL_BATCH_SIZE):
+            batch = paths[start:start + merger.EXIFTOOL_BATCH_SIZE]
+            results.extend(session.read_metadata(batch))
+    return results
+
+def main(scales):
+    if "TRASHPANDA_EXIFTOOL" not in os.environ:
+        os.environ["TRASHPANDA_EXIFTOOL"] = os.path.join(REPO_DIR, "fake_exiftool.py")
+    merger = load_merger()
+    readers = [("native", lambda paths: [merger.read_metadata_fast(p) for p in paths]),
+               ("native read()", lambda paths: [read_with_file(p) for p in paths])]
+    if merger.Image is not None:
+        readers.append(("pillow", lambda paths: [merger.read_metadata_pillow(p) for p in paths]))
+    if merger.exiftool_available():
+        readers.append(("exiftool batch", lambda paths: exiftool_batch(merger, paths)))
+        readers.append(("exiftool per-file",
+                        lambda paths: [merger.read_metadata_per_file(p) for p in paths[:PER_FILE_LIMIT]]))
+    print(f"{'files':>8} {'reader':<18} {'seconds':>8} {'files/s':>10}")
+    for n in scales:
+        with tempfile.TemporaryDirectory() as root:
+            paths = write_images(root, n)
+            results = {}
+            for name, reader in readers:
+                seconds, results[name] = timed(reader, paths)
+                count = len(results[name])
+                print(f"{n:>8} {name:<18} {seconds:>8.3f} {count / seconds:>10.0f}")
+            if "pillow" in results:
+                assert results["native"] == results["pillow"], "native parser disagrees with Pillow"
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SCALES)
@@ -0,0 +1,116 @@
+import io
+import os
+import sys
+import random
+import zipfile
+import tempfile
+
+from common import load_merger, timed
+from synthetic import GALLERY_TRASH, write_trashdb
+from trashpanda_identity import HASH_BITS, MultiIndexHash, cluster_duplicates
+
+# 🧬 Content identity: (1) extraction with and without SHA-256 + perceptual hashes on a case of
+# distinct pictures plus renamed exact copies, recompressed copies and resized copies (only the
+# originals are in trash.db), and how many copies merge then matches through their cluster;
+# (2) clustering N random 64-bit hashes with multi-index hashing, against pairwise comparison
+PICTURES = 2000
+HASHES = 100000
+RADIUS = 6
+
+def picture(rng, size=(320, 240)):
+    from PIL import Image, ImageDraw
+    im = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(im)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        w, h = rng.randrange(20, 160), rng.randrange(20, 120)
+        draw.ellipse((x, y, x + w, y + h), fill=tuple(rng.randrange(256) for _ in range(3)))
+    return im
+
+def jpeg(im, quality=90):
+    out = io.BytesIO()
+    im.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+def build_identity_case(root, n, seed=11):
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "images"), exist_ok=True)
+    titles, copies = [], 0
+    with zipfile.ZipFile(os.path.join(root, "copies.zip"), 'w') as archive:
+        for i in range(n):
+            title = f"IMG_{i:06d}"
+            titles.append(title)
+            im = picture(rng)
+            original = jpeg(im)
+            with open(os.path.join(root, "images", f"{title}.jpg"), 'wb') as f:
+                f.write(original)
+            # Every fourth picture also turns up under another name in a second dump
+            if i % 4 == 0:
+                kind = ("exact", "recompressed", "resized")[(i // 4) % 3]
+                data = (original if kind == "exact" else jpeg(im, 55) if kind == "recompressed"
+                        else jpeg(im.resize((160, 120))))
+                archive.writestr(f"{GALLERY_TRASH}/copy_{kind}_{i:06d}.jpg", data)
+                copies += 1
+    write_trashdb(os.path.join(root, "trash.db"), titles)
+    return copies
+
+def count_content_matches(merged_csv):
+    import csv
+    by_kind = {}
+    with open(merged_csv, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = os.path.basename(row["FilePath"])
+            if name.startswith("copy_"):
+                kind, number = name.split("_")[1], name.split("_")[2].split(".")[0]
+                hit = row.get("MatchedBy") == "content" and row["title"] == f"IMG_{number}"
+                found, total = by_kind.get(kind, (0, 0))
+                by_kind[kind] = (found + hit, total + 1)
+    return by_kind
+
+def bench_case(merger, n):
+    with tempfile.TemporaryDirectory() as root:
+        case = os.path.join(root, "case")
+        copies = build_identity_case(case, n)
+        print(f"{n} pictures + {copies} renamed copies (exact / recompressed q55 / resized 50%)")
+        print(f"{'extract':<22} {'seconds':>8} {'img/s':>8}")
+        for identity in (False, True):
+            merger.set_output_dir(os.path.join(root, f"out_{identity}"))
+            seconds, _ = timed(merger.extract_metadata, case, lambda done, total: None, "native", None,
+                               identity=identity)
+            label = "native + identity" if identity else "native"
+            print(f"{label:<22} {seconds:>8.2f} {(n + copies) / seconds:>8.0f}")
+        merger.export_trashdb_to_csv(case)
+        seconds, _ = timed(merger.merge_outputs, False)
+        print(f"{'merge (with clusters)':<22} {seconds:>8.2f}")
+        for kind, (found, total) in sorted(count_content_matches(merger.MERGED_OUTPUT).items()):
+            print(f"  {kind:<12} copies matched through their cluster: {found}/{total}")
+
+def bench_index(n):
+    rng = random.Random(5)
+    values = [rng.getrandbits(HASH_BITS) for _ in range(n)]
+    # 5% near-duplicates: a copy of an earlier hash with a few bits flipped
+    for i in range(n // 20):
+        value = values[i]
+        for _ in range(rng.randrange(1, RADIUS + 1)):
+            value ^= 1 << rng.randrange(HASH_BITS)
+        values.append(value)
+    entries = [(i, None, value) for i, value in enumerate(values)]
+    seconds, clusters = timed(cluster_duplicates, entries, RADIUS)
+    # Pairwise cost, extrapolated from comparing a sample of hashes with all others
+    sample = values[:200]
+    pair_s, _ = timed(lambda: sum(1 for a in sample for b in values if bin(a ^ b).count("1") <= RADIUS))
+    pairwise = pair_s / len(sample) * len(values) / 2
+    index = MultiIndexHash(RADIUS)
+    for value in values[:20000]:
+        index.add(value)
+    assert all(set(index.query(v)) == {j for j, w in enumerate(values[:20000]) if bin(v ^ w).count("1") <= RADIUS}
+               for v in values[-50:]), "multi-index hash missed a neighbour"
+    print(f"{len(values)} hashes, radius {RADIUS}: multi-index clustering {seconds:.2f}s "
+          f"({len(clusters)} files in clusters), pairwise ≈ {pairwise:.0f}s")
+
+def main(argv):
+    bench_case(load_merger(), int(argv[0]) if argv else PICTURES)
+    bench_index(int(argv[1]) if len(argv) > 1 else HASHES)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import subprocess
+
+from common import REPO_DIR, load_merger, timed
+
+# 📉 Peak RSS of the streaming pipeline should stay flat as the number of files grows.
+# Each scale runs in a fresh process so ru_maxrss is not carried over. The merge keeps
+# the trash-title index in memory, so the trash table is held at a fixed size here.
+SCALES = [1000, 10000, 100000]
+FILES_PER_DIR = 1000
+TRASH_ROWS = 10000
+
+def peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def build_case(root, n):
+    for i in range(n):
+        folder = os.path.join(root, "images", f"d{i // FILES_PER_DIR:04d}")
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(folder, exist_ok=True)
+        open(os.path.join(folder, f"2021{i:08d}_120000.jpg"), 'wb').close()
+    db_path = os.path.join(root, "trash.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE trashes (title TEXT, date_deleted INTEGER)")
+    conn.executemany("INSERT INTO trashes VALUES (?, ?)",
+                     ((f"2021{i:08d}_120000", 1600000000000 + i) for i in range(min(n, TRASH_ROWS))))
+    conn.commit()
+    conn.close()
+    return db_path
+
+def child(n):
+    merger = load_merger()
+    with tempfile.TemporaryDirectory() as root:
+        db_path = build_case(root, n)
+        merger.set_output_dir(os.path.join(root, "output"))
+        merger.DB_PATH = db_path
+        merger.log = lambda msg: None
+        baseline = peak_rss_mb()
+        backend = "pillow" if merger.Image is not None else "batch"
+        report = [f"{n:>9}", f"{baseline:>9.1f}"]
+        for stage in (lambda: merger.extract_metadata(os.path.join(root, "images"), lambda d, t: None, backend),
+                      merger.export_trashdb_to_csv,
+                      merger.merge_outputs):
+            seconds, _ = timed(stage)
+            report.append(f"{seconds:>7.2f}s {peak_rss_mb():>7.1f}")
+        print(" ".join(report))
+
+def main(scales):
+    if "TRASHPANDA_EXIFTOOL" not in os.environ:
+        os.environ["TRASHPANDA_EXIFTOOL"] = os.path.join(REPO_DIR, "fake_exiftool.py")
+    print(f"{'files':>9} {'start MB':>9} {'extract s / MB':>16} {'export s / MB':>16} {'merge s / MB':>16}")
+    for n in scales:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(n)], check=True)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(int(sys.argv[2]))
+    else:
+        main([int(a) for a in sys.argv[1:]] or SCALES)
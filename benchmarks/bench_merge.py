@@ -0,0 +1,45 @@
+import sys
+import random
+
+from common import load_merger, timed
+
+# 📈 merge_rows should grow ~linearly; the old nested scan grows with N×M
+SCALES = [1000, 4000, 16000, 64000]
+NAIVE_LIMIT = 4000
+
+def synthetic_rows(n, seed=7):
+    rng = random.Random(seed)
+    trash, meta = [], []
+    for i in range(n):
+        title = f"{20200101 + i % 28}_{rng.randrange(10 ** 6):06d}_{i}"
+        trash.append({"title": title, "Unixepoch Timestamp": str(1600000000000 + i), "Deleted_CST": ""})
+    rng.shuffle(trash)
+    for i in range(n + n // 2):
+        if i < n:
+            name = trash[i]["title"]
+        else:
+            name = f"IMG_{i}"
+        meta.append({"FilePath": f"C:/case/dump{i % 8}.zip > DCIM/.trashes/{name}.jpg"})
+    return meta, trash
+
+def naive_merge(meta_data, trash_data):
+    for mrow in meta_data:
+        file_path = mrow.get("FilePath", "")
+        yield next((t for t in trash_data if t.get("title") and t["title"] in file_path), None)
+
+def main(scales):
+    merger = load_merger()
+    print(f"{'rows':>8} {'indexed s':>10} {'us/row':>8} {'naive s':>10}")
+    for n in scales:
+        meta, trash = synthetic_rows(n)
+        indexed, merged = timed(lambda: list(merger.merge_rows(meta, trash)))
+        naive = ""
+        if n <= NAIVE_LIMIT:
+            naive_time, expected = timed(lambda: list(naive_merge(meta, trash)))
+            got = [row["title"] for row in merged]
+            assert got == [t["title"] if t else "" for t in expected], "indexed merge disagrees with nested scan"
+            naive = f"{naive_time:10.3f}"
+        print(f"{n:>8} {indexed:>10.3f} {indexed / len(meta) * 1e6:>8.1f} {naive:>10}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SCALES)
@@ -0,0 +1,74 @@
+import os
+import sys
+import hashlib
+import tempfile
+
+from common import timed
+from synthetic import jpeg_with_exif
+from trashpanda_exif import read_exif_file, read_exif_tags
+from trashpanda_io import sha256_file
+
+# 🪟 mmap vs read() for header parsing and hashing of photo-sized files. On Linux it reports
+# read syscalls and bytes pulled from storage per pass (/proc/self/io); run as root to
+# drop the page cache before each pass, otherwise every pass after the first is warm.
+FILES = 300
+FILE_SIZE = 3 * 1024 * 1024
+
+def write_images(root, n):
+    paths = []
+    for i in range(n):
+        path = os.path.join(root, f"{i:05d}.jpg")
+        with open(path, 'wb') as f:
+            jpeg = jpeg_with_exif("SM-G991B", "2022:01:01 12:00:00")
+            f.write(jpeg[:-2] + os.urandom(FILE_SIZE) + jpeg[-2:])
+        paths.append(path)
+    return paths
+
+def parse_with_read(path):
+    with open(path, 'rb') as f:
+        return read_exif_tags(f)
+
+def hash_with_read(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def io_counters():
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(":") for line in f)}
+    except OSError:
+        return None
+
+def drop_page_cache():
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("1\n")
+        return True
+    except OSError:
+        return False
+
+def main(n):
+    with tempfile.TemporaryDirectory() as root:
+        paths = write_images(root, n)
+        cold = drop_page_cache()
+        print(f"{n} files of {FILE_SIZE // (1024 * 1024)} MB, {'cold' if cold else 'warm'} page cache")
+        print(f"{'pass':<14} {'seconds':>8} {'read calls':>11} {'storage MB':>11}")
+        for name, fn in [("parse mmap", read_exif_file), ("parse read()", parse_with_read),
+                         ("hash mmap", sha256_file), ("hash read()", hash_with_read)]:
+            drop_page_cache()
+            before = io_counters()
+            seconds, results = timed(lambda: [fn(p) for p in paths])
+            after = io_counters()
+            if before and after:
+                calls = after["syscr"] - before["syscr"]
+                storage = (after["read_bytes"] - before["read_bytes"]) / (1024 * 1024)
+                print(f"{name:<14} {seconds:>8.3f} {calls:>11} {storage:>11.1f}")
+            else:
+                print(f"{name:<14} {seconds:>8.3f} {'n/a':>11} {'n/a':>11}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else FILES)
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+from common import REPO_DIR, MERGER_SCRIPT, EXTRACTOR_SCRIPT
+from synthetic import SCALES, build_case
+
+# 🏁 End-to-end regression benchmark: generates a synthetic case per scale and runs every
+# stage through the headless CLIs, one fresh process per stage so peak RSS is per stage.
+# Save a report with --json and pass it back with --compare to flag slowdowns.
+REGRESSION_THRESHOLD = 0.20  # wall-time growth reported as a regression
+
+def run_stage(script, args, cwd):
+    fd, report_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, script] + args + ["--json-timings", report_path],
+                       cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(report_path, encoding='utf-8') as f:
+            return json.load(f)["stages"]
+    finally:
+        os.remove(report_path)
+
+def bench_scale(name, n, workers, backend):
+    with tempfile.TemporaryDirectory() as root:
+        case = os.path.join(root, "case")
+        build_case(case, n)
+        out = ["--output", os.path.join(root, "output"), "--workers", str(workers)]
+        results = []
+        def record(label, stages):
+            for stage in stages:
+                results.append({"scale": name, "images": n, "stage": label,
+                                "wall_s": stage["wall_s"], "cpu_s": stage["cpu_s"],
+                                "peak_rss_mb": stage["peak_rss_mb"]})
+        record("merger scan", run_stage(MERGER_SCRIPT, ["scan", case] + out, root))
+        record("merger extract (cold)",
+               run_stage(MERGER_SCRIPT, ["extract", case, "--backend", backend] + out, root))
+        record("merger extract (cached)",
+               run_stage(MERGER_SCRIPT, ["extract", case, "--backend", backend] + out, root))
+        record("merger export-db", run_stage(MERGER_SCRIPT, ["export-db", case] + out, root))
+        record("merger merge", run_stage(MERGER_SCRIPT, ["merge"] + out, root))
+        stages = run_stage(MERGER_SCRIPT, ["run-all", case, "--backend", backend, "--no-cache"] + out, root)
+        record("merger run-all (overlapped)", [s for s in stages if s["stage"] == "run-all"])
+        record("extractor batch",
+               run_stage(EXTRACTOR_SCRIPT, ["batch", case, "--workers", str(workers),
+                                            "--output", os.path.join(root, "batch")], root))
+        return results
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r["scale"], r["stage"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for r in results:
+        old = baseline.get((r["scale"], r["stage"]))
+        if not old or not old["wall_s"]:
+            continue
+        change = r["wall_s"] / old["wall_s"] - 1
+        if change > REGRESSION_THRESHOLD:
+            regressions += 1
+            print(f"⚠️ {r['scale']} {r['stage']}: {old['wall_s']:.2f}s → {r['wall_s']:.2f}s ({change:+.0%})")
+    print(f"{regressions} regression(s) over {REGRESSION_THRESHOLD:.0%} against {baseline_path}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Trashes Panda stage benchmarks")
+    parser.add_argument("scales", nargs="*", default=["small", "medium"],
+                        help=f"{', '.join(SCALES)} or an image count")
+    parser.add_argument("--workers", type=int, default=max(1, min(32, os.cpu_count() or 1)))
+    parser.add_argument("--backend", choices=("batch", "per-file", "pillow", "native"))
+    parser.add_argument("--json", metavar="FILE", help="save the results for later --compare runs")
+    parser.add_argument("--compare", metavar="FILE", help="flag stages slower than a saved run")
+    args = parser.parse_args()
+    if "TRASHPANDA_EXIFTOOL" not in os.environ:
+        os.environ["TRASHPANDA_EXIFTOOL"] = os.path.join(REPO_DIR, "fake_exiftool.py")
+    backend = args.backend
+    if backend is None:
+        try:
+            import PIL  # noqa: F401
+            backend = "pillow"
+        except ImportError:
+            backend = "batch"
+
+    results = []
+    print(f"{'scale':>8} {'images':>8} {'stage':<26} {'wall s':>8} {'cpu s':>8} {'peak MB':>8}")
+    for scale in args.scales:
+        n = SCALES.get(scale) or int(scale)
+        for r in bench_scale(scale, n, args.workers, backend):
+            results.append(r)
+            rss = f"{r['peak_rss_mb']:>8.1f}" if r["peak_rss_mb"] is not None else f"{'n/a':>8}"
+            print(f"{scale:>8} {n:>8} {r['stage']:<26} {r['wall_s']:>8.2f} {r['cpu_s']:>8.2f} {rss}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"backend": backend, "workers": args.workers, "results": results}, f, indent=2)
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare) else 0)
+
+if __name__ == "__main__":
+    main()
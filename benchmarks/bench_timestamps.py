@@ -0,0 +1,83 @@
+import re
+import sys
+import random
+from datetime import datetime
+
+from common import load_extractor, timed
+
+# ⏱️ convert_timestamp over synthetic Samsung/Android trash titles
+COUNT = 1_000_000
+SHAPES = [
+    "{ymd}_{hms}",
+    "IMG_{ymd}_{hms}",
+    "Screenshot_{ymd}-{hms}_Gallery",
+    "VID_{y}-{m}-{d}-{hms}00",
+    "PXL_{ymd}_{hms}123.MP",
+    "{ms}",
+    "received_{s}",
+    "FB_IMG_{ms}",
+    "20221399_999999",
+]
+
+# The pre-optimisation implementation, kept verbatim as the reference
+def original_convert_timestamp(text):
+    patterns = [
+        (r'(\d{8})[-_](\d{6,8})', 'ymd_hms'),
+        (r'(\d{4})-(\d{2})-(\d{2})-(\d{6,8})', 'ymd_dash'),
+        (r'\d{13}', 'epoch_ms'),
+        (r'\d{10}', 'epoch_s')
+    ]
+    converted = []
+    for pattern, fmt in patterns:
+        for match in re.finditer(pattern, text):
+            try:
+                if fmt == 'ymd_hms':
+                    date_part, time_part = match.groups()
+                    dt = datetime.strptime(date_part + time_part[:6], "%Y%m%d%H%M%S")
+                elif fmt == 'ymd_dash':
+                    year, month, day, time_part = match.groups()
+                    dt = datetime.strptime(f"{year}{month}{day}{time_part[:6]}", "%Y%m%d%H%M%S")
+                elif fmt == 'epoch_ms':
+                    timestamp = int(match.group(0)) / 1000
+                    dt = datetime.fromtimestamp(timestamp)
+                elif fmt == 'epoch_s':
+                    timestamp = int(match.group(0))
+                    dt = datetime.fromtimestamp(timestamp)
+                converted.append(dt.strftime("%Y/%m/%d %H:%M:%S"))
+            except (ValueError, OverflowError):
+                continue
+    return ", ".join(converted) if converted else None
+
+def synthetic_titles(n, seed=3):
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(n):
+        y, m, d = rng.randint(2015, 2025), rng.randint(1, 12), rng.randint(1, 28)
+        hms = f"{rng.randint(0, 23):02d}{rng.randint(0, 59):02d}{rng.randint(0, 59):02d}"
+        s = rng.randint(1_400_000_000, 1_750_000_000)
+        titles.append(rng.choice(SHAPES).format(
+            ymd=f"{y}{m:02d}{d:02d}", y=y, m=f"{m:02d}", d=f"{d:02d}", hms=hms,
+            s=s, ms=s * 1000 + rng.randint(0, 999)))
+    return titles
+
+def main(count):
+    extractor = load_extractor()
+    titles = synthetic_titles(count)
+    sample = titles[:20000]
+    expected = [original_convert_timestamp(t) for t in sample]
+    assert [extractor.convert_timestamp(t, compat=True) for t in sample] == expected
+    assert extractor.convert_timestamps(sample, compat=True) == expected
+    runs = [
+        ("original", lambda: [original_convert_timestamp(t) for t in titles]),
+        ("compat", lambda: [extractor.cached_timestamp.__wrapped__(t, True) for t in titles]),
+        ("single-pass", lambda: [extractor.cached_timestamp.__wrapped__(t, False) for t in titles]),
+        ("batch compat", lambda: extractor.convert_timestamps(titles, compat=True)),
+        ("batch", lambda: extractor.convert_timestamps(titles, compat=False)),
+    ]
+    print(f"{count} titles")
+    for name, run in runs:
+        seconds, _ = timed(run)
+        print(f"{name:>14}: {seconds:7.2f}s  {count / seconds:>10,.0f} titles/s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else COUNT)
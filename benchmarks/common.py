@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+import importlib.util
+
+# 🧪 Helpers shared by the benchmark scripts
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MERGER_SCRIPT = os.path.join(REPO_DIR, "merging with improved gui.py")
+EXTRACTOR_SCRIPT = os.path.join(REPO_DIR, "gui android trashes panda- extraction folder- exif date and model.py")
+
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+# The scripts have spaces in their names, so import them by path
+def load_script(path, name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def load_merger():
+    return load_script(MERGER_SCRIPT, "trashpanda_merger")
+
+def load_extractor():
+    return load_script(EXTRACTOR_SCRIPT, "trashpanda_extractor")
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
@@ -0,0 +1,110 @@
+import os
+import base64
+import random
+import sqlite3
+import struct
+import zipfile
+
+# 🏭 Synthetic case folders: loose EXIF JPEGs, a loose trash.db and phone-dump ZIPs
+# laid out like the real thing (gallery3d .trash images + providers.trash trash.db).
+# JPEGs are built byte-by-byte so Pillow is not needed to generate a case.
+
+# 8x8 grey baseline JPEG; an EXIF APP1 segment is spliced in after SOI
+BASE_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABALDA4MChAODQ4SERATGCgaGBYWGDEjJR0oOjM9PDkzODdASFxOQERXRTc4UG1R"
+    "V19iZ2hnPk1xeXBkeFxlZ2P/wAALCAAIAAgBAREA/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgED"
+    "AwIEAwUFBAQAAAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3ODk6Q0RF"
+    "RkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWmp6ipqrKztLW2t7i5usLDxMXGx8jJ"
+    "ytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/9oACAEBAAA/ACv/2Q=="
+)
+GALLERY_TRASH = "data/com.sec.android.gallery3d/.trash"
+TRASHDB_MEMBER = "data/com.samsung.android.providers.trash/databases/trash.db"
+MODELS = ["SM-G991B", "SM-S908U", "SM-A536B", "Pixel 7"]
+FILES_PER_DIR = 1000
+IMAGES_PER_ZIP = 5000
+LOOSE_SHARE = 0.2  # fraction of images left loose in the folder instead of zipped
+
+SCALES = {"small": 1000, "medium": 10000, "large": 100000}
+
+def tiff_entries(entries, offset):
+    # entries: [(tag, type, count, payload bytes)]; payloads over 4 bytes go after the IFD
+    body = struct.pack('<H', len(entries))
+    data = b''
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    for tag, kind, count, payload in entries:
+        if len(payload) <= 4:
+            body += struct.pack('<HHL', tag, kind, count) + payload.ljust(4, b'\0')
+        else:
+            body += struct.pack('<HHLL', tag, kind, count, data_offset + len(data))
+            data += payload + (b'\0' if len(payload) % 2 else b'')
+    return body + struct.pack('<L', 0) + data
+
+def exif_segment(model, created, modified):
+    def ascii_entry(tag, text):
+        raw = text.encode('ascii') + b'\0'
+        return tag, 2, len(raw), raw
+    ifd0 = [ascii_entry(0x0110, model), ascii_entry(0x0132, modified)]
+    # Size IFD0 with a placeholder pointer, then point 0x8769 just past it
+    ifd0_size = len(tiff_entries(ifd0 + [(0x8769, 4, 1, b'\0' * 4)], 8))
+    exif_ifd = tiff_entries([ascii_entry(0x9003, created)], 8 + ifd0_size)
+    ifd0_bytes = tiff_entries(ifd0 + [(0x8769, 4, 1, struct.pack('<L', 8 + ifd0_size))], 8)
+    tiff = b'II*\0' + struct.pack('<L', 8) + ifd0_bytes + exif_ifd
+    payload = b'Exif\0\0' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+def jpeg_with_exif(model, created, modified=None):
+    return BASE_JPEG[:2] + exif_segment(model, created, modified or created) + BASE_JPEG[2:]
+
+def case_titles(n, seed=7):
+    rng = random.Random(seed)
+    for i in range(n):
+        day = 1 + i % 28
+        title = f"2022{1 + i % 12:02d}{day:02d}_{rng.randrange(24):02d}{rng.randrange(60):02d}{i % 60:02d}_{i}"
+        created = f"2022:{1 + i % 12:02d}:{day:02d} {title[9:11]}:{title[11:13]}:{title[13:15]}"
+        yield title, created, MODELS[i % len(MODELS)]
+
+def write_trashdb(path, titles, start=1650000000000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE trashes (_id INTEGER PRIMARY KEY, title TEXT, date_deleted INTEGER)")
+    conn.executemany("INSERT INTO trashes (title, date_deleted) VALUES (?, ?)",
+                     ((title, start + i * 1000) for i, title in enumerate(titles)))
+    conn.commit()
+    conn.close()
+
+# 🗂️ Build a case with `n` images under `root`; returns a dict describing what was written
+def build_case(root, n, seed=7):
+    os.makedirs(root, exist_ok=True)
+    entries = list(case_titles(n, seed))
+    loose_count = int(n * LOOSE_SHARE)
+    loose, zipped = entries[:loose_count], entries[loose_count:]
+    for i, (title, created, model) in enumerate(loose):
+        folder = os.path.join(root, "images", f"d{i // FILES_PER_DIR:04d}")
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{title}.jpg"), 'wb') as f:
+            f.write(jpeg_with_exif(model, created))
+    write_trashdb(os.path.join(root, "trash.db"), [title for title, _, _ in entries])
+
+    zips = []
+    os.makedirs(os.path.join(root, "zips"), exist_ok=True)
+    for z, start in enumerate(range(0, len(zipped), IMAGES_PER_ZIP)):
+        batch = zipped[start:start + IMAGES_PER_ZIP]
+        zip_path = os.path.join(root, "zips", f"dump_{z:03d}.zip")
+        db_tmp = zip_path + ".trash.db"
+        write_trashdb(db_tmp, [title for title, _, _ in batch])
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            archive.write(db_tmp, TRASHDB_MEMBER, compress_type=zipfile.ZIP_DEFLATED)
+            for i, (title, created, model) in enumerate(batch):
+                # Phone dumps mix stored and deflated members
+                archive.writestr(f"{GALLERY_TRASH}/{title}.jpg", jpeg_with_exif(model, created),
+                                 compress_type=zipfile.ZIP_DEFLATED if i % 2 else zipfile.ZIP_STORED)
+        os.remove(db_tmp)
+        zips.append(zip_path)
+    return {"images": n, "loose": loose_count, "zipped": len(zipped), "zips": len(zips)}
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        sys.exit(f"usage: {sys.argv[0]} <folder> <{'|'.join(SCALES)}|N>")
+    size = SCALES.get(sys.argv[2]) or int(sys.argv[2])
+    print(build_case(sys.argv[1], size))
@@ -0,0 +1,80 @@
+import os
+import re
+import sys
+import json
+
+# 🧪 Minimal ExifTool stand-in for running Trashes Panda without the real binary.
+# Point TRASHPANDA_EXIFTOOL at this file. Supports "-json <tags> files..." and the
+# "-stay_open True -@ -" argfile protocol with numbered "-executeN" / "{readyN}" replies.
+
+DATE_PATTERN = re.compile(rb"(\d{4}):(\d{2}):(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+HEADER_BYTES = 64 * 1024
+FAKE_MODEL = os.environ.get("FAKE_EXIFTOOL_MODEL", "FakeCam")
+
+def describe(path, tags):
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_BYTES)
+    dates = [m.group(0).decode('ascii') for m in DATE_PATTERN.finditer(head)]
+    values = {
+        'DateTimeOriginal': dates[0] if dates else None,
+        'ModifyDate': dates[-1] if dates else None,
+        'Model': FAKE_MODEL if dates else None,
+        'Title': None,
+        'FileTypeExtension': os.path.splitext(path)[1].lstrip('.').lower() or None,
+    }
+    record = {'SourceFile': path.replace('\\', '/')}
+    for tag in tags:
+        if values.get(tag) is not None:
+            record[tag] = values[tag]
+    return record
+
+def run(args):
+    tags, files = [], []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ('-charset',):
+            skip = True
+        elif arg.startswith('-'):
+            if arg not in ('-json', '-fast'):
+                tags.append(arg[1:])
+        else:
+            files.append(arg)
+    records = []
+    for path in files:
+        try:
+            records.append(describe(path, tags))
+        except OSError:
+            sys.stderr.write(f"Error: File not found - {path}\n")
+    if records:
+        # Same layout as ExifTool: one object per block, closing brace at column 0
+        blocks = [json.dumps(r, indent=2, ensure_ascii=False) for r in records]
+        sys.stdout.write("[" + ",\n".join(blocks) + "]\n")
+
+def stay_open():
+    sys.stdin.reconfigure(encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    args = []
+    closing = False
+    for line in sys.stdin:
+        arg = line.rstrip('\r\n')
+        if closing and arg == 'False':
+            return
+        closing = arg == '-stay_open'
+        if closing:
+            continue
+        if arg.startswith('-execute'):
+            run(args)
+            sys.stdout.write(f"{{ready{arg[len('-execute'):]}}}\n")
+            sys.stdout.flush()
+            args = []
+        else:
+            args.append(arg)
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if argv[:4] == ['-stay_open', 'True', '-@', '-']:
+        stay_open()
+    else:
+        run(argv)
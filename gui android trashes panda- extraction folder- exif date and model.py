@@ -1,22 +1,71 @@
 import sqlite3
 import os
+import sys
+import io
 import re
+import time
 import csv
 import zipfile
 import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 from PIL import Image
 from PIL.ExifTags import TAGS
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from trashpanda_io import read_zip_headers, copy_member, copy_file
+from trashpanda_exif import DATE_TIME_ORIGINAL, MODEL, read_exif_tags, read_exif_file
+from trashpanda_scan import IMAGE, ZIP, TRASH_DB, scan_tree
+from trashpanda_arrow import OUTPUT_FORMATS, SQL_DATETIME, ColumnarWriter, columnar_available, columnar_path, csv_to_columnar
 
 EXTRACTED_DB_DIR = Path("ExtractedDBs")
 EXTRACTED_DB_DIR.mkdir(exist_ok=True)
+EXIF_WORKERS = max(1, min(32, os.cpu_count() or 1))
+READ_IMAGES_IN_ARCHIVE = True  # False extracts gallery images to a temp folder first
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic')
+ZIP_CHUNK_SIZE = 1000
+FETCH_SIZE = 5000  # rows pulled per cursor.fetchmany()
+UPDATE_CHUNK_SIZE = 5000  # rows written per enrichment transaction
+# "alter" adds columns to trashes in the working copy, "side-table" writes a trashes_enrichment
+# table next to it, "attach" keeps the copy read-only and writes to a separate *.enrichment.db
+ENRICHMENT_MODES = ("alter", "side-table", "attach")
+ENRICHMENT_MODE = "alter"
+ENRICHMENT_COLUMNS = ['converted_title', 'exif_created', 'file_type', 'file_path', 'camera_model']
+# 🏛️ "parquet"/"feather" also writes a typed columnar copy next to each CSV (needs pyarrow)
+OUTPUT_FORMAT = "csv"
+COLUMN_TYPES = {'Unixepoch Timestamp': "int64", 'Deleted_CST': SQL_DATETIME, 'EXIF Created': "%Y/%m/%d %H:%M:%S"}
+WORKING_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",  # page reads come from a mapping of the working copy
+]
+
+# ⚡ Header-only fast path; None sends the file through Pillow below
+def get_exif_data_fast(image_path):
+    found = read_exif_file(image_path) if isinstance(image_path, (str, Path)) else read_exif_tags(image_path)
+    if found is None:
+        return None
+    tags = found[1]
+    exif_time = tags.get(DATE_TIME_ORIGINAL)
+    camera_model = tags.get(MODEL)
+    try:
+        if exif_time is not None:
+            exif_time = datetime.strptime(exif_time, "%Y:%m:%d %H:%M:%S").strftime("%Y/%m/%d %H:%M:%S")
+    except ValueError:
+        return None  # let Pillow report it
+    return exif_time, camera_model.strip() if camera_model is not None else None
 
 def get_exif_data(image_path):
+    fast = get_exif_data_fast(image_path)
+    if fast is not None:
+        return fast
+    if not isinstance(image_path, (str, Path)):
+        image_path.seek(0)
     exif_time = None
     camera_model = None
     try:
@@ -34,38 +83,153 @@ def get_exif_data(image_path):
         print(f"⚠️ Error reading EXIF from {image_path}: {e}")
     return exif_time, camera_model
 
-def convert_timestamp(text):
-    patterns = [
-        (r'(\d{8})[-_](\d{6,8})', 'ymd_hms'),
-        (r'(\d{4})-(\d{2})-(\d{2})-(\d{6,8})', 'ymd_dash'),
-        (r'\d{13}', 'epoch_ms'),
-        (r'\d{10}', 'epoch_s')
-    ]
+# ⚡ Read EXIF for many images across worker processes, results in input order
+def get_exif_data_parallel(image_paths, workers=None):
+    workers = workers or EXIF_WORKERS
+    if workers <= 1 or len(image_paths) < 2:
+        return [get_exif_data(p) for p in image_paths]
+    chunksize = max(1, min(64, len(image_paths) // (workers * 4)))
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(get_exif_data, image_paths, chunksize=chunksize))
+
+# 🗜️ EXIF for ZIP members, parsed from header bytes without writing images to disk
+def get_exif_data_from_zip(task):
+    zip_path, members = task
+    results = []
+    for member, data in read_zip_headers(zip_path, members):
+        results.append(get_exif_data(io.BytesIO(data)) if data else (None, None))
+    return results
+
+def get_exif_data_from_zip_parallel(zip_path, members, workers=None):
+    workers = workers or EXIF_WORKERS
+    size = max(ZIP_CHUNK_SIZE, -(-len(members) // workers))
+    tasks = [(zip_path, members[i:i + size]) for i in range(0, len(members), size)]
+    if len(tasks) <= 1:
+        return [exif for task in tasks for exif in get_exif_data_from_zip(task)]
+    with ProcessPoolExecutor(min(workers, len(tasks))) as executor:
+        return [exif for chunk in executor.map(get_exif_data_from_zip, tasks) for exif in chunk]
+
+# 🕒 Timestamps embedded in trash titles. One combined, precompiled pattern scans each title
+# once, left to right. TIMESTAMP_COMPAT = True (or --timestamp-compat) reproduces the original
+# four-pass output (grouped by pattern, with overlaps such as a 13-digit epoch also read as a
+# 10-digit one).
+TIMESTAMP_COMPAT = False
+TIMESTAMP_PATTERNS = [
+    (re.compile(r'(\d{8})[-_](\d{6,8})'), 'ymd_hms'),
+    (re.compile(r'(\d{4})-(\d{2})-(\d{2})-(\d{6,8})'), 'ymd_dash'),
+    (re.compile(r'\d{13}'), 'epoch_ms'),
+    (re.compile(r'\d{10}'), 'epoch_s')
+]
+TIMESTAMP_PATTERN = re.compile(
+    r'(?P<ymd_hms>(?P<hms_date>\d{8})[-_](?P<hms_time>\d{6,8}))'
+    r'|(?P<ymd_dash>(?P<dash_y>\d{4})-(?P<dash_m>\d{2})-(?P<dash_d>\d{2})-(?P<dash_time>\d{6,8}))'
+    r'|(?P<epoch_ms>\d{13})'
+    r'|(?P<epoch_s>\d{10})'
+)
+
+@lru_cache(maxsize=65536)
+def format_ymd(digits):
+    year, month, day = int(digits[:4]), int(digits[4:6]), int(digits[6:8])
+    datetime(year, month, day)  # validates, raises ValueError like strptime did
+    return f"{digits[:4]}/{digits[4:6]}/{digits[6:8]}"
+
+@lru_cache(maxsize=65536)
+def format_hms(digits):
+    hour, minute, second = int(digits[:2]), int(digits[2:4]), int(digits[4:6])
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError(f"bad time {digits}")
+    return f"{digits[:2]}:{digits[2:4]}:{digits[4:6]}"
+
+def format_epoch(seconds):
+    t = time.localtime(seconds)
+    return f"{t.tm_year:04d}/{t.tm_mon:02d}/{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+
+def format_match(fmt, match):
+    combined = match.re is TIMESTAMP_PATTERN
+    if fmt == 'ymd_hms':
+        date_part, time_part = match.group('hms_date', 'hms_time') if combined else match.groups()
+        return f"{format_ymd(date_part)} {format_hms(time_part)}"
+    if fmt == 'ymd_dash':
+        year, month, day, time_part = (match.group('dash_y', 'dash_m', 'dash_d', 'dash_time')
+                                       if combined else match.groups())
+        return f"{format_ymd(year + month + day)} {format_hms(time_part)}"
+    if fmt == 'epoch_ms':
+        return format_epoch(int(match.group(0)) // 1000)
+    return format_epoch(int(match.group(0)))
+
+def iter_timestamp_matches(text, compat):
+    if compat:
+        for pattern, fmt in TIMESTAMP_PATTERNS:
+            for match in pattern.finditer(text):
+                yield fmt, match
+    else:
+        for match in TIMESTAMP_PATTERN.finditer(text):
+            yield match.lastgroup, match
+
+# The cache is keyed on an explicit compat flag, so changing TIMESTAMP_COMPAT never
+# returns a result cached under the other mode
+def convert_timestamp(text, compat=None):
+    return cached_timestamp(text, TIMESTAMP_COMPAT if compat is None else bool(compat))
+
+@lru_cache(maxsize=65536)
+def cached_timestamp(text, compat):
     converted = []
-    for pattern, fmt in patterns:
-        for match in re.finditer(pattern, text):
+    for fmt, match in iter_timestamp_matches(text, compat):
+        try:
+            converted.append(format_match(fmt, match))
+        except (ValueError, OverflowError, OSError):
+            continue
+    return ", ".join(converted) if converted else None
+
+# 🧮 Convert a whole column of titles: one regex sweep over the newline-joined column
+def convert_timestamps(titles, compat=None):
+    compat = TIMESTAMP_COMPAT if compat is None else compat
+    titles = [t if isinstance(t, str) else "" for t in titles]
+    ends, offset = [], 0
+    for title in titles:
+        offset += len(title) + 1
+        ends.append(offset)
+    found = [None] * len(titles)
+    passes = ([(p.finditer("\n".join(titles)), fmt) for p, fmt in TIMESTAMP_PATTERNS] if compat
+              else [(TIMESTAMP_PATTERN.finditer("\n".join(titles)), None)])
+    for matches, fmt in passes:
+        idx = 0  # matches arrive in order, so walk the title boundaries instead of searching them
+        for match in matches:
+            start = match.start()
+            while start >= ends[idx]:
+                idx += 1
             try:
-                if fmt == 'ymd_hms':
-                    date_part, time_part = match.groups()
-                    dt = datetime.strptime(date_part + time_part[:6], "%Y%m%d%H%M%S")
-                elif fmt == 'ymd_dash':
-                    year, month, day, time_part = match.groups()
-                    dt = datetime.strptime(f"{year}{month}{day}{time_part[:6]}", "%Y%m%d%H%M%S")
-                elif fmt == 'epoch_ms':
-                    timestamp = int(match.group(0)) / 1000
-                    dt = datetime.fromtimestamp(timestamp)
-                elif fmt == 'epoch_s':
-                    timestamp = int(match.group(0))
-                    dt = datetime.fromtimestamp(timestamp)
-                converted.append(dt.strftime("%Y/%m/%d %H:%M:%S"))
-            except (ValueError, OverflowError):
+                text = format_match(fmt or match.lastgroup, match)
+            except (ValueError, OverflowError, OSError):
                 continue
-    return ", ".join(converted) if converted else None
+            if found[idx] is None:
+                found[idx] = [text]
+            else:
+                found[idx].append(text)
+    return [", ".join(parts) if parts else None for parts in found]
+
+def enrichment_db_path(db_file):
+    return Path(db_file).with_suffix(".enrichment.db")
+
+# 🔌 Open the DB for enrichment: (connection, name of the trashes table to read)
+def open_enrichment(db_file, mode):
+    if mode == "attach":
+        conn = sqlite3.connect(enrichment_db_path(db_file), uri=True)
+        conn.execute("ATTACH DATABASE ? AS evidence", (Path(db_file).resolve().as_uri() + "?mode=ro",))
+        return conn, "evidence"
+    return sqlite3.connect(db_file), "main"
 
-def update_database(db_file, image_folder):
-    conn = sqlite3.connect(db_file)
+def member_name(member):
+    return member.filename if isinstance(member, zipfile.ZipInfo) else member
+
+def update_database(db_file, image_folder=None, zip_path=None, zip_members=None, mode=None, workers=None,
+                    compat=None):
+    mode = mode or ENRICHMENT_MODE
+    if mode not in ENRICHMENT_MODES:
+        raise ValueError(f"Unknown enrichment mode: {mode}")
+    conn, schema = open_enrichment(db_file, mode)
     cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    cursor.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table'")
     tables = [row[0].lower() for row in cursor.fetchall()]
     if 'trashes' not in tables:
         print(f"❌ 'trashes' table not found in {db_file}")
@@ -73,146 +237,349 @@ def update_database(db_file, image_folder):
         conn.close()
         return False
 
-    cursor.execute("PRAGMA table_info(trashes)")
-    columns = [col[1] for col in cursor.fetchall()]
-    if 'converted_title' not in columns:
-        cursor.execute("ALTER TABLE trashes ADD COLUMN converted_title TEXT")
-    if 'exif_created' not in columns:
-        cursor.execute("ALTER TABLE trashes ADD COLUMN exif_created TEXT")
-    if 'file_type' not in columns:
-        cursor.execute("ALTER TABLE trashes ADD COLUMN file_type TEXT")
-    if 'file_path' not in columns:
-        cursor.execute("ALTER TABLE trashes ADD COLUMN file_path TEXT")
-    if 'camera_model' not in columns:
-        cursor.execute("ALTER TABLE trashes ADD COLUMN camera_model TEXT")
-
-    image_files = list(Path(image_folder).rglob("*.[jJpP][pPnN][gG]"))
-    image_lookup = {f.stem: f for f in image_files}
-
-    cursor.execute("SELECT rowid, title FROM trashes")
-    rows = cursor.fetchall()
-
-    for rowid, title in rows:
-        converted = convert_timestamp(title)
+    if zip_members is not None:
+        image_lookup = {Path(member_name(m)).stem: m for m in zip_members}
+    else:
+        image_lookup = {Path(p).stem: Path(p) for kind, p in scan_tree(image_folder, IMAGE_EXTENSIONS) if kind == IMAGE}
+
+    cursor.execute(f"SELECT rowid, title FROM {schema}.trashes")
+    rows = list(iter_cursor(cursor))
+
+    # All EXIF and title parsing happens before the first write, so no transaction waits on I/O
+    matched = sorted({image_lookup[title] for _, title in rows if title in image_lookup},
+                     key=member_name if zip_members is not None else None)
+    if zip_members is not None:
+        exif_by_path = dict(zip(matched, get_exif_data_from_zip_parallel(zip_path, matched, workers)))
+    else:
+        exif_by_path = dict(zip(matched, get_exif_data_parallel(matched, workers)))
+
+    updates = []
+    converted_titles = convert_timestamps([title for _, title in rows], compat)
+    for (rowid, title), converted in zip(rows, converted_titles):
         exif_time = None
         file_type = None
         file_path = None
         camera_model = None
         if title in image_lookup:
             image_path = image_lookup[title]
-            exif_time, camera_model = get_exif_data(image_path)
-            file_type = image_path.suffix.lower().lstrip(".")
-            file_path = str(image_path)
-        cursor.execute(
-            "UPDATE trashes SET converted_title = ?, exif_created = ?, file_type = ?, file_path = ?, camera_model = ? WHERE rowid = ?",
-            (converted, exif_time, file_type, file_path, camera_model, rowid)
-        )
+            exif_time, camera_model = exif_by_path[image_path]
+            file_type = Path(member_name(image_path)).suffix.lower().lstrip(".")
+            file_path = f"{zip_path} > {member_name(image_path)}" if zip_members is not None else str(image_path)
+        updates.append((converted, exif_time, file_type, file_path, camera_model, rowid))
+
+    # Only the working copy (or the side DB) gets the unsafe-but-fast PRAGMAs
+    for pragma in WORKING_PRAGMAS:
+        cursor.execute(pragma)
+    if mode == "alter":
+        cursor.execute("PRAGMA table_info(trashes)")
+        columns = [col[1] for col in cursor.fetchall()]
+        for column in ENRICHMENT_COLUMNS:
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE trashes ADD COLUMN {column} TEXT")
+        statement = f"UPDATE trashes SET {', '.join(c + ' = ?' for c in ENRICHMENT_COLUMNS)} WHERE rowid = ?"
+    else:
+        cursor.execute("DROP TABLE IF EXISTS main.trashes_enrichment")
+        cursor.execute(f"CREATE TABLE main.trashes_enrichment ({', '.join(c + ' TEXT' for c in ENRICHMENT_COLUMNS)}, "
+                       "trash_rowid INTEGER PRIMARY KEY)")
+        statement = (f"INSERT INTO main.trashes_enrichment ({', '.join(ENRICHMENT_COLUMNS)}, trash_rowid) "
+                     f"VALUES ({', '.join('?' * (len(ENRICHMENT_COLUMNS) + 1))})")
+    for start in range(0, len(updates), UPDATE_CHUNK_SIZE):
+        with conn:
+            conn.executemany(statement, updates[start:start + UPDATE_CHUNK_SIZE])
     conn.commit()
     conn.close()
     return True
 
-def export_to_csv(db_file, output_csv):
-    conn = sqlite3.connect(db_file)
+# 🧾 Pull rows in fixed-size batches instead of fetchall()
+def iter_cursor(cursor, size=FETCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+def columnar_format(fmt):
+    fmt = fmt or OUTPUT_FORMAT
+    if fmt == "csv":
+        return None
+    if not columnar_available():
+        print(f"⚠️ {fmt} output needs pyarrow; writing CSV only.")
+        return None
+    return fmt
+
+def export_to_csv(db_file, output_csv, mode=None, fmt=None):
+    mode = mode or ENRICHMENT_MODE
+    fmt = columnar_format(fmt)
+    conn, schema = open_enrichment(db_file, mode)
     cursor = conn.cursor()
-    query = """
+    if mode == "alter":
+        source = "trashes AS t"
+        e = "t"
+    else:
+        source = f"{schema}.trashes AS t LEFT JOIN main.trashes_enrichment AS e ON e.trash_rowid = t.rowid"
+        e = "e"
+    query = f"""
     SELECT 
-        title AS 'Original Title',
-        converted_title AS 'Extracted Timestamps',
-        exif_created AS 'EXIF Created',
-        file_type AS 'File Type',
-        camera_model AS 'Camera Model',
-        date_deleted AS 'Unixepoch Timestamp',
-        datetime((date_deleted / 1000), 'unixepoch', 'localtime') AS Deleted_CST,
-        file_path AS 'File Path'
-    FROM trashes
+        t.title AS 'Original Title',
+        {e}.converted_title AS 'Extracted Timestamps',
+        {e}.exif_created AS 'EXIF Created',
+        {e}.file_type AS 'File Type',
+        {e}.camera_model AS 'Camera Model',
+        t.date_deleted AS 'Unixepoch Timestamp',
+        datetime((t.date_deleted / 1000), 'unixepoch', 'localtime') AS Deleted_CST,
+        {e}.file_path AS 'File Path'
+    FROM {source}
     """
     try:
         cursor.execute(query)
-        rows = cursor.fetchall()
         column_names = [desc[0] for desc in cursor.description]
-        with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(column_names)
-            writer.writerows(rows)
+        columnar = None
+        if fmt:
+            columnar = ColumnarWriter(columnar_path(str(output_csv), fmt), column_names, fmt, COLUMN_TYPES)
+        try:
+            with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(column_names)
+                for row in iter_cursor(cursor):
+                    writer.writerow(row)
+                    if columnar:
+                        columnar.write(row)
+        except Exception:
+            if columnar:
+                columnar.discard()
+            raise
         print(f"📁 Data exported to {output_csv}")
+        if columnar:
+            columnar.close()
+            print(f"🏛️ {fmt} copy: {columnar.path}")
+        return True
     except sqlite3.Error as e:
         print(f"❌ SQLite error: {e}")
+        return False
     finally:
         conn.close()
 
-def find_and_process_zip(root_folder):
+# 📦 Enrich every usable trash.db in one ZIP, yielding each finished working copy.
+# The central directory is scanned once; ZipInfo objects go straight to the EXIF readers.
+def iter_zip_databases(zip_path, temp_dir, workers=None, name_prefix=None, mode=None, compat=None):
+    zip_path = Path(zip_path)
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        infos = z.infolist()
+        db_candidates = [i for i in infos if i.filename.endswith("trash.db")]
+        image_candidates = [
+            i for i in infos
+            if i.filename.lower().endswith(IMAGE_EXTENSIONS) and "com.sec.android.gallery3d" in i.filename
+        ]
+        if not db_candidates:
+            print("❌ No trash.db found.")
+            return
+        for idx, db_info in enumerate(db_candidates):
+            suffix = f"_{idx}" if len(db_candidates) > 1 else ""
+            db_target_path = EXTRACTED_DB_DIR / f"{name_prefix or zip_path.stem}{suffix}_{Path(db_info.filename).name}"
+            db_target_path.parent.mkdir(parents=True, exist_ok=True)
+            digest = copy_member(z, db_info, db_target_path)
+            print(f"📦 Extracted DB: {db_target_path} (sha256 {digest})")
+            try:
+                conn = sqlite3.connect(db_target_path)
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                tables = [row[0].lower() for row in cursor.fetchall()]
+                conn.close()
+            except Exception as e:
+                print(f"⚠️ Could not open {db_target_path}: {e}")
+                continue
+            if 'trashes' not in tables:
+                print(f"⚠️ Skipping {db_target_path} — no 'trashes' table found.")
+                continue
+            if not image_candidates:
+                print("❌ No image files found.")
+                continue
+            top = Path(image_candidates[0].filename).parts[0]
+            members = [i for i in image_candidates if Path(i.filename).parts[0] == top]
+            if READ_IMAGES_IN_ARCHIVE:
+                success = update_database(db_target_path, zip_path=zip_path, zip_members=members, mode=mode,
+                                          workers=workers, compat=compat)
+            else:
+                for info in members:
+                    z.extract(info, temp_dir)
+                image_folder = Path(temp_dir) / top
+                success = update_database(db_target_path, image_folder, mode=mode, workers=workers, compat=compat)
+            if success:
+                yield db_info.filename, db_target_path
+
+def find_and_process_zip(root_folder, workers=None, mode=None, fmt=None, compat=None):
     root = Path(root_folder)
     temp_dir = Path(tempfile.mkdtemp())
     try:
-        for zip_path in root.rglob("*.zip"):
+        for zip_path in (Path(p) for kind, p in scan_tree(root, IMAGE_EXTENSIONS) if kind == ZIP):
             print(f"\n🔍 Scanning ZIP: {zip_path.name}")
             try:
-                with zipfile.ZipFile(zip_path, 'r') as z:
-                    members = z.namelist()
-                    db_candidates = [m for m in members if m.endswith("trash.db")]
-                    image_candidates = [
-                        m for m in members
-                        if m.lower().endswith((".jpg", ".jpeg", ".png")) and "com.sec.android.gallery3d" in m
-                    ]
-                    if not db_candidates:
-                        print("❌ No trash.db found.")
-                        continue
-                    for db_member in db_candidates:
-                        db_target_path = EXTRACTED_DB_DIR / f"{zip_path.stem}_{Path(db_member).name}"
-                        db_target_path.parent.mkdir(parents=True, exist_ok=True)
-                        with z.open(db_member) as source, open(db_target_path, 'wb') as target:
-                            shutil.copyfileobj(source, target)
-                        print(f"📦 Extracted DB: {db_target_path}")
-                        try:
-                            conn = sqlite3.connect(db_target_path)
-                            cursor = conn.cursor()
-                            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                            tables = [row[0].lower() for row in cursor.fetchall()]
-                            conn.close()
-                        except Exception as e:
-                            print(f"⚠️ Could not open {db_target_path}: {e}")
-                            continue
-                        if 'trashes' not in tables:
-                            print(f"⚠️ Skipping {db_target_path} — no 'trashes' table found.")
-                            continue
-                        if not image_candidates:
-                            print("❌ No image files found.")
-                            continue
-                        for img in image_candidates:
-                            z.extract(img, temp_dir)
-                        image_folder = temp_dir / Path(image_candidates[0]).parts[0]
-                        success = update_database(db_target_path, image_folder)
-                        if success:
-                            export_to_csv(db_target_path, "output.csv")
-                            print("🎉 Successfully processed and exported.")
-                            return
+                for _, db_target_path in iter_zip_databases(zip_path, temp_dir, workers=workers, mode=mode,
+                                                            compat=compat):
+                    if not export_to_csv(db_target_path, "output.csv", mode, fmt):
+                        return False
+                    print("🎉 Successfully processed and exported.")
+                    return True
             except zipfile.BadZipFile:
                 print(f"⚠️ Skipping invalid ZIP: {zip_path}")
         print("\n❌ No ZIP found with both a valid trash.db and image files.")
+        return False
     finally:
         try:
             shutil.rmtree(temp_dir)
         except Exception as e:
             print(f"⚠️ Could not delete temp folder: {e}")
 
+# 🗂️ Batch mode: every ZIP and every loose trash.db, one worker process per source
+BATCH_OUTPUT_DIR = Path("BatchOutput")
+BATCH_COMBINED_CSV = BATCH_OUTPUT_DIR / "combined_output.csv"
+
+def safe_name(text):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in text)
+
+# Runs in a worker process; returns [(source archive, db member, csv path)]
+def process_source(source, root_folder, output_dir, tag, mode=None, fmt=None, compat=None):
+    source = Path(source)
+    results = []
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        if source.suffix.lower() == ".zip":
+            print(f"\n🔍 Scanning ZIP: {source.name}")
+            try:
+                for db_member, db_target_path in iter_zip_databases(source, temp_dir, workers=1, name_prefix=tag,
+                                                                    mode=mode, compat=compat):
+                    csv_path = Path(output_dir) / f"{safe_name(db_target_path.stem)}.csv"
+                    if export_to_csv(db_target_path, csv_path, mode, fmt):
+                        results.append((str(source), db_member, str(csv_path)))
+            except zipfile.BadZipFile:
+                print(f"⚠️ Skipping invalid ZIP: {source}")
+        else:
+            # Loose trash.db: enrich a copy, matched against images anywhere under the root folder
+            db_target_path = EXTRACTED_DB_DIR / f"{tag}_{source.name}"
+            digest = copy_file(source, db_target_path)
+            print(f"📦 Copied DB: {db_target_path} (sha256 {digest})")
+            if update_database(db_target_path, root_folder, mode=mode, workers=1, compat=compat):
+                csv_path = Path(output_dir) / f"{safe_name(db_target_path.stem)}.csv"
+                if export_to_csv(db_target_path, csv_path, mode, fmt):
+                    results.append(("", str(source), str(csv_path)))
+    except Exception as e:
+        print(f"❌ Failed to process {source}: {e}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+def process_all_sources(root_folder, workers=None, combined=True, mode=None, fmt=None, compat=None):
+    root = Path(root_folder)
+    found = {ZIP: [], TRASH_DB: []}
+    for kind, path in scan_tree(root, IMAGE_EXTENSIONS):  # one pass for both kinds
+        if kind in found:
+            found[kind].append(Path(path))
+    sources = sorted(found[ZIP]) + sorted(found[TRASH_DB])
+    if not sources:
+        print("❌ No ZIPs or trash.db files found.")
+        return []
+    BATCH_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(len(sources), workers or EXIF_WORKERS))
+    print(f"🗂️ Processing {len(sources)} sources on {workers} workers")
+    with ProcessPoolExecutor(workers) as executor:
+        # Numbered tags keep outputs apart when two archives share a file name
+        futures = [executor.submit(process_source, str(s), str(root), str(BATCH_OUTPUT_DIR),
+                                   f"{idx:03d}_{safe_name(s.stem if s.suffix.lower() == '.zip' else s.parent.name)}",
+                                   mode, fmt, compat)
+                   for idx, s in enumerate(sources)]
+        results = [r for future in futures for r in future.result()]
+    for archive, db_member, csv_path in results:
+        print(f"📁 {archive or db_member} → {csv_path}")
+    if combined and results:
+        with open(BATCH_COMBINED_CSV, 'w', newline='', encoding='utf-8') as f_out:
+            writer = csv.writer(f_out)
+            header_written = False
+            for archive, db_member, csv_path in results:
+                with open(csv_path, 'r', newline='', encoding='utf-8') as f_in:
+                    reader = csv.reader(f_in)
+                    header = next(reader, None)
+                    if header and not header_written:
+                        writer.writerow(["Source Archive", "Source DB"] + header)
+                        header_written = True
+                    for row in reader:
+                        writer.writerow([archive, db_member] + row)
+        print(f"📁 Combined output: {BATCH_COMBINED_CSV}")
+        fmt = columnar_format(fmt)
+        if fmt:
+            print(f"🏛️ {fmt} copy: {csv_to_columnar(str(BATCH_COMBINED_CSV), fmt, COLUMN_TYPES)}")
+    return results
+
+# 🖥️ Headless command line: "process" (first ZIP → output.csv) or "batch" (every source)
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Trashes Panda Processor (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("process", "batch"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("folder", help="folder containing ZIPs and/or trash.db files")
+        cmd.add_argument("--workers", type=int, default=EXIF_WORKERS)
+        cmd.add_argument("--mode", choices=ENRICHMENT_MODES, default=ENRICHMENT_MODE,
+                         help="where the enrichment columns are written")
+        cmd.add_argument("--json-timings", metavar="FILE",
+                         help="write per-stage wall/CPU/RSS timings as JSON ('-' for stdout)")
+        cmd.add_argument("--format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT,
+                         help="also write a Parquet/Feather copy of each CSV (needs pyarrow)")
+        cmd.add_argument("--timestamp-compat", action="store_true", default=TIMESTAMP_COMPAT,
+                         help="convert title timestamps exactly as the original four-pass version did")
+        if name == "batch":
+            cmd.add_argument("--output", help=f"output folder (default: {BATCH_OUTPUT_DIR})")
+    return parser
+
+def run_cli(argv):
+    global BATCH_OUTPUT_DIR, BATCH_COMBINED_CSV
+    from trashpanda_timing import StageTimings
+    args = build_arg_parser().parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"❌ Not a folder: {args.folder}")
+        return 2
+    if getattr(args, "output", None):
+        BATCH_OUTPUT_DIR = Path(args.output)
+        BATCH_COMBINED_CSV = BATCH_OUTPUT_DIR / "combined_output.csv"
+    timings = StageTimings()
+    with timings.stage(args.command, workers=args.workers, mode=args.mode) as stage:
+        if args.command == "batch":
+            stage["sources"] = len(process_all_sources(args.folder, args.workers, mode=args.mode, fmt=args.format,
+                                                       compat=args.timestamp_compat))
+            ok = stage["sources"] > 0
+        else:
+            ok = find_and_process_zip(args.folder, args.workers, args.mode, args.format, args.timestamp_compat)
+    for line in timings.summary_lines():
+        print(line)
+    if args.json_timings:
+        timings.write_json(args.json_timings, command=args.command, folder=args.folder, workers=args.workers)
+    return 0 if ok else 1
+
 # GUI
-def run_processing(folder_path, status_label):
+def run_processing(folder_path, status_label, batch=False):
+    from tkinter import messagebox
     try:
         status_label.config(text="🔄 Processing...")
-        find_and_process_zip(folder_path)
-        status_label.config(text="✅ Done! Output saved as output.csv")
+        if batch:
+            process_all_sources(folder_path)
+            status_label.config(text=f"✅ Done! Outputs saved in {BATCH_OUTPUT_DIR}")
+        else:
+            find_and_process_zip(folder_path)
+            status_label.config(text="✅ Done! Output saved as output.csv")
     except Exception as e:
         status_label.config(text="❌ Error occurred")
         messagebox.showerror("Error", str(e))
 
-def browse_folder(entry, status_label):
+def browse_folder(entry, status_label, batch_var):
+    import tkinter as tk
+    from tkinter import filedialog
     folder = filedialog.askdirectory()
     if folder:
         entry.delete(0, tk.END)
         entry.insert(0, folder)
-        threading.Thread(target=run_processing, args=(folder, status_label)).start()
+        threading.Thread(target=run_processing, args=(folder, status_label, batch_var.get())).start()
 
 def create_gui():
+    import tkinter as tk
     root = tk.Tk()
     root.title("Trashes Panda Processor")
     root.geometry("500x180")
@@ -226,14 +593,21 @@ def create_gui():
     entry = tk.Entry(frame, width=50)
     entry.pack(side=tk.LEFT, padx=5)
 
+    batch_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(root, text="Process every ZIP and trash.db (batch)", variable=batch_var,
+                   font=("Segoe UI", 9)).pack()
+
     status_label = tk.Label(root, text="", font=("Segoe UI", 9), fg="blue")
-    status_label.pack(pady=20)
+    status_label.pack(pady=10)
 
-    browse_btn = tk.Button(frame, text="Browse", command=lambda: browse_folder(entry, status_label))
+    browse_btn = tk.Button(frame, text="Browse", command=lambda: browse_folder(entry, status_label, batch_var))
     browse_btn.pack(side=tk.LEFT)
 
     root.mainloop()
 
-# 🏁 Launch the GUI
+# 🏁 Launch the CLI when given arguments, else the GUI
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     create_gui()
@@ -1,15 +1,39 @@
 import os
+import sys
 import subprocess
 import threading
 import urllib.request
 import zipfile
 import shutil
 import tempfile
+import io
 import json
+import time
+import hashlib
 import csv
+import queue
 import sqlite3
+import asyncio
+import multiprocessing
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 
+from trashpanda_io import MADV_SEQUENTIAL, BufferReader, mapped, read_zip_headers, sha256_file
+from trashpanda_exif import read_exif_tags, read_exif_file
+from trashpanda_scan import IMAGE, ZIP, TRASH_DB, scan_tree
+from trashpanda_case import CaseStore
+from trashpanda_identity import RADIUS, cluster_duplicates, content_identity, parse_phash
+from trashpanda_timing import PROFILE_MODES, RunMetrics, StageTimings
+from trashpanda_arrow import (OUTPUT_FORMATS, SQL_DATETIME, EXIF_DATETIME, ColumnarWriter, columnar_available,
+                              columnar_path, csv_to_columnar, fresh_columnar, iter_columnar_rows)
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow backend is optional
+    Image = None
+
 # --- Setup ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXIFTOOL_URL = "https://exiftool.org/exiftool-13.32_64.zip"
@@ -24,15 +48,119 @@ OUTPUT_TRASHDB = os.path.join(OUTPUT_DIR, "output_trashdb.csv")
 MERGED_OUTPUT = os.path.join(OUTPUT_DIR, "merged_output.csv")
 
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tiff', '.heic'}
-ZIP_EXTENSIONS = {'.zip'}
+# 🧭 Optional directory index: unchanged folders are not listed again on the next scan
+SCAN_INDEX_ENABLED = os.environ.get("TRASHPANDA_SCAN_INDEX", "0") == "1"
+SCAN_INDEX_PATH = os.path.join(OUTPUT_DIR, "scan_index.db")
+
+# 🏷️ ExifTool tags pulled for every image
+EXIFTOOL_TAGS = ['-DateTimeOriginal', '-ModifyDate', '-Model', '-Title', '-FileTypeExtension']
+# -fast stops at the image data instead of reading on to the end of the file for trailers,
+# so with content identity on the hash pass is the only full read of each image
+EXIFTOOL_OPTIONS = ['-fast']
+# "per-file" spawns ExifTool for each image, "batch" keeps -stay_open sessions alive,
+# "async" drives the same sessions from one asyncio loop instead of a thread each,
+# "pillow" parses EXIF in-process without ExifTool, "native" reads only the EXIF header
+# bytes (trashpanda_exif) and falls back to Pillow/ExifTool for files it cannot decode
+METADATA_BACKENDS = ("batch", "per-file", "pillow", "native", "async")
+EXIFTOOL_BACKENDS = ("batch", "per-file", "async")
+METADATA_BACKEND = os.environ.get("TRASHPANDA_BACKEND", "batch")
+METADATA_WORKERS = max(1, min(32, os.cpu_count() or 1))
+EXIFTOOL_BATCH_SIZE = 50
+DISCOVERY_QUEUE_SIZE = 2000  # discovered items buffered ahead of the readers
+FETCH_SIZE = 5000  # rows pulled per cursor.fetchmany()
+PILLOW_TAGS = {0x9003: 'DateTimeOriginal', 0x0132: 'ModifyDate', 0x0110: 'Model'}
+PILLOW_EXTENSIONS = {'jpeg': 'jpg', 'tiff': 'tif'}
+# "in-archive" reads EXIF headers straight out of ZIP members, "extract" unpacks to a temp dir first;
+# "auto" reads in-archive for the native/Pillow backends and extracts for ExifTool, so an ExifTool
+# run reads archives with ExifTool like it reads loose files
+ZIP_READ_MODES = ("auto", "in-archive", "extract")
+ZIP_READ_MODE = os.environ.get("TRASHPANDA_ZIP_MODE", "auto")
+ZIP_CHUNK_SIZE = 1000
+# 🗄️ Metadata cache: "stat" keys files by (path, size, mtime), "content" by SHA-256;
+# ZIP members are always keyed by CRC-32 + size + member name
+CACHE_ENABLED = os.environ.get("TRASHPANDA_CACHE", "1") != "0"
+CACHE_PATH = os.path.join(OUTPUT_DIR, "metadata_cache.db")
+CACHE_KEY_MODE = os.environ.get("TRASHPANDA_CACHE_KEY", "stat")
+CACHE_MAX_ENTRIES = 2_000_000
+# 🗃️ ZIP inventory bound: total member entries kept across archives, oldest archive evicted first
+ZIP_INVENTORY_MAX_ENTRIES = int(os.environ.get("TRASHPANDA_ZIP_INVENTORY_MAX", "500000"))
+CACHE_FIELDS = ('DateTimeOriginal', 'ModifyDate', 'Model', 'Title', 'FileTypeExtension', 'SHA256', 'PHash')
+# 📒 Job journal: metadata rows are committed in chunks alongside the CSV offset, so an
+# interrupted extraction resumes where it stopped; delta runs reuse unchanged rows
+JOURNAL_ENABLED = os.environ.get("TRASHPANDA_JOURNAL", "1") != "0"
+JOURNAL_PATH = os.path.join(OUTPUT_DIR, "job_journal.db")
+JOURNAL_COMMIT_ROWS = 1000
+METADATA_COLUMNS = ['DateCreated', 'DateModified', 'Camera', 'Title', 'Extension', 'FilePath']
+
+# 🧬 Content identity (trashpanda_identity), off by default: the read pass loads each whole
+# image once and takes its EXIF, SHA-256 and perceptual hash from the same bytes. Merge then
+# clusters exact and near duplicates in case.db; a file with no title match inherits the
+# trash row of a matched file in its cluster (renamed / recompressed / copied evidence).
+IDENTITY_ENABLED = os.environ.get("TRASHPANDA_IDENTITY", "0") == "1"
+IDENTITY_COLUMNS = ['SHA256', 'PHash']
+IDENTITY_RADIUS = int(os.environ.get("TRASHPANDA_IDENTITY_RADIUS", RADIUS))
+OUTPUT_DUPLICATES = os.path.join(OUTPUT_DIR, "output_duplicates.csv")
+
+# 🏛️ Optional Parquet/Feather copy of every output CSV (needs pyarrow); merge reads the
+# columnar copies when they are current. EXIF dates stay text with a parsed "_ts" column.
+OUTPUT_FORMAT = os.environ.get("TRASHPANDA_FORMAT", "csv")
+TRASH_TYPES = {"Unixepoch Timestamp": "int64", "Deleted_CST": SQL_DATETIME}
+EXIF_DATES = {"DateCreated": EXIF_DATETIME, "DateModified": EXIF_DATETIME}
+
+# 🗄️ Case database (trashpanda_case): extraction and the trash.db export also fill
+# output/case.db, and merge/export run as queries over it. The CSVs stay as exports;
+# merge falls back to reading them when the case database is off or out of date.
+CASE_ENABLED = os.environ.get("TRASHPANDA_CASE", "1") != "0"
+CASE_PATH = os.path.join(OUTPUT_DIR, "case.db")
+# "substring": first trash title found anywhere in the file path (Aho-Corasick, as always);
+# "exact": title equals the file name or its stem, done entirely as an indexed SQL join
+MATCH_MODES = ("substring", "exact")
+MATCH_MODE = os.environ.get("TRASHPANDA_MATCH", "substring")
+
+# 📊 Run instrumentation (trashpanda_timing): stage timings, counters, latency histograms and
+# the slowest archives of the last run, summarised in the log and written to RUN_REPORT.
+# TRASHPANDA_PROFILE=cprofile|sample also captures a profile of every stage into OUTPUT_DIR.
+RUN_REPORT = os.path.join(OUTPUT_DIR, "run_report.json")
+PROFILE_MODE = os.environ.get("TRASHPANDA_PROFILE") or None
+metrics = RunMetrics()  # replaced by new_run_timings() at the start of every run
+
+# 🪵 Logging: always to the console; with the GUI up, lines are queued and the Tk loop
+# drains them on its own timer, so worker threads never touch Tk
+UI_FRAME_MS = 50  # GUI refresh interval
+LOG_MAX_LINES = 5000  # oldest lines are dropped from the log box beyond this
+LOG_LINES_PER_FRAME = 500
+
+class UiEvents:
+    def __init__(self):
+        self.lines = deque(maxlen=LOG_MAX_LINES)
+        self.progress = None  # only the latest (done, total) is kept
+        self.count = None  # latest (request, image count) from the folder-count worker
+
+    def log(self, msg):
+        self.lines.append(msg)
+
+    def set_progress(self, done, total):
+        self.progress = (done, total)
+
+    def set_count(self, request, total):
+        self.count = (request, total)
+
+    def take_lines(self, limit=LOG_LINES_PER_FRAME):
+        lines = []
+        while self.lines and len(lines) < limit:
+            lines.append(self.lines.popleft())
+        return lines
 
-# 🪵 Logging function with GUI binding
-log_sink = None
+ui_events = None
 def log(msg):
     print(f"[LOG] {msg}")
-    if log_sink:
-        log_sink.insert('end', f"{msg}\n")
-        log_sink.see('end')
+    if ui_events is not None:
+        ui_events.log(msg)
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
 # 📦 Download ExifTool if missing
 def download_exiftool():
@@ -58,121 +186,1428 @@ def download_exiftool():
         log(f"[ERROR] Download failed: {e}")
 
 # 🔍 Gather image files
+# One scandir pass yields (kind, path) for images, ZIPs and trash.db files alike;
+# callers that need more than one kind should read it once rather than filter twice
+def iter_tree(folder_path):
+    index_path = None
+    if SCAN_INDEX_ENABLED:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        index_path = SCAN_INDEX_PATH
+    return scan_tree(folder_path, IMAGE_EXTENSIONS, index_path=index_path, trash_name=TRASHDB_NAME)
+
+def iter_image_files(folder_path):
+    return (path for kind, path in iter_tree(folder_path) if kind == IMAGE)
+
+def iter_zip_files(folder_path):
+    return (path for kind, path in iter_tree(folder_path) if kind == ZIP)
+
 def get_image_files_recursive(folder_path):
-    return [os.path.join(root, f)
-            for root, _, files in os.walk(folder_path)
-            for f in files if Path(f).suffix.lower() in IMAGE_EXTENSIONS]
+    return list(iter_image_files(folder_path))
 
 def get_zip_files(folder_path):
-    return [os.path.join(root, f)
-            for root, _, files in os.walk(folder_path)
-            for f in files if Path(f).suffix.lower() in ZIP_EXTENSIONS]
+    return list(iter_zip_files(folder_path))
+
+# 🌲 One walk shared by extraction and the trash.db export (run all): a thread streams the
+# image/ZIP entries to one consumer, at most DISCOVERY_QUEUE_SIZE ahead of it, and keeps the
+# trash.db paths on the side until the walk is over. Once the consumer is gone (done,
+# stopped or failed; see close()) the walk carries on for the trash.db paths only.
+class TreeScan:
+    def __init__(self, folder_path, maxsize=None):
+        self.entries, self.db_paths = queue.Queue(maxsize or DISCOVERY_QUEUE_SIZE), []
+        self.finished, self.closed = threading.Event(), threading.Event()
+        threading.Thread(target=self.walk, args=(folder_path,), daemon=True).start()
+
+    def put(self, entry):
+        while not self.closed.is_set():
+            try:
+                self.entries.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def walk(self, folder_path):
+        try:
+            for kind, path in iter_tree(folder_path):
+                if kind == TRASH_DB:
+                    self.db_paths.append(path)
+                elif not self.closed.is_set():
+                    self.put((kind, path))
+        except Exception as e:
+            log(f"[ERROR] Scan failed: {e}")
+        finally:
+            self.finished.set()
+            self.put(None)
+
+    def __iter__(self):
+        try:
+            while True:
+                entry = self.entries.get()
+                if entry is None:
+                    return
+                yield entry
+        finally:
+            self.close()
+
+    def close(self):
+        self.closed.set()
+
+    def trash_dbs(self):
+        self.finished.wait()
+        return list(self.db_paths)
+
+def is_targeted_member(name):
+    lowered = name.lower()
+    return ".trashes" in lowered or "__macosx" in lowered or "trash" in lowered
+
+# 🗃️ ZIP inventory: the central directory is read once per archive version and the
+# targeted image entries are kept, so counting and extraction share one scan;
+# least recently used archives are dropped once ZIP_INVENTORY_MAX_ENTRIES is exceeded
+zip_inventory = OrderedDict()
+zip_inventory_size = [0]
+zip_inventory_lock = threading.Lock()
 
-def extract_targeted_items(zip_path):
-    temp_dir = tempfile.mkdtemp(prefix="exif_trash_")
-    images = []
+def remember_inventory(key, stamp, infos):
+    with zip_inventory_lock:
+        previous = zip_inventory.pop(key, None)
+        if previous:
+            zip_inventory_size[0] -= len(previous[1])
+        zip_inventory[key] = (stamp, infos)
+        zip_inventory_size[0] += len(infos)
+        while zip_inventory_size[0] > ZIP_INVENTORY_MAX_ENTRIES and len(zip_inventory) > 1:
+            _, (_, dropped) = zip_inventory.popitem(last=False)
+            zip_inventory_size[0] -= len(dropped)
+
+def list_targeted_infos(zip_path):
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for name in zip_ref.namelist():
-                lowered = name.lower()
-                if ".trashes" in lowered or "__macosx" in lowered or "trash" in lowered:
-                    zip_ref.extract(name, temp_dir)
-        images = get_image_files_recursive(temp_dir)
-        return [(zip_path, img) for img in images]
+        st = os.stat(zip_path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        key = path_key(zip_path)
+        with zip_inventory_lock:
+            cached = zip_inventory.get(key)
+            if cached:
+                zip_inventory.move_to_end(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with metrics.timer("zip.list", key=zip_path), zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            infos = [info for info in zip_ref.infolist()
+                     if not info.is_dir() and is_targeted_member(info.filename)
+                     and Path(info.filename).suffix.lower() in IMAGE_EXTENSIONS]
+        remember_inventory(key, stamp, infos)
+        return infos
+    except Exception as e:
+        log(f"[ERROR] Failed to read ZIP: {zip_path} — {e}")
+        return []
+
+def list_targeted_images(zip_path):
+    return [info.filename for info in list_targeted_infos(zip_path)]
+
+def count_targeted_images(folder_path):
+    direct = zipped = 0
+    for kind, path in iter_tree(folder_path):
+        if kind == IMAGE:
+            direct += 1
+        elif kind == ZIP:
+            zipped += len(list_targeted_infos(path))
+    return direct, zipped
+
+# Extract only the inventoried image members, under temp_root (removed by the caller);
+# yields (zip_path, extracted_path, info) so the member keeps its archive identity
+def extract_targeted_items(zip_path, temp_root=None):
+    temp_dir = tempfile.mkdtemp(prefix="exif_trash_", dir=temp_root)
+    infos = list_targeted_infos(zip_path)
+    try:
+        with metrics.timer("zip.extract", len(infos), zip_path), zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            extracted = [(zip_path, zip_ref.extract(info, temp_dir), info) for info in infos]
+        metrics.count("bytes.zip_extracted", sum(info.file_size for info in infos))
+        return extracted
     except Exception as e:
         log(f"[ERROR] Failed to extract from ZIP: {zip_path} — {e}")
         return []
 
-# 🛠 Extract metadata using ExifTool
-def extract_metadata(folder_path, progress_callback):
-    if not os.path.exists(EXIFTOOL_EXE):
-        log("❌ ExifTool not found.")
+# 🧰 ExifTool command line (TRASHPANDA_EXIFTOOL may point at fake_exiftool.py for offline runs)
+def exiftool_command():
+    exe = os.environ.get("TRASHPANDA_EXIFTOOL", EXIFTOOL_EXE)
+    if exe.lower().endswith(".py"):
+        return [sys.executable, exe]
+    return [exe]
+
+def exiftool_available():
+    return os.path.exists(exiftool_command()[-1])
+
+def exiftool_cwd():
+    return EXIFTOOL_PACKAGE if os.path.isdir(EXIFTOOL_PACKAGE) else None
+
+def path_key(path):
+    return os.path.normcase(os.path.normpath(path))
+
+# 🐢 One ExifTool process per image
+def read_metadata_per_file(img):
+    metrics.count("exiftool.spawns")
+    result = subprocess.run(exiftool_command() + ['-json'] + EXIFTOOL_OPTIONS + EXIFTOOL_TAGS + [img],
+                            capture_output=True, text=True, cwd=exiftool_cwd())
+    try:
+        return json.loads(result.stdout)[0]
+    except:
+        return {}
+
+# 🚀 Long-lived ExifTool speaking the -stay_open / "-@ -" argfile protocol
+class ExifToolSession:
+    def __init__(self, command=None):
+        self.command = command or exiftool_command()
+        self.sequence = 0
+        metrics.count("exiftool.spawns")
+        self.proc = subprocess.Popen(
+            self.command + ['-stay_open', 'True', '-@', '-'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=exiftool_cwd(), text=True, encoding='utf-8', errors='replace', bufsize=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, args):
+        # Yields each JSON record as soon as its closing brace arrives
+        self.sequence += 1
+        ready = f"{{ready{self.sequence}}}"
+        self.proc.stdin.write("\n".join(args + [f"-execute{self.sequence}"]) + "\n")
+        self.proc.stdin.flush()
+        decoder = json.JSONDecoder()
+        buffer = ""
+        for line in self.proc.stdout:
+            if line.rstrip() == ready:
+                return
+            buffer += line
+            if not line.lstrip().startswith("}"):
+                continue
+            start = buffer.find("{")
+            if start < 0:
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer, start)
+            except ValueError:
+                continue
+            buffer = buffer[end:]
+            yield record
+        raise RuntimeError("ExifTool session ended unexpectedly")
+
+    def read_metadata(self, paths):
+        args = ['-json', '-charset', 'filename=utf8'] + EXIFTOOL_OPTIONS + EXIFTOOL_TAGS + list(paths)
+        found = {path_key(r.get('SourceFile', '')): r for r in self.execute(args)}
+        return [found.get(path_key(p), {}) for p in paths]
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.write("-stay_open\nFalse\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=10)
+            except Exception:
+                self.kill()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+# 🧵 One ExifTool session per worker thread. A session that dies or falls out of step is
+# replaced and the batch tried once more; if that fails too the batch comes back empty
+class ExifToolPool:
+    def __init__(self):
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def read_metadata(self, paths):
+        for attempt in range(2):
+            session = getattr(self.local, 'session', None)
+            if session is None:
+                session = self.local.session = ExifToolSession()
+                with self.lock:
+                    self.sessions.append(session)
+            try:
+                return session.read_metadata(paths)
+            except (RuntimeError, OSError) as e:
+                log(f"⚠️ ExifTool session failed ({e}); restarting it.")
+                metrics.count("exiftool.restarts")
+                session.kill()
+                self.local.session = None
+                with self.lock:
+                    self.sessions.remove(session)
+        return [{} for _ in paths]
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+# ⚙️ -stay_open session over asyncio.create_subprocess_exec
+class AsyncExifToolSession:
+    def __init__(self, proc):
+        self.proc = proc
+        self.sequence = 0
+
+    @classmethod
+    async def start(cls, command=None):
+        command = command or exiftool_command()
+        metrics.count("exiftool.spawns")
+        proc = await asyncio.create_subprocess_exec(
+            *command, '-stay_open', 'True', '-@', '-',
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=exiftool_cwd())
+        return cls(proc)
+
+    async def read_metadata(self, paths):
+        self.sequence += 1
+        ready = f"{{ready{self.sequence}}}"
+        args = ['-json', '-charset', 'filename=utf8'] + EXIFTOOL_OPTIONS + EXIFTOOL_TAGS + list(paths) + [f"-execute{self.sequence}"]
+        self.proc.stdin.write(("\n".join(args) + "\n").encode('utf-8'))
+        await self.proc.stdin.drain()
+        lines = []
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError("ExifTool session ended unexpectedly")
+            line = line.decode('utf-8', 'replace')
+            if line.rstrip() == ready:
+                break
+            lines.append(line)
+        decoder = json.JSONDecoder()
+        text, pos, found = "".join(lines), 0, {}
+        while True:
+            start = text.find("{", pos)
+            if start < 0:
+                break
+            try:
+                record, pos = decoder.raw_decode(text, start)
+            except ValueError:
+                break
+            found[path_key(record.get('SourceFile', ''))] = record
+        return [found.get(path_key(p), {}) for p in paths]
+
+    async def close(self):
+        if self.proc.returncode is None:
+            try:
+                self.proc.stdin.write(b"-stay_open\nFalse\n")
+                await self.proc.stdin.drain()
+                await asyncio.wait_for(self.proc.wait(), 10)
+            except Exception:
+                self.kill()
+
+    def kill(self):
+        if self.proc.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+# Subprocesses from an event loop on a worker thread: Windows needs a ProactorEventLoop
+# (the 3.7 default loop there cannot spawn them), and Unix before 3.8 needs a child watcher
+# attached from the main thread, so there "async" falls back to the threaded sessions
+def async_exiftool_supported():
+    return os.name == 'nt' or sys.version_info >= (3, 8)
+
+def new_subprocess_loop():
+    if os.name == 'nt':
+        return asyncio.ProactorEventLoop()
+    return asyncio.new_event_loop()
+
+# 🔁 Async ExifTool pool on its own event loop. A semaphore caps in-flight batches (and so
+# sessions) at `workers`; submit() returns a concurrent Future, so ordered_map's window is
+# the backpressure. close() cancels queued batches and kills sessions caught mid-batch.
+# A session that fails mid-batch is replaced and the batch tried once more, then left empty.
+class AsyncExifToolPool:
+    def __init__(self, workers):
+        self.loop = new_subprocess_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.idle, self.sessions, self.futures = [], [], set()
+        self.semaphore = self.call(self.make_semaphore(workers))
+
+    @staticmethod
+    async def make_semaphore(workers):
+        return asyncio.Semaphore(workers)
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def read(self, paths):
+        async with self.semaphore:
+            for attempt in range(2):
+                session = self.idle.pop() if self.idle else None
+                if session is None:
+                    session = await AsyncExifToolSession.start()
+                    self.sessions.append(session)
+                start = time.perf_counter()
+                try:
+                    records = await session.read_metadata(paths)
+                except asyncio.CancelledError:
+                    # Cancelled mid-batch: the session's reply stream is out of step
+                    self.discard(session)
+                    raise
+                except (RuntimeError, OSError) as e:
+                    log(f"⚠️ ExifTool session failed ({e}); restarting it.")
+                    metrics.count("exiftool.restarts")
+                    self.discard(session)
+                    continue
+                self.idle.append(session)
+                metrics.observe("exif.read", time.perf_counter() - start, len(paths))
+                return records
+            return [{} for _ in paths]
+
+    def discard(self, session):
+        session.kill()
+        self.sessions.remove(session)
+
+    def submit(self, paths):
+        future = asyncio.run_coroutine_threadsafe(self.read(paths), self.loop)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+        return future
+
+    async def shutdown(self):
+        await asyncio.gather(*(session.close() for session in self.sessions))
+
+    def close(self):
+        for future in list(self.futures):
+            future.cancel()
+        self.call(self.shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+# 🖼️ Pillow reader (runs inside worker processes)
+def read_metadata_pillow(img):
+    try:
+        with Image.open(img) as im:
+            exif = im.getexif()
+            sub_ifd = exif.get_ifd(0x8769)
+            metadata = {}
+            for tag_id, name in PILLOW_TAGS.items():
+                value = sub_ifd.get(tag_id, exif.get(tag_id))
+                if value:
+                    metadata[name] = str(value).strip('\x00 ')
+            fmt = (im.format or '').lower()
+            if fmt:
+                metadata['FileTypeExtension'] = PILLOW_EXTENSIONS.get(fmt, fmt)
+            return metadata
+    except Exception:
+        return {}
+
+def read_pillow_chunk(paths):
+    return [read_metadata_pillow(p) for p in paths]
+
+# ⚡ Header-only parser (trashpanda_exif); None when the file needs a full reader
+def read_metadata_fast(img):
+    found = read_exif_file(img) if isinstance(img, str) else read_exif_tags(img)
+    if found is None:
+        return None
+    extension, tags = found
+    metadata = {}
+    for tag_id, name in PILLOW_TAGS.items():
+        value = tags.get(tag_id)
+        if value:
+            metadata[name] = value.strip('\x00 ')
+    metadata['FileTypeExtension'] = extension
+    return metadata
+
+def read_metadata_native(img):
+    metadata = read_metadata_fast(img)
+    if metadata is not None:
+        metrics.count("exif.header_only")
+        return metadata
+    metrics.count("exif.fallback")
+    if not isinstance(img, str):
+        img.seek(0)
+    if Image is not None:
+        return read_metadata_pillow(img)
+    if isinstance(img, str) and exiftool_available():
+        return read_metadata_per_file(img)
+    return {}
+
+def read_native_chunk(paths):
+    return [read_metadata_native(p) for p in paths]
+
+# 🗜️ EXIF straight from ZIP member headers, nothing written to disk unless ExifTool is needed
+def read_in_archive(backend):
+    if ZIP_READ_MODE == "auto":
+        return backend not in EXIFTOOL_BACKENDS
+    return ZIP_READ_MODE == "in-archive"
+
+# A whole member the header parser could not decode: the parser again over all of it (a HEIC
+# whose Exif item lies past the header window), then Pillow, then ExifTool on a temp copy.
+# With an ExifTool backend selected, ExifTool goes before Pillow.
+def read_member_metadata(stream, name, use_exiftool=False):
+    metadata = read_metadata_fast(stream)
+    if metadata is not None:
+        return metadata
+    suffix = Path(name).suffix.lower()
+    metadata = {}
+    if Image is not None and not use_exiftool and suffix != ".heic":
+        stream.seek(0)
+        metadata = read_metadata_pillow(stream)
+    if not metadata and exiftool_available():
+        metrics.count("exif.member_exiftool")
+        fd, temp_path = tempfile.mkstemp(prefix="exif_member_", suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(stream.getbuffer())
+            metadata = read_metadata_per_file(temp_path)
+        finally:
+            os.remove(temp_path)
+    return metadata
+
+def read_archive_chunk(task):
+    zip_path, members, use_exiftool = task
+    records = []
+    zf = None  # only opened for members that need more than their header
+    try:
+        for info, (_, data) in zip(members, read_zip_headers(zip_path, members)):
+            if data:
+                metrics.count("bytes.zip_headers", len(data))
+            metadata = read_metadata_fast(io.BytesIO(data)) if data else None
+            if metadata is not None:
+                metrics.count("exif.header_only")
+                records.append(metadata)
+                continue
+            metrics.count("exif.fallback")
+            try:
+                zf = zf or zipfile.ZipFile(zip_path, 'r')
+                records.append(read_member_metadata(io.BytesIO(zf.read(info)), info.filename, use_exiftool))
+            except Exception:
+                records.append({})
+    finally:
+        if zf is not None:
+            zf.close()
+    return records
+
+def read_per_file_chunk(paths):
+    return [read_metadata_per_file(p) for p in paths]
+
+# 🧬 Identity readers: one buffer per image feeds the EXIF parser, SHA-256 and the perceptual
+# hash; the mapping is read in place, never copied whole
+def read_with_identity(data, reader):
+    stream = BufferReader(data)
+    metadata = dict(reader(stream) or {})
+    metadata.update(content_identity(data, stream))
+    metrics.count("bytes.identity", len(data))
+    return metadata
+
+def read_file_identity(path, reader):
+    try:
+        with mapped(path, MADV_SEQUENTIAL) as view:
+            return read_with_identity(view, reader)
+    except OSError:
+        return {}
+
+# task: (backend, paths) for loose files, read with the native or Pillow parser
+def read_identity_chunk(task):
+    backend, paths = task
+    reader = read_metadata_pillow if backend == "pillow" else read_metadata_native
+    return [read_file_identity(p, reader) for p in paths]
+
+def read_archive_identity_chunk(task):
+    zip_path, members, use_exiftool = task
+    records = []
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for info in members:
+            try:
+                reader = lambda stream: read_member_metadata(stream, info.filename, use_exiftool)
+                records.append(read_with_identity(zf.read(info), reader))
+            except Exception:
+                records.append({})
+    return records
+
+# ExifTool backends read the metadata themselves; the hashes are taken alongside, in processes
+def identity_chunk(paths):
+    return [read_file_identity(p, lambda stream: {}) for p in paths]
+
+class IdentityChunk:
+    def __init__(self, future, identity):
+        self.future, self.identity = future, identity
+
+    def result(self):
+        return [dict(metadata, **identity) for metadata, identity in zip(self.future.result(), self.identity.result())]
+
+# ⏲️ A chunk read with its wall time; in a worker process it also returns the counts the
+# task gathered (threads update the shared metrics directly)
+def timed_call(fn, arg):
+    global metrics
+    in_worker = multiprocessing.current_process().name != "MainProcess"  # parent_process() needs 3.8
+    if in_worker:
+        metrics = RunMetrics()
+    start = time.perf_counter()
+    result = fn(arg)
+    return time.perf_counter() - start, result, dict(metrics.counters) if in_worker else None
+
+class TimedChunk:
+    def __init__(self, future, name, key=None):
+        self.future, self.name, self.key = future, name, key
+
+    def result(self):
+        seconds, records, counts = self.future.result()
+        metrics.merge_counters(counts)
+        metrics.observe(self.name, seconds, len(records), self.key)
+        return records
+
+# 📬 Run chunks on pools but hand (chunk, results) back in submission order
+def ordered_map(submit, chunks, window):
+    pending = deque()
+    for chunk in chunks:
+        pending.append((chunk, submit(chunk)))
+        if len(pending) >= window:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+    while pending:
+        chunk, future = pending.popleft()
+        yield chunk, future.result()
+
+# 🚰 Run a generator on its own thread, at most `maxsize` items ahead of the consumer
+def iter_bounded(iterable, maxsize=DISCOVERY_QUEUE_SIZE):
+    buffer = queue.Queue(maxsize)
+    done = object()
+    stop = threading.Event()
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as e:
+            log(f"[ERROR] Discovery failed: {e}")
+        finally:
+            put(done)
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+# 🗄️ Persistent metadata cache so re-runs skip images that have not changed
+def file_stamp(path):
+    if CACHE_KEY_MODE == "content":
+        return ("sha256", sha256_file(path))
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+# A ZIP member (its stamp is the ZipInfo) is keyed by archive, member name, CRC and size,
+# never by the temp path it was extracted to; read in place and extracted are kept apart
+def cache_key(reader, img, in_zip, stamp, origin=None):
+    if isinstance(stamp, zipfile.ZipInfo):
+        mode = "member" if in_zip else "extracted"
+        return "|".join(["zip", reader, mode, os.path.abspath(origin), stamp.filename,
+                         f"{stamp.CRC:08x}", str(stamp.file_size)])
+    return "|".join([reader] + [str(part) for part in stamp])
+
+class MetadataCache:
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or CACHE_PATH
+        self.max_entries = max_entries or CACHE_MAX_ENTRIES
+        self.hits = self.misses = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS metadata_cache "
+                          "(key TEXT PRIMARY KEY, metadata TEXT, last_used INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS metadata_cache_last_used ON metadata_cache (last_used)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            marks = ", ".join("?" * len(batch))
+            for key, metadata in self.conn.execute(
+                    f"SELECT key, metadata FROM metadata_cache WHERE key IN ({marks})", batch):
+                found[key] = json.loads(metadata)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return [found.get(key) for key in keys]
+
+    def store(self, fresh, reused):
+        now = time.time_ns()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metadata_cache (key, metadata, last_used) VALUES (?, ?, ?)",
+                [(key, json.dumps({f: md[f] for f in CACHE_FIELDS if f in md}), now) for key, md in fresh])
+            self.conn.executemany("UPDATE metadata_cache SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key in reused])
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM metadata_cache").fetchone()[0]
+        if count > self.max_entries:
+            with self.conn:
+                self.conn.execute("DELETE FROM metadata_cache WHERE key IN (SELECT key FROM metadata_cache "
+                                  "ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+            log(f"🧹 Evicted {count - self.max_entries} old cache entries.")
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+def clear_metadata_cache():
+    try:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(CACHE_PATH + suffix):
+                os.remove(CACHE_PATH + suffix)
+        log(f"🧹 Metadata cache cleared: {CACHE_PATH}")
+    except Exception as e:
+        log(f"[ERROR] Could not clear metadata cache: {e}")
+
+# An empty read (unreadable file, failed ExifTool batch) is not cached, so the next run retries it
+def cacheable(metadata):
+    return any(metadata.get(f) for f in CACHE_FIELDS if f not in IDENTITY_COLUMNS)
+
+# 🧩 A chunk whose cached rows are known up front and whose misses are still being read
+class CachedChunk:
+    def __init__(self, cache, keys, cached, misses, future):
+        self.cache, self.keys, self.cached = cache, keys, cached
+        self.misses, self.future = misses, future
+
+    def result(self):
+        records = list(self.cached)
+        fresh = []
+        if self.future is not None:
+            for idx, metadata in zip(self.misses, self.future.result()):
+                records[idx] = metadata
+                if cacheable(metadata):
+                    fresh.append((self.keys[idx], metadata))
+        missed = set(self.misses)
+        self.cache.store(fresh, [k for i, k in enumerate(self.keys) if i not in missed])
+        return records
+
+# 📒 One extraction run per (folder, backend). Items land in the journal only once their
+# CSV rows are flushed, together with the CSV byte offset and a SHA-256 of the CSV up to that
+# offset, in the same transaction. Every run writes the same output_metadata.csv, so a run is
+# only resumed while the CSV still hashes to its last checkpoint.
+JOURNAL_HASH_BLOCK = 1 << 20
+
+class JobJournal:
+    def __init__(self, path=None):
+        self.path = path or JOURNAL_PATH
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, folder TEXT, "
+                          "backend TEXT, base_run INTEGER, status TEXT, started REAL, finished REAL, "
+                          "csv_offset INTEGER DEFAULT 0, rows INTEGER DEFAULT 0, csv_digest TEXT)")
+        if "csv_digest" not in {row[1] for row in self.conn.execute("PRAGMA table_info(runs)")}:
+            self.conn.execute("ALTER TABLE runs ADD COLUMN csv_digest TEXT")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS items (run_id INTEGER, item_key TEXT, stamp TEXT, "
+                          "state TEXT, row TEXT, PRIMARY KEY (run_id, item_key)) WITHOUT ROWID")
+        self.conn.commit()
+        self.run_id = self.base_run = None
+        self.resumed = False
+        self.csv_offset = self.rows = 0
+        self.digest, self.hashed = hashlib.sha256(), 0
+
+    # Feed the CSV bytes written since the last checkpoint into the running digest
+    def hash_csv(self, upto):
+        with open(OUTPUT_METADATA, 'rb') as f:
+            f.seek(self.hashed)
+            while self.hashed < upto:
+                block = f.read(min(JOURNAL_HASH_BLOCK, upto - self.hashed))
+                if not block:
+                    break
+                self.digest.update(block)
+                self.hashed += len(block)
+        return self.digest.hexdigest()
+
+    def csv_matches(self, csv_offset, csv_digest):
+        try:
+            if not csv_digest or os.path.getsize(OUTPUT_METADATA) < csv_offset:
+                return False
+            return self.hash_csv(csv_offset) == csv_digest
+        except OSError:
+            return False
+
+    # Resume the folder's unfinished run if the CSV is still the one it wrote, otherwise start a new one
+    def start(self, folder, backend, delta=False, resume=True):
+        folder = path_key(folder)
+        row = self.conn.execute("SELECT run_id, base_run, csv_offset, rows, csv_digest FROM runs WHERE folder = ? "
+                                "AND backend = ? AND status = 'running' ORDER BY run_id DESC LIMIT 1",
+                                (folder, backend)).fetchone()
+        if row and resume and self.csv_matches(row[2], row[4]):
+            self.run_id, self.base_run, self.csv_offset, self.rows = row[:4]
+            self.resumed = True
+            return
+        if row and resume:
+            log("⚠️ output_metadata.csv was rewritten since the interrupted run; starting over.")
+        self.digest, self.hashed = hashlib.sha256(), 0
+        self.conn.execute("UPDATE runs SET status = 'abandoned' WHERE folder = ? AND backend = ? "
+                          "AND status = 'running'", (folder, backend))
+        if delta:
+            last = self.conn.execute("SELECT run_id FROM runs WHERE folder = ? AND backend = ? AND "
+                                     "status = 'done' ORDER BY run_id DESC LIMIT 1", (folder, backend)).fetchone()
+            self.base_run = last[0] if last else None
+        cursor = self.conn.execute("INSERT INTO runs (folder, backend, base_run, status, started) "
+                                   "VALUES (?, ?, ?, 'running', ?)", (folder, backend, self.base_run, time.time()))
+        self.run_id = cursor.lastrowid
+        self.conn.commit()
+
+    def done_keys(self):
+        return {key for (key,) in self.conn.execute("SELECT item_key FROM items WHERE run_id = ?", (self.run_id,))}
+
+    def base_stamps(self):
+        if self.base_run is None:
+            return None
+        return dict(self.conn.execute("SELECT item_key, stamp FROM items WHERE run_id = ?", (self.base_run,)))
+
+    # entries: (item_key, stamp, state, row); state is "done" (read) or "reused" (copied from the base run)
+    def commit(self, entries, csv_offset):
+        self.rows += len(entries)
+        self.csv_offset = csv_offset
+        csv_digest = self.hash_csv(csv_offset)
+        self.conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                              ((self.run_id, key, stamp, state, json.dumps(row)) for key, stamp, state, row in entries))
+        self.conn.execute("UPDATE runs SET csv_offset = ?, rows = ?, csv_digest = ? WHERE run_id = ?",
+                          (csv_offset, self.rows, csv_digest, self.run_id))
+        self.conn.commit()
+
+    # Row of the base run for an unchanged key
+    def base_row(self, key):
+        found = self.conn.execute("SELECT row FROM items WHERE run_id = ? AND item_key = ?",
+                                  (self.base_run, key)).fetchone()
+        return json.loads(found[0]) if found else None
+
+    # Keep only the newest finished run per folder/backend; it is the base for the next delta.
+    # Unfinished runs of any other folder or backend lost their CSV to this one: abandoned.
+    def finish(self):
+        self.conn.execute("UPDATE runs SET status = 'done', finished = ? WHERE run_id = ?", (time.time(), self.run_id))
+        self.conn.execute("UPDATE runs SET status = 'abandoned' WHERE status = 'running'")
+        stale = [r for (r,) in self.conn.execute(
+            "SELECT run_id FROM runs WHERE run_id != ? AND folder = (SELECT folder FROM runs WHERE run_id = ?) "
+            "AND backend = (SELECT backend FROM runs WHERE run_id = ?)", (self.run_id,) * 3)]
+        for run_id in stale:
+            self.conn.execute("DELETE FROM items WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        self.conn.execute("DELETE FROM items WHERE run_id IN (SELECT run_id FROM runs WHERE status = 'abandoned')")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+# Stable identity and change stamp of a discovered item, across runs and ZIP read modes
+def journal_item(origin, img, in_zip, stamp):
+    if isinstance(stamp, zipfile.ZipInfo):
+        # ZIP member, read in place or extracted: the member name and its CRC/size
+        return f"{origin}>{stamp.filename}", f"crc:{stamp.CRC:08x}:{stamp.file_size}"
+    if isinstance(stamp, tuple) and stamp[0] != "sha256":
+        return img, f"{stamp[1]}:{stamp[2]}"
+    st = os.stat(img)
+    return img, f"{st.st_size}:{st.st_mtime_ns}"
+
+# 🔭 Stream (origin, path, in_zip, stamp) for loose images, then every ZIP's trash images.
+# A ZIP member's stamp is its ZipInfo (read in place or extracted), so readers and keys reuse the central directory.
+def discover_images(folder_path, in_archive=True, temp_root=None, tree=None):
+    # Loose images stream out during the walk; ZIPs are read after it, as before
+    zip_paths = []
+    images, start = 0, time.perf_counter()
+    for kind, path in iter_tree(folder_path) if tree is None else tree:
+        if kind == IMAGE:
+            images += 1
+            yield None, path, False, None
+        elif kind == ZIP:
+            zip_paths.append(path)
+    # Walk time includes waiting on a full queue, i.e. time the readers were the bottleneck
+    metrics.observe("discovery.walk", time.perf_counter() - start)
+    metrics.count("discovery.images", images)
+    metrics.count("discovery.zips", len(zip_paths))
+    for zip_path in zip_paths:
+        if in_archive:
+            for info in list_targeted_infos(zip_path):
+                yield zip_path, info.filename, True, info
+        else:
+            for origin, img, info in extract_targeted_items(zip_path, temp_root):
+                yield origin, img, False, info
+
+# Stamp of an item whose row a delta run copies from the journal instead of reading the image;
+# it still travels through iter_records (as its metadata too) so rows keep discovery order
+REUSED = object()
+
+class ReadyChunk:
+    def __init__(self, records):
+        self.records = records
+
+    def result(self):
+        return self.records
+
+# 🧺 Group consecutive items into chunks that one worker call can handle
+def chunk_items(items):
+    key, entries = None, []
+    for origin, img, in_zip, stamp in items:
+        item_key = (None, REUSED) if stamp is REUSED else (origin, True) if in_zip else (None, False)
+        limit = ZIP_CHUNK_SIZE if in_zip else EXIFTOOL_BATCH_SIZE
+        if entries and (item_key != key or len(entries) >= limit):
+            yield key, entries
+            entries = []
+        key = item_key
+        entries.append((origin, img, stamp))
+    if entries:
+        yield key, entries
+
+def iter_records(items, backend=None, workers=None, cache=None, identity=False):
+    backend = backend or METADATA_BACKEND
+    workers = max(1, int(workers or METADATA_WORKERS))
+    if backend not in METADATA_BACKENDS:
+        raise ValueError(f"Unknown metadata backend: {backend}")
+    if backend == "pillow" and Image is None:
+        raise RuntimeError("Pillow is not installed")
+    if backend == "async" and not async_exiftool_supported():
+        log("⚠️ The async backend needs Python 3.8+ on this platform; using batch sessions.")
+        backend = "batch"
+    threads = ThreadPoolExecutor(workers)
+    processes = []
+    exiftool_pool = AsyncExifToolPool(workers) if backend == "async" else ExifToolPool()
+    def process_pool():
+        if not processes:
+            processes.append(ProcessPoolExecutor(workers))
+        return processes[0]
+    def read(zip_path, in_zip, names, infos):
+        # Chunk times feed the per-item histograms; ZIP chunks also add up per archive
+        if identity:
+            return read_identity(zip_path, in_zip, names, infos)
+        if in_zip:
+            task = (zip_path, infos, backend in EXIFTOOL_BACKENDS)
+            return TimedChunk(process_pool().submit(timed_call, read_archive_chunk, task), "zip.read", zip_path)
+        if backend == "pillow":
+            return TimedChunk(process_pool().submit(timed_call, read_pillow_chunk, names), "exif.read")
+        if backend == "native":
+            return TimedChunk(process_pool().submit(timed_call, read_native_chunk, names), "exif.read")
+        if backend == "per-file":
+            return TimedChunk(threads.submit(timed_call, read_per_file_chunk, names), "exif.read")
+        if backend == "async":
+            return exiftool_pool.submit(names)  # timed on the pool's loop
+        return TimedChunk(threads.submit(timed_call, exiftool_pool.read_metadata, names), "exif.read")
+    def read_identity(zip_path, in_zip, names, infos):
+        if in_zip:
+            task = (zip_path, infos, backend in EXIFTOOL_BACKENDS)
+            return TimedChunk(process_pool().submit(timed_call, read_archive_identity_chunk, task),
+                              "zip.read", zip_path)
+        if backend in ("native", "pillow"):
+            return TimedChunk(process_pool().submit(timed_call, read_identity_chunk, (backend, names)), "exif.read")
+        hashes = TimedChunk(process_pool().submit(timed_call, identity_chunk, names), "identity.read")
+        if backend == "async":
+            return IdentityChunk(exiftool_pool.submit(names), hashes)
+        worker = read_per_file_chunk if backend == "per-file" else exiftool_pool.read_metadata
+        return IdentityChunk(TimedChunk(threads.submit(timed_call, worker, names), "exif.read"), hashes)
+    def submit(chunk):
+        (zip_path, in_zip), entries = chunk
+        if in_zip is REUSED:
+            return ReadyChunk([REUSED] * len(entries))
+        names = [img for _, img, _ in entries]
+        infos = [stamp for _, _, stamp in entries] if in_zip else None
+        if cache is None:
+            return read(zip_path, in_zip, names, infos)
+        keys = []
+        for origin, img, stamp in entries:
+            try:
+                key = cache_key(backend, img, in_zip, stamp or file_stamp(img), origin)
+                keys.append("identity|" + key if identity else key)  # entries that carry the hashes
+            except OSError:
+                keys.append(f"missing|{img}")
+        cached = cache.get_many(keys)
+        misses = [i for i, metadata in enumerate(cached) if metadata is None]
+        future = read(zip_path, in_zip, [names[i] for i in misses],
+                      [infos[i] for i in misses] if in_zip else None) if misses else None
+        return CachedChunk(cache, keys, cached, misses, future)
+    try:
+        for (_, entries), records in ordered_map(submit, chunk_items(items), workers * 2):
+            for (origin, img, _), metadata in zip(entries, records):
+                yield origin, img, metadata
+    finally:
+        threads.shutdown(wait=True)
+        for executor in processes:
+            executor.shutdown(wait=True)
+        exiftool_pool.close()
+
+def iter_metadata(paths, backend=None, workers=None):
+    for _, _, metadata in iter_records(((None, p, False, None) for p in paths), backend, workers):
+        yield metadata
+
+def metadata_row(origin, img, metadata):
+    full_path = f"{origin} > {img}" if origin else img
+    row = {
+        'DateCreated': metadata.get('DateTimeOriginal', ''),
+        'DateModified': metadata.get('ModifyDate', ''),
+        'Camera': metadata.get('Model', ''),
+        'Title': metadata.get('Title', ''),
+        'Extension': metadata.get('FileTypeExtension', ''),
+        'FilePath': full_path
+    }
+    if 'SHA256' in metadata:
+        row['SHA256'] = metadata['SHA256']
+        row['PHash'] = metadata.get('PHash', '')
+    return row
+
+def open_case():
+    if not CASE_ENABLED:
+        return None
+    try:
+        return CaseStore(CASE_PATH)
+    except Exception as e:
+        log(f"⚠️ Case database unavailable ({e}); using the CSVs only.")
+        return None
+
+def columnar_enabled():
+    if OUTPUT_FORMAT == "csv":
+        return False
+    if not columnar_available():
+        log(f"⚠️ {OUTPUT_FORMAT} output needs pyarrow; writing CSV only.")
+        return False
+    return True
+
+def columnar_writer(csv_path, columns, types=None, parsed=None):
+    if not columnar_enabled():
+        return None
+    return ColumnarWriter(columnar_path(csv_path, OUTPUT_FORMAT), columns, OUTPUT_FORMAT, types, parsed)
+
+# Rows of an output as dicts, from its columnar copy when that is current, else the CSV
+def iter_output_rows(csv_path, columns, types=None):
+    path = fresh_columnar(csv_path, OUTPUT_FORMAT)
+    if path:
+        yield from iter_columnar_rows(path, columns, types)
         return
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+class PipelineCancelled(Exception):
+    pass
+
+# 🛠 Extract metadata using ExifTool (or Pillow), spread across worker pools.
+# With the journal on, an interrupted run resumes from its last committed chunk, and
+# delta=True reads only items that are new or changed since the last finished run.
+# Setting `cancel` (a threading.Event) stops after the current record; use_cache=False reads
+# every image without touching the cache. Returns True on success.
+def extract_metadata(folder_path, progress_callback, backend=None, workers=None, delta=False, resume=True,
+                     cancel=None, identity=None, tree=None, use_cache=None):
+    backend = backend or METADATA_BACKEND
+    identity = IDENTITY_ENABLED if identity is None else identity
+    columns = METADATA_COLUMNS + IDENTITY_COLUMNS if identity else METADATA_COLUMNS
+    if backend in EXIFTOOL_BACKENDS and not exiftool_available():
+        log("❌ ExifTool not found.")
+        return False
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     log(f"🔍 Scanning: {folder_path}")
-    direct = [(None, p) for p in get_image_files_recursive(folder_path)]
-    zipped = []
-    for zip_path in get_zip_files(folder_path):
-        zipped.extend(extract_targeted_items(zip_path))
-    all_images = direct + zipped
-    log(f"📸 Found {len(all_images)} total image files.")
-    try:
-        with open(OUTPUT_METADATA, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'DateCreated', 'DateModified', 'Camera', 'Title', 'Extension', 'FilePath'
-            ])
-            writer.writeheader()
-            for idx, (origin, img) in enumerate(all_images):
-                tags = ['-json', '-DateTimeOriginal', '-ModifyDate', '-Model', '-Title', '-FileTypeExtension']
-                result = subprocess.run([EXIFTOOL_EXE] + tags + [img],
-                                        capture_output=True, text=True, cwd=EXIFTOOL_PACKAGE)
+    in_archive = read_in_archive(backend)
+    log(f"⚙️ Backend: {backend}, workers: {workers or METADATA_WORKERS}, ZIPs: "
+        + ("read in place" if in_archive else "extracted") + (", content identity on" if identity else ""))
+    discovered = [0]
+    skipped, stamps = [0], {}
+    members = {}  # extracted ZIP members: (zip, temp path) -> member name, for FilePath
+    def counted(items):
+        for origin, img, in_zip, stamp in items:
+            discovered[0] += 1
+            if cache is not None and stamp is None:
+                # Stat/hash on the discovery thread, not the writer
+                try:
+                    stamp = file_stamp(img)
+                except OSError:
+                    pass
+            if journal is not None:
                 try:
-                    metadata = json.loads(result.stdout)[0]
-                except:
-                    metadata = {}
-                full_path = f"{origin} > {img}" if origin else img
-                writer.writerow({
-                    'DateCreated': metadata.get('DateTimeOriginal', ''),
-                    'DateModified': metadata.get('ModifyDate', ''),
-                    'Camera': metadata.get('Model', ''),
-                    'Title': metadata.get('Title', ''),
-                    'Extension': metadata.get('FileTypeExtension', ''),
-                    'FilePath': full_path
-                })
-                progress_callback(idx + 1, len(all_images))
+                    key, jstamp = journal_item(origin, img, in_zip, stamp)
+                except OSError:
+                    key, jstamp = f"{origin or ''}>{img}", ""
+                if key in done_keys:
+                    skipped[0] += 1
+                    continue
+                stamps[(origin, img)] = (key, jstamp)
+                if base_stamps is not None and jstamp and base_stamps.get(key) == jstamp:
+                    stamp = REUSED
+            if origin and not in_zip and isinstance(stamp, zipfile.ZipInfo):
+                members[(origin, img)] = stamp.filename
+            yield origin, img, in_zip, stamp
+    temp_root = None if in_archive else tempfile.mkdtemp(prefix="exif_trash_")
+    cache = journal = None
+    done_keys, base_stamps = set(), None
+    if CACHE_ENABLED if use_cache is None else use_cache:
+        try:
+            cache = MetadataCache()
+        except Exception as e:
+            log(f"⚠️ Metadata cache unavailable ({e}); reading every image.")
+    if JOURNAL_ENABLED:
+        try:
+            journal = JobJournal()
+            # Identity runs have extra columns, so they resume and diff against their own runs
+            journal.start(folder_path, f"{backend}+identity" if identity else backend, delta, resume)
+            done_keys, base_stamps = journal.done_keys(), journal.base_stamps()
+            if journal.resumed:
+                log(f"⏯️ Resuming interrupted run: {len(done_keys)} items already written")
+            elif delta:
+                log("🔁 Delta run against the last finished run" if base_stamps is not None
+                    else "🔁 No finished run to compare against; processing everything")
+        except Exception as e:
+            log(f"⚠️ Job journal unavailable ({e}); running without resume.")
+            journal = None
+    columnar = None
+    case = open_case()
+    try:
+        resumed = journal is not None and journal.resumed
+        if not resumed:
+            columnar = columnar_writer(OUTPUT_METADATA, columns, parsed=EXIF_DATES)
+        if case is not None:
+            keep = journal.rows if resumed else 0
+            if case.file_count() < keep:
+                log("⚠️ case.db is missing rows of the interrupted run; merge will read the CSVs instead.")
+                case.mark_incomplete("files")
+                case.close()
+                case = None
+            else:
+                case.reset_files(keep)
+        with open(OUTPUT_METADATA, 'r+' if resumed else 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if resumed:
+                f.seek(journal.csv_offset)
+                f.truncate()
+            else:
+                writer.writerow(columns)
+            pending, case_rows = [], []
+            written = [0, 0.0]  # rows and CSV write time since the last flush
+            def flush():
+                if written[0]:
+                    metrics.observe("csv.write", written[1], written[0])
+                    written[:] = [0, 0.0]
+                start = time.perf_counter()
+                # case.db first: on a resume it is trimmed back to the journal's row count
+                if case is not None:
+                    case.add_files(case_rows)
+                    case_rows.clear()
+                if journal is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    journal.commit(pending, f.tell())
+                    pending.clear()
+                metrics.observe("journal.commit", time.perf_counter() - start)
+            items = iter_bounded(counted(discover_images(folder_path, in_archive, temp_root, tree)))
+            done = reused = 0
+            for origin, img, metadata in iter_records(items, backend, workers, cache, identity):
+                if journal is not None:
+                    key, jstamp = stamps.pop((origin, img), (f"{origin or ''}>{img}", ""))
+                # Unchanged items take the base run's row, in place, instead of reading the image
+                row = journal.base_row(key) if metadata is REUSED else None
+                if row is not None:
+                    reused += 1
+                    metrics.count("extract.reused")
+                else:
+                    # Extracted members are recorded as "zip > member", the same as when read in place
+                    name = members.pop((origin, img), img) if origin else img
+                    row = metadata_row(origin, name, {} if metadata is REUSED else metadata)
+                    done += 1
+                    metrics.count("extract.files")
+                values = [row.get(col, '') for col in columns]
+                start = time.perf_counter()
+                writer.writerow(values)
+                if columnar is not None:
+                    columnar.write(values)
+                written[0] += 1
+                written[1] += time.perf_counter() - start
+                if journal is not None:
+                    pending.append((key, jstamp, "reused" if metadata is REUSED else "done", row))
+                if case is not None:
+                    case_rows.append(row)
+                if len(pending) >= JOURNAL_COMMIT_ROWS or len(case_rows) >= JOURNAL_COMMIT_ROWS:
+                    flush()
+                total_done = done + reused + skipped[0]
+                progress_callback(total_done, max(total_done, discovered[0]))
+                if cancel is not None and cancel.is_set():
+                    flush()  # everything written so far is kept for the resume
+                    raise PipelineCancelled()
+            flush()
+            if journal is not None:
+                journal.finish()
+        # Closed after the CSV so the columnar copy is never older than it
+        if columnar is not None:
+            columnar.close()
+            log(f"🏛️ {OUTPUT_FORMAT} copy: {columnar.path}")
+        elif resumed and columnar_enabled():
+            # Rows written before the interruption are only in the CSV; rebuild the copy from it
+            log(f"🏛️ {OUTPUT_FORMAT} copy: {csv_to_columnar(OUTPUT_METADATA, OUTPUT_FORMAT, parsed=EXIF_DATES)}")
+        columnar = None
+        if case is not None:
+            case.mark_complete("files")  # after the CSV is closed, so the CSV is never newer
+        if skipped[0] or reused:
+            log(f"⏭️ {skipped[0]} items already written, {reused} unchanged since the last run")
+        log(f"📸 Processed {done} total image files.")
+        metrics.count("bytes.csv_written", os.path.getsize(OUTPUT_METADATA))
+        if cache is not None:
+            log(f"🗄️ Cache: {cache.hits} hits, {cache.misses} misses")
+            metrics.count("cache.hits", cache.hits)
+            metrics.count("cache.misses", cache.misses)
         log(f"✅ Metadata written to: {OUTPUT_METADATA}")
+        return True
+    except PipelineCancelled:
+        log("⏹️ Extraction stopped; run it again to resume." if journal is not None else "⏹️ Extraction stopped.")
+        return False
     except Exception as e:
         log(f"[ERROR] Metadata extraction failed: {e}")
+        return False
+    finally:
+        if columnar is not None:
+            columnar.discard()
+        if case is not None:
+            case.close()
+        if cache is not None:
+            cache.close()
+        if journal is not None:
+            journal.close()
+        if temp_root is not None:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+# 🧾 Pull rows in fixed-size batches instead of fetchall()
+def iter_cursor(cursor, size=FETCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
 
 # 🗃 Export trash.db contents
-def export_trashdb_to_csv():
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+TRASHDB_QUERY = """
+    SELECT title as title,
+           date_deleted as "Unixepoch Timestamp",
+           datetime(date_deleted / 1000, 'unixepoch', 'localtime') as Deleted_CST
+    FROM trashes
+"""
+TRASHDB_NAME = "trash.db"
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # SQLite reads pages through a mapping instead of read()
+COMBINED_TRASHDB = True  # also write every source into OUTPUT_TRASHDB with a Source column
+
+def find_trash_dbs(folder_path):
+    return [path for kind, path in iter_tree(folder_path) if kind == TRASH_DB]
+
+def source_csv_path(db_path, idx):
+    parent = os.path.basename(os.path.dirname(os.path.abspath(db_path))) or "root"
+    stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in f"{parent}_{Path(db_path).stem}")
+    return os.path.join(OUTPUT_DIR, "trashdb", f"{idx:03d}_{stem}.csv")
+
+# Runs in a worker process; returns (db_path, csv_path, rows, error, seconds)
+def export_one_trashdb(db_path, csv_path):
+    start = time.perf_counter()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT title as title,
-                   date_deleted as "Unixepoch Timestamp",
-                   datetime(date_deleted / 1000, 'unixepoch', 'localtime') as Deleted_CST
-            FROM trashes
-        """)
-        rows = cursor.fetchall()
-        colnames = [desc[0] for desc in cursor.description]
-        with open(OUTPUT_TRASHDB, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(colnames)
-            writer.writerows(rows)
-        conn.close()
-        log(f"✅ trash.db exported to: {OUTPUT_TRASHDB}")
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(TRASHDB_QUERY)
+            colnames = [desc[0] for desc in cursor.description]
+            rows = 0
+            conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(colnames)
+                for row in iter_cursor(cursor):
+                    writer.writerow(row)
+                    rows += 1
+        finally:
+            conn.close()
+        return db_path, csv_path, rows, None, time.perf_counter() - start
     except Exception as e:
-        log(f"[ERROR] trash.db export failed: {e}")
+        return db_path, csv_path, 0, str(e), time.perf_counter() - start
 
-# 🔗 Merge metadata + trash info
-def merge_outputs():
-    if not os.path.exists(OUTPUT_METADATA) or not os.path.exists(OUTPUT_TRASHDB):
-        log("⚠️ Missing metadata or trashdb CSV.")
+# Copy the exported trash.db files into case.db (straight from the source, read-only);
+# called after the CSVs are written so the case is never older than them
+def import_trash_sources(db_paths):
+    case = open_case()
+    if case is None:
         return
     try:
-        with open(OUTPUT_METADATA, 'r', encoding='utf-8') as f_meta, open(OUTPUT_TRASHDB, 'r', encoding='utf-8') as f_trash:
-            meta_reader = csv.DictReader(f_meta)
-            trash_reader = csv.DictReader(f_trash)
-            meta_data = list(meta_reader)
-            trash_data = list(trash_reader)
+        case.reset_trashes()
+        rows = 0
+        for db_path in db_paths:
+            with metrics.timer("case.import", key=db_path):
+                rows += case.import_trashdb(db_path)
+        case.mark_complete("trashes")
+        log(f"🗄️ {rows} trash rows in {CASE_PATH}")
     except Exception as e:
-        log(f"[ERROR] Failed to read input files: {e}")
-        return
+        log(f"[ERROR] case.db import failed: {e}")
+    finally:
+        case.close()
 
-    merged_rows = []
-    for mrow in meta_data:
-        file_path = mrow.get("FilePath", "")
-        matched = None
-        for trow in trash_data:
-            title = trow.get("title", "")
-            if title and title in file_path:
-                matched = trow
-                break
+def export_trashdb_to_csv(folder_path=None, workers=None, db_paths=None):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if db_paths is None:
+        db_paths = find_trash_dbs(folder_path) if folder_path and os.path.isdir(folder_path) else []
+    if not db_paths:
+        # Single-database mode, as before
+        try:
+            start = time.perf_counter()
+            rows = 0
+            conn = sqlite3.connect(DB_PATH)
+            cursor = conn.cursor()
+            cursor.execute(TRASHDB_QUERY)
+            colnames = [desc[0] for desc in cursor.description]
+            columnar = columnar_writer(OUTPUT_TRASHDB, colnames, TRASH_TYPES)
+            try:
+                with open(OUTPUT_TRASHDB, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(colnames)
+                    for row in iter_cursor(cursor):
+                        writer.writerow(row)
+                        if columnar is not None:
+                            columnar.write(row)
+                        rows += 1
+            except Exception:
+                if columnar is not None:
+                    columnar.discard()
+                raise
+            conn.close()
+            if columnar is not None:
+                columnar.close()
+            metrics.observe("sqlite.export", time.perf_counter() - start, rows, DB_PATH)
+            metrics.count("sqlite.rows", rows)
+            metrics.count("bytes.trash_db", os.path.getsize(DB_PATH))
+            log(f"✅ trash.db exported to: {OUTPUT_TRASHDB}")
+            import_trash_sources([DB_PATH])
+            return True
+        except Exception as e:
+            log(f"[ERROR] trash.db export failed: {e}")
+            return False
+
+    log(f"🗃️ Found {len(db_paths)} trash.db files; exporting each one.")
+    os.makedirs(os.path.join(OUTPUT_DIR, "trashdb"), exist_ok=True)
+    workers = max(1, min(len(db_paths), int(workers or METADATA_WORKERS)))
+    jobs = [(db_path, source_csv_path(db_path, idx)) for idx, db_path in enumerate(db_paths)]
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(export_one_trashdb, *zip(*jobs)))
+    for db_path, csv_path, rows, error, seconds in results:
+        if error:
+            log(f"[ERROR] trash.db export failed for {db_path}: {error}")
+        else:
+            log(f"✅ {rows} rows from {db_path} → {csv_path}")
+            metrics.observe("sqlite.export", seconds, rows, db_path)
+            metrics.count("sqlite.rows", rows)
+            metrics.count("bytes.trash_db", os.path.getsize(db_path))
+    sources = [db_path for db_path, _, _, error, _ in results if not error]
+    if not sources:
+        return False
+    if not COMBINED_TRASHDB:
+        import_trash_sources(sources)
+        return False  # nothing for merge_outputs to read
+    columnar = None
+    try:
+        with open(OUTPUT_TRASHDB, 'w', newline='', encoding='utf-8') as f_out:
+            writer = csv.writer(f_out)
+            header_written = False
+            for db_path, csv_path, _, error, _ in results:
+                if error:
+                    continue
+                with open(csv_path, 'r', newline='', encoding='utf-8') as f_in:
+                    reader = csv.reader(f_in)
+                    header = next(reader, None)
+                    if header and not header_written:
+                        writer.writerow(header + ["Source"])
+                        columnar = columnar_writer(OUTPUT_TRASHDB, header + ["Source"], TRASH_TYPES)
+                        header_written = True
+                    for row in reader:
+                        writer.writerow(row + [db_path])
+                        if columnar is not None:
+                            columnar.write(row + [db_path])
+        if columnar is not None:
+            columnar.close()
+            columnar = None
+        log(f"✅ Combined trash.db export written to: {OUTPUT_TRASHDB}")
+        import_trash_sources(sources)
+        return True
+    except Exception as e:
+        log(f"[ERROR] Failed to write combined trash.db CSV: {e}")
+        return False
+    finally:
+        if columnar is not None:
+            columnar.discard()
 
-        combined = {
+# 🔎 Aho-Corasick index over trash titles: finds the first trash row (in table order)
+# whose title occurs anywhere in a path, in one pass over the path
+class TitleIndex:
+    # Edges live in one dict keyed by (state << 21 | codepoint) and per-state data in
+    # flat arrays, so the automaton stays compact for very large trash tables
+    def __init__(self, trash_rows):
+        self.rows = trash_rows
+        self.none = len(trash_rows)
+        self.exact = {}  # title -> first row index, duplicates keep the earliest row
+        for idx, row in enumerate(trash_rows):
+            title = row.get("title", "")
+            if title and title not in self.exact:
+                self.exact[title] = idx
+        goto = {}
+        best = array('q', [self.none])
+        parent, char, depth = array('q', [0]), array('q', [0]), array('q', [0])
+        for title, idx in self.exact.items():
+            state = 0
+            for ch in title:
+                key = state << 21 | ord(ch)
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = goto[key] = len(best)
+                    best.append(self.none)
+                    parent.append(state)
+                    char.append(ord(ch))
+                    depth.append(depth[state] + 1)
+                state = nxt
+            best[state] = min(best[state], idx)
+        # Failure links in breadth-first order (counting sort on depth);
+        # best[] folds in every title that ends at the same spot
+        counts = [0] * (max(depth) + 2)
+        for d in depth:
+            counts[d + 1] += 1
+        for d in range(1, len(counts)):
+            counts[d] += counts[d - 1]
+        order = array('q', bytes(8 * len(depth)))
+        for state, d in enumerate(depth):
+            order[counts[d]] = state
+            counts[d] += 1
+        fail = array('q', bytes(8 * len(depth)))
+        for state in order:
+            up = parent[state]
+            if state == 0 or up == 0:
+                continue
+            ch = char[state]
+            fallback = fail[up]
+            while fallback and (fallback << 21 | ch) not in goto:
+                fallback = fail[fallback]
+            fail[state] = goto.get(fallback << 21 | ch, 0)
+            best[state] = min(best[state], best[fail[state]])
+        self.goto, self.fail, self.best = goto, fail, best
+        self.prefix_cache = {}
+
+    def scan(self, state, best, text):
+        goto, fail, outputs = self.goto, self.fail, self.best
+        for ch in text:
+            code = ord(ch)
+            nxt = goto.get(state << 21 | code)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto.get(state << 21 | code)
+            state = nxt or 0
+            if outputs[state] < best:
+                best = outputs[state]
+        return state, best
+
+    def match(self, file_path):
+        # Paths share long "zip > folder/" prefixes, so scan each directory once and cache it
+        cut = max(file_path.rfind('/'), file_path.rfind('\\')) + 1
+        prefix = file_path[:cut]
+        start = self.prefix_cache.get(prefix)
+        if start is None:
+            start = self.prefix_cache[prefix] = self.scan(0, self.none, prefix)
+        _, best = self.scan(*start, file_path[cut:])
+        return self.rows[best] if best < self.none else None
+
+def merge_rows(meta_data, trash_data):
+    index = TitleIndex(trash_data)
+    for mrow in meta_data:
+        matched = index.match(mrow.get("FilePath", ""))
+        yield {
             "title": matched.get("title", "") if matched else "",
             "Unixepoch Timestamp": matched.get("Unixepoch Timestamp", "") if matched else "Not found",
             "Deleted_CST": matched.get("Deleted_CST", "") if matched else "Not found",
@@ -182,106 +1617,599 @@ def merge_outputs():
             "Extension": mrow.get("Extension", ""),
             "FilePath": mrow.get("FilePath", "")
         }
-        merged_rows.append(combined)
-
-    column_order = [
-        "title",
-        "Unixepoch Timestamp",
-        "Deleted_CST",
-        "DateCreated",
-        "DateModified",
-        "Camera",
-        "Extension",
-        "FilePath"
-    ]
 
+# 🔗 Merge metadata + trash info
+MERGED_COLUMNS = [
+    "title",
+    "Unixepoch Timestamp",
+    "Deleted_CST",
+    "DateCreated",
+    "DateModified",
+    "Camera",
+    "Extension",
+    "FilePath"
+]
+TRASH_COLUMNS = ("title", "Unixepoch Timestamp", "Deleted_CST")
+MERGE_METADATA_COLUMNS = ("DateCreated", "DateModified", "Camera", "Extension", "FilePath")
+MERGED_IDENTITY_COLUMNS = ["SHA256", "PHash", "Cluster", "MatchedBy"]
+DUPLICATE_COLUMNS = ["Cluster", "FilePath", "SHA256", "PHash", "MatchedBy"]
+
+# Merged rows (MERGED_COLUMNS order) → CSV, plus the columnar copy when one is enabled
+def write_merged(rows, target=None, identity=False):
+    target = target or MERGED_OUTPUT
+    columns = MERGED_COLUMNS + MERGED_IDENTITY_COLUMNS if identity else MERGED_COLUMNS
+    # "Not found" in the typed columns becomes null in the columnar copy
+    columnar = columnar_writer(target, columns, TRASH_TYPES, EXIF_DATES)
+    count = 0
     try:
-        with open(MERGED_OUTPUT, 'w', newline='', encoding='utf-8') as f_out:
-            writer = csv.DictWriter(f_out, fieldnames=column_order)
-            writer.writeheader()
-            for row in merged_rows:
-                writer.writerow({col: row.get(col, '') for col in column_order})
-        log(f"✅ Merged CSV written to: {MERGED_OUTPUT}")
+        with open(target, 'w', newline='', encoding='utf-8') as f_out:
+            writer = csv.writer(f_out)
+            writer.writerow(columns)
+            for values in rows:
+                writer.writerow(values)
+                if columnar is not None:
+                    columnar.write(values)
+                count += 1
+        metrics.count("merge.rows", count)
+        metrics.count("bytes.csv_written", os.path.getsize(target))
+        if columnar is not None:
+            columnar.close()
+            log(f"🏛️ {OUTPUT_FORMAT} copy: {columnar.path}")
+            columnar = None
+        return count
+    finally:
+        if columnar is not None:
+            columnar.discard()
+
+# case.db is used when both halves were loaded there after their CSVs were last written
+def current_case():
+    case = open_case()
+    if case is None:
+        return None
+    for key, csv_path in (("files", OUTPUT_METADATA), ("trashes", OUTPUT_TRASHDB)):
+        completed = case.completed(key)
+        if completed is None or (os.path.exists(csv_path) and os.path.getmtime(csv_path) > completed):
+            case.close()
+            return None
+    return case
+
+def match_case(case, mode=None):
+    mode = mode or MATCH_MODE
+    if mode == "exact":
+        return case.match_exact()
+    index = TitleIndex([{"title": title, "id": trash_id} for trash_id, title in case.iter_titles()])
+    matched = [0]
+    def chunks():
+        # One page of files at a time: matches are written as they are found, never all held
+        for page in case.iter_file_path_pages(FETCH_SIZE):
+            pairs = []
+            for file_id, file_path in page:
+                found = index.match(file_path)
+                if found is not None:
+                    pairs.append((found["id"], file_id))
+            matched[0] += len(pairs)
+            yield pairs
+    case.set_matches(chunks())
+    return matched[0]
+
+# 🧬 Cluster exact / near-duplicate images (multi-index hashing over the perceptual hashes),
+# let unmatched copies inherit their cluster's trash row, and list the clusters
+def cluster_case(case):
+    entries = ((file_id, sha256, parse_phash(phash)) for file_id, sha256, phash in case.iter_identities())
+    clusters = cluster_duplicates(entries, IDENTITY_RADIUS)
+    case.set_clusters(clusters)
+    inherited = case.match_clusters()
+    with open(OUTPUT_DUPLICATES, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(DUPLICATE_COLUMNS)
+        writer.writerows(case.iter_duplicates())
+    log(f"🧬 {len(clusters)} files in {len(set(clusters.values()))} duplicate clusters → {OUTPUT_DUPLICATES}; "
+        f"{inherited} matched through their cluster")
+    metrics.count("identity.clustered", len(clusters))
+    metrics.count("identity.content_matches", inherited)
+
+def merge_outputs(open_result=True, match=None):
+    case = current_case()
+    if case is not None:
+        try:
+            log(f"🗄️ Merging in {CASE_PATH} ({match or MATCH_MODE} match)")
+            with metrics.timer("merge.match"):
+                matched = match_case(case, match)
+            identity = case.has_identity()
+            if identity:
+                with metrics.timer("merge.cluster"):
+                    cluster_case(case)
+            with metrics.timer("merge.write"):
+                rows = write_merged(case.iter_merged(identity=identity), identity=identity)
+            metrics.count("merge.matched", matched)
+            log(f"🔗 {matched} of {rows} files matched a trash row")
+        except Exception as e:
+            log(f"[ERROR] Failed to write merged CSV: {e}")
+            return False
+        finally:
+            case.close()
+    else:
+        if (match or MATCH_MODE) != "substring":
+            log("⚠️ Exact matching needs case.db; using substring matching on the CSVs.")
+        if IDENTITY_ENABLED:
+            log("⚠️ Duplicate clustering needs case.db; merging by title only.")
+        if not os.path.exists(OUTPUT_METADATA) or not os.path.exists(OUTPUT_TRASHDB):
+            log("⚠️ Missing metadata or trashdb CSV.")
+            return False
+        for csv_path in (OUTPUT_TRASHDB, OUTPUT_METADATA):
+            if fresh_columnar(csv_path, OUTPUT_FORMAT):
+                log(f"🏛️ Reading {columnar_path(csv_path, OUTPUT_FORMAT)}")
+        # Only the trash side is held in memory (it backs the title index); metadata rows stream through
+        try:
+            with metrics.timer("merge.read_trash"):
+                trash_data = [{col: row.get(col, "") for col in TRASH_COLUMNS}
+                              for row in iter_output_rows(OUTPUT_TRASHDB, TRASH_COLUMNS, TRASH_TYPES)]
+        except Exception as e:
+            log(f"[ERROR] Failed to read input files: {e}")
+            return False
+        try:
+            merged = merge_rows(iter_output_rows(OUTPUT_METADATA, MERGE_METADATA_COLUMNS), trash_data)
+            with metrics.timer("merge.write"):
+                write_merged([row.get(col, '') for col in MERGED_COLUMNS] for row in merged)
+        except Exception as e:
+            log(f"[ERROR] Failed to write merged CSV: {e}")
+            return False
+    log(f"✅ Merged CSV written to: {MERGED_OUTPUT}")
+    if open_result and os.name == 'nt':
         subprocess.run(f'explorer "{MERGED_OUTPUT}"', shell=True)
+    return True
+
+# 📤 Re-export from case.db without re-running anything: a Deleted date range (local time,
+# "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS", until is exclusive) and/or matched rows only
+def parse_local_time(text):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return int(time.mktime(time.strptime(text, fmt)) * 1000)
+        except ValueError:
+            continue
+    raise ValueError(f"Not a date: {text!r} (expected YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)")
+
+def export_case(target, since=None, until=None, matched_only=False):
+    case = open_case()
+    if case is None:
+        log("⚠️ case.db is turned off.")
+        return False
+    try:
+        if case.completed("matches") is None:
+            log("⚠️ case.db has no merge yet; run merge (or run-all) first.")
+            return False
+        identity = case.has_identity()
+        rows = write_merged(case.iter_merged(parse_local_time(since) if since else None,
+                                             parse_local_time(until) if until else None, matched_only, identity),
+                            target, identity)
+        log(f"✅ {rows} rows exported to: {target}")
+        return True
     except Exception as e:
-        log(f"[ERROR] Failed to write merged CSV: {e}")
-import tkinter as tk
-from tkinter import filedialog, ttk, messagebox
-from tkinter.scrolledtext import ScrolledText
+        log(f"[ERROR] Export failed: {e}")
+        return False
+    finally:
+        case.close()
+
+# 🚦 Run all: the trash.db export runs alongside metadata extraction (each stage on its own
+# thread, with its own pools) and the merge starts once both outputs are in place, so the
+# wall time is about max(extract, export) + merge. Cancelling the task, or setting `cancel`,
+# stops extraction at the next record (resumable through the journal) and skips the merge.
+async def run_pipeline(folder_path, progress_callback, backend=None, workers=None, delta=False, resume=True,
+                       cancel=None, timings=None, open_result=False, match=None, identity=None, use_cache=None):
+    cancel = cancel or threading.Event()
+    def stage(name, fn, *args, **extra):
+        if timings is None:
+            return fn(*args)
+        with timings.stage(name, **extra):
+            return fn(*args)
+    loop = asyncio.get_running_loop()
+    def in_thread(name, fn, *args, **extra):
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+        return loop.run_in_executor(None, lambda: stage(name, fn, *args, **extra))
+    # The tree is walked once: extraction reads its images and ZIPs as they are found, the
+    # export starts on its trash.db list when the walk is over
+    tree = TreeScan(folder_path) if os.path.isdir(folder_path) else None
+    def export_found(folder_path, workers):
+        return export_trashdb_to_csv(folder_path, workers, tree.trash_dbs() if tree is not None else None)
+    def extract_found(*args):
+        try:
+            return extract_metadata(*args)
+        finally:
+            if tree is not None:
+                tree.close()  # however extraction ended, the walk no longer waits on it
+    extract = in_thread("extract", extract_found, folder_path, progress_callback,
+                        backend, workers, delta, resume, cancel, identity, tree, use_cache,
+                        backend=backend or METADATA_BACKEND, workers=workers, concurrent=True,
+                        items="extract.files")
+    export = in_thread("export-db", export_found, folder_path, workers,
+                       workers=workers, concurrent=True, items="sqlite.rows")
+    both = asyncio.gather(extract, export)
+    try:
+        # Shielded: the stage threads cannot be interrupted, so a cancelled run waits for them to wind down
+        extracted, exported = await asyncio.shield(both)
+    except asyncio.CancelledError:
+        cancel.set()
+        await both
+        raise
+    if cancel.is_set():
+        log("⏹️ Run stopped before merging.")
+        return False
+    if not (extracted and exported):
+        log("⚠️ Skipping merge: " + ("metadata extraction" if not extracted else "trash.db export") + " did not finish.")
+        return False
+    return await in_thread("merge", merge_outputs, open_result, match, items="merge.rows")
+# 📊 Fresh timings and metrics for a run (CLI command or GUI button), and its report
+def new_run_timings():
+    global metrics
+    timings = StageTimings(PROFILE_MODE, OUTPUT_DIR)
+    metrics = timings.metrics
+    return timings
+
+def write_run_report(timings, **meta):
+    for line in timings.summary_lines():
+        log(line)
+    try:
+        timings.write_json(RUN_REPORT, finished=time.strftime("%Y-%m-%d %H:%M:%S"), output_dir=OUTPUT_DIR, **meta)
+        log(f"📝 Run report: {RUN_REPORT}")
+    except OSError as e:
+        log(f"[ERROR] Could not write the run report: {e}")
+
+# 📂 Point every output (CSVs, cache) at another folder, e.g. from the CLI
+def set_output_dir(path):
+    global OUTPUT_DIR, OUTPUT_METADATA, OUTPUT_TRASHDB, MERGED_OUTPUT, CACHE_PATH, JOURNAL_PATH, SCAN_INDEX_PATH, \
+        CASE_PATH, RUN_REPORT, OUTPUT_DUPLICATES
+    OUTPUT_DIR = os.path.abspath(path)
+    OUTPUT_METADATA = os.path.join(OUTPUT_DIR, "output_metadata.csv")
+    OUTPUT_TRASHDB = os.path.join(OUTPUT_DIR, "output_trashdb.csv")
+    MERGED_OUTPUT = os.path.join(OUTPUT_DIR, "merged_output.csv")
+    CACHE_PATH = os.path.join(OUTPUT_DIR, "metadata_cache.db")
+    JOURNAL_PATH = os.path.join(OUTPUT_DIR, "job_journal.db")
+    SCAN_INDEX_PATH = os.path.join(OUTPUT_DIR, "scan_index.db")
+    CASE_PATH = os.path.join(OUTPUT_DIR, "case.db")
+    RUN_REPORT = os.path.join(OUTPUT_DIR, "run_report.json")
+    OUTPUT_DUPLICATES = os.path.join(OUTPUT_DIR, "output_duplicates.csv")
+
+# 🔢 Count what a run would process, without reading any image
+def scan_folder(folder_path):
+    counts = {"images": 0, "zips": 0, "zip_images": 0, "trash_dbs": 0}
+    for kind, path in iter_tree(folder_path):
+        if kind == IMAGE:
+            counts["images"] += 1
+        elif kind == ZIP:
+            counts["zips"] += 1
+            counts["zip_images"] += len(list_targeted_infos(path))
+        else:
+            counts["trash_dbs"] += 1
+    return counts
+
+# 🖥️ Headless command line: same stages as the GUI buttons, with per-stage timings
+CLI_COMMANDS = ("scan", "extract", "export-db", "merge", "run-all", "export")
+CLI_PROGRESS_EVERY = 1000
+
+def cli_progress(done, total):
+    if done % CLI_PROGRESS_EVERY == 0:
+        print(f"[PROGRESS] {done}/{total}", file=sys.stderr)
+
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Exif + Trashes Merger (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in CLI_COMMANDS:
+        cmd = sub.add_parser(name)
+        if name not in ("merge", "export"):
+            cmd.add_argument("folder", nargs="?" if name == "export-db" else None,
+                             help="folder with images, ZIPs and/or trash.db files")
+        cmd.add_argument("--workers", type=int, default=METADATA_WORKERS)
+        cmd.add_argument("--output", help=f"output folder (default: {OUTPUT_DIR})")
+        cmd.add_argument("--json-timings", metavar="FILE",
+                         help="also write the run report (timings, counters, histograms) to FILE ('-' for stdout)")
+        cmd.add_argument("--profile", choices=PROFILE_MODES, default=PROFILE_MODE,
+                         help="cprofile: a .prof per stage; sample: a folded-stack profile of all threads")
+        if name not in ("merge", "export"):
+            cmd.add_argument("--scan-index", action="store_true",
+                             help="reuse folder listings whose modification time has not changed")
+        if name != "scan":
+            cmd.add_argument("--format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT,
+                             help="also write a Parquet/Feather copy of each CSV (needs pyarrow)")
+        if name in ("extract", "run-all"):
+            cmd.add_argument("--backend", choices=METADATA_BACKENDS, default=METADATA_BACKEND)
+            cmd.add_argument("--zip-mode", choices=ZIP_READ_MODES, default=ZIP_READ_MODE)
+            cmd.add_argument("--no-cache", action="store_true", help="skip the metadata cache")
+            cmd.add_argument("--clear-cache", action="store_true", help="empty the metadata cache first")
+            cmd.add_argument("--delta", action="store_true",
+                             help="only read images that are new or changed since the last finished run")
+            cmd.add_argument("--fresh", action="store_true", help="do not resume an interrupted run")
+            cmd.add_argument("--identity", action="store_true", default=IDENTITY_ENABLED,
+                             help="also take SHA-256 and a perceptual hash of every image for duplicate clustering")
+        if name == "run-all":
+            cmd.add_argument("--sequential", action="store_true",
+                             help="run extract, export-db and merge one after another instead of overlapping them")
+        if name in ("export-db", "run-all"):
+            cmd.add_argument("--db", help=f"single trash.db when no folder is given (default: {DB_PATH})")
+        if name in ("extract", "export-db", "merge", "run-all"):
+            cmd.add_argument("--no-case", action="store_true", help="skip case.db; merge reads the CSVs")
+        if name in ("merge", "run-all"):
+            cmd.add_argument("--radius", type=int, default=IDENTITY_RADIUS,
+                             help="perceptual-hash bits that may differ between near-duplicates")
+            cmd.add_argument("--match", choices=MATCH_MODES, default=MATCH_MODE,
+                             help="substring: trash title anywhere in the path; exact: title is the file name "
+                                  "or its stem (indexed join in case.db)")
+        if name == "export":
+            cmd.add_argument("--since", help="first Deleted date, local time (YYYY-MM-DD[ HH:MM:SS])")
+            cmd.add_argument("--until", help="end of the Deleted range, exclusive")
+            cmd.add_argument("--matched-only", action="store_true", help="leave out files with no trash row")
+            cmd.add_argument("--to", metavar="FILE", help="target CSV (default: merged_export.csv in the output folder)")
+    return parser
+
+def run_cli(argv):
+    global ZIP_READ_MODE, CACHE_ENABLED, DB_PATH, OUTPUT_FORMAT, SCAN_INDEX_ENABLED, CASE_ENABLED, PROFILE_MODE, \
+        IDENTITY_ENABLED, IDENTITY_RADIUS
+    args = build_arg_parser().parse_args(argv)
+    if args.output:
+        set_output_dir(args.output)
+    if getattr(args, "format", None):
+        OUTPUT_FORMAT = args.format
+    if getattr(args, "scan_index", False):
+        SCAN_INDEX_ENABLED = True
+    if getattr(args, "zip_mode", None):
+        ZIP_READ_MODE = args.zip_mode
+    if getattr(args, "no_cache", False):
+        CACHE_ENABLED = False
+    if getattr(args, "clear_cache", False):
+        clear_metadata_cache()
+    if getattr(args, "db", None):
+        DB_PATH = args.db
+    if getattr(args, "no_case", False):
+        CASE_ENABLED = False
+    PROFILE_MODE = args.profile
+    if getattr(args, "identity", False):
+        IDENTITY_ENABLED = True
+    if getattr(args, "radius", None) is not None:
+        IDENTITY_RADIUS = args.radius
+    folder = getattr(args, "folder", None)
+    if folder is not None and not os.path.isdir(folder):
+        log(f"❌ Not a folder: {folder}")
+        return 2
+    if args.command in ("extract", "run-all") and args.backend in EXIFTOOL_BACKENDS and not exiftool_available():
+        download_exiftool()
+
+    timings = new_run_timings()
+    ok = True  # every stage that ran reported success
+    if args.command == "scan":
+        with timings.stage("scan") as stage:
+            stage.update(scan_folder(folder))
+        log(f"📸 {stage['images']} loose images, {stage['zip_images']} images in {stage['zips']} ZIPs, "
+            f"{stage['trash_dbs']} trash.db files")
+    sequential = args.command != "run-all" or args.sequential
+    if args.command == "run-all" and not args.sequential:
+        # Not profiled itself: its thread only waits, the stages inside are profiled
+        with timings.stage("run-all", items="extract.files", profile=PROFILE_MODE == "sample"):
+            ok = asyncio.run(run_pipeline(folder, cli_progress, args.backend, args.workers, args.delta,
+                                          not args.fresh, timings=timings, match=args.match))
+    if sequential and args.command in ("extract", "run-all"):
+        with timings.stage("extract", items="extract.files", backend=args.backend, workers=args.workers):
+            ok = extract_metadata(folder, cli_progress, args.backend, args.workers,
+                                  delta=args.delta, resume=not args.fresh) and ok
+    if sequential and args.command in ("export-db", "run-all"):
+        with timings.stage("export-db", items="sqlite.rows", workers=args.workers):
+            ok = export_trashdb_to_csv(folder, args.workers) and ok
+    if sequential and args.command in ("merge", "run-all"):
+        with timings.stage("merge", items="merge.rows", match=args.match):
+            ok = merge_outputs(open_result=False, match=args.match) and ok
+    if args.command == "export":
+        with timings.stage("export", items="merge.rows"):
+            ok = export_case(args.to or os.path.join(OUTPUT_DIR, "merged_export.csv"),
+                             args.since, args.until, args.matched_only)
+    write_run_report(timings, command=args.command, folder=folder, workers=args.workers)
+    if args.json_timings:
+        timings.write_json(args.json_timings, command=args.command, folder=folder,
+                           workers=args.workers, output_dir=OUTPUT_DIR)
+    return 0 if ok else 1
 
 # --- GUI Setup ---
-root = tk.Tk()
-root.title("Exif + Trashes Merger")
-root.geometry("640x480")
-root.resizable(False, False)
-
-# Folder select frame
-frame = ttk.Frame(root, padding=10)
-frame.pack(fill=tk.X)
-
-folder_entry = ttk.Entry(frame, width=50)
-folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
-
-def browse_folder():
-    folder = filedialog.askdirectory()
-    if folder:
-        folder_entry.delete(0, tk.END)
-        folder_entry.insert(0, folder)
-        update_count(folder)
-
-browse_btn = ttk.Button(frame, text="📂 Browse", command=browse_folder)
-browse_btn.pack(side=tk.LEFT)
-
-count_label = ttk.Label(root, text="📸 Total image files: 0")
-count_label.pack(pady=(5, 5))
-
-# Progress bar
-progress = ttk.Progressbar(root, length=600, mode='determinate')
-progress.pack(pady=(5, 10))
-
-# Status console
-log_box = ScrolledText(root, height=12, wrap=tk.WORD)
-log_box.pack(fill=tk.BOTH, padx=10, pady=(0, 10), expand=True)
-log_sink = log_box  # bind to logger
-
-# Action buttons
-button_frame = ttk.Frame(root, padding=10)
-button_frame.pack()
-
-def update_count(folder):
-    direct = get_image_files_recursive(folder)
-    zipped = sum(len(extract_targeted_items(z)) for z in get_zip_files(folder))
-    count_label.config(text=f"📸 Total image files: {len(direct) + zipped}")
-
-def start_extraction():
-    folder = folder_entry.get()
-    if not folder or not os.path.isdir(folder):
-        messagebox.showerror("Error", "Select a valid folder.")
-        return
-    progress["value"] = 0
-    progress["maximum"] = 1
-    def update_progress(done, total):
-        progress["maximum"] = total
-        progress["value"] = done
-    threading.Thread(target=extract_metadata, args=(folder, update_progress), daemon=True).start()
-
-def run_trash_query():
-    threading.Thread(target=export_trashdb_to_csv, daemon=True).start()
-
-def run_merge():
-    threading.Thread(target=merge_outputs, daemon=True).start()
-
-def open_exif_folder():
-    if os.path.exists(EXIFTOOL_PACKAGE):
-        subprocess.run(f'explorer "{EXIFTOOL_PACKAGE}"', shell=True)
-    else:
-        messagebox.showerror("Not Found", f"ExifTool folder missing:\n{EXIFTOOL_PACKAGE}")
+def create_gui():
+    global ui_events
+    import tkinter as tk
+    from tkinter import filedialog, ttk, messagebox
+    from tkinter.scrolledtext import ScrolledText
+
+    root = tk.Tk()
+    root.title("Exif + Trashes Merger")
+    root.geometry("640x480")
+    root.resizable(False, False)
+
+    # Folder select frame
+    frame = ttk.Frame(root, padding=10)
+    frame.pack(fill=tk.X)
+
+    folder_entry = ttk.Entry(frame, width=50)
+    folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+
+    def browse_folder():
+        folder = filedialog.askdirectory()
+        if folder:
+            folder_entry.delete(0, tk.END)
+            folder_entry.insert(0, folder)
+            update_count(folder)
+
+    browse_btn = ttk.Button(frame, text="📂 Browse", command=browse_folder)
+    browse_btn.pack(side=tk.LEFT)
+
+    backend_var = tk.StringVar(value=METADATA_BACKEND)
+    backend_box = ttk.Combobox(frame, textvariable=backend_var, values=METADATA_BACKENDS, width=9, state="readonly")
+    backend_box.pack(side=tk.LEFT, padx=(5, 0))
+
+    workers_var = tk.IntVar(value=METADATA_WORKERS)
+    workers_box = ttk.Spinbox(frame, from_=1, to=256, textvariable=workers_var, width=4)
+    workers_box.pack(side=tk.LEFT, padx=(5, 0))
+
+    delta_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frame, text="Only new/changed", variable=delta_var).pack(side=tk.LEFT, padx=(5, 0))
+    identity_var = tk.BooleanVar(value=IDENTITY_ENABLED)
+    ttk.Checkbutton(frame, text="Content hashes", variable=identity_var).pack(side=tk.LEFT, padx=(5, 0))
+    cache_var = tk.BooleanVar(value=CACHE_ENABLED)
+    ttk.Checkbutton(frame, text="Use cache", variable=cache_var).pack(side=tk.LEFT, padx=(5, 0))
+
+    count_label = ttk.Label(root, text="📸 Total image files: 0")
+    count_label.pack(pady=(5, 5))
+
+    # Progress bar
+    progress = ttk.Progressbar(root, length=600, mode='determinate')
+    progress.pack(pady=(5, 0))
+    rate_label = ttk.Label(root, text="")
+    rate_label.pack(pady=(0, 5))
+
+    # Status console
+    log_box = ScrolledText(root, height=12, wrap=tk.WORD)
+    log_box.pack(fill=tk.BOTH, padx=10, pady=(0, 10), expand=True)
+    ui_events = UiEvents()  # workers post here; pump() applies it
+
+    shown = {"progress": None, "start": None, "rate": 0.0, "sample": None, "count": None, "request": 0}
+    def pump():
+        counted = ui_events.count
+        if counted is not None and counted != shown["count"]:
+            shown["count"] = counted
+            if counted[0] == shown["request"]:  # a count for a folder picked since is dropped
+                count_label.config(text=f"📸 Total image files: {counted[1]}")
+        lines = ui_events.take_lines()
+        if lines:
+            log_box.insert('end', "\n".join(lines) + "\n")
+            excess = int(log_box.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                log_box.delete('1.0', f'{excess + 1}.0')
+            log_box.see('end')
+        current = ui_events.progress
+        if current is not None and current != shown["progress"]:
+            done, total = current
+            now = time.monotonic()
+            last = shown["sample"]
+            if last is None or done < last[1]:
+                shown["start"], shown["rate"], last = now, 0.0, (now, done)
+            elif now - last[0] >= 0.5:
+                # Smoothed items/s over half-second samples
+                instant = (done - last[1]) / (now - last[0])
+                shown["rate"] = instant if not shown["rate"] else 0.7 * shown["rate"] + 0.3 * instant
+                last = (now, done)
+            shown["sample"], shown["progress"] = last, current
+            progress["maximum"] = max(total, 1)
+            progress["value"] = done
+            text = f"{done}/{total}"
+            if shown["rate"]:
+                text += f" · {shown['rate']:.0f} img/s"
+                if total > done:
+                    text += f" · ETA {format_eta((total - done) / shown['rate'])}"
+            elif done and done >= total:
+                text += f" · {done / max(now - shown['start'], 1e-6):.0f} img/s"
+            rate_label.config(text=text)
+        root.after(UI_FRAME_MS, pump)
+
+    # Action buttons
+    button_frame = ttk.Frame(root, padding=10)
+    button_frame.pack()
+
+    # Each button is one run: its timings and metrics end in the log and RUN_REPORT
+    def start_reported(name, fn, args, items=None, **meta):
+        def work():
+            timings = new_run_timings()
+            with timings.stage(name, items=items):
+                fn(*args)
+            write_run_report(timings, command=name, **meta)
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+        return thread
+
+    # Listing every ZIP's central directory can take a while: count on a worker, not the Tk thread
+    def update_count(folder):
+        shown["request"] += 1
+        request = shown["request"]
+        count_label.config(text="📸 Counting image files…")
+        def work():
+            try:
+                direct, zipped = count_targeted_images(folder)
+            except Exception as e:
+                log(f"[ERROR] Could not count images in {folder}: {e}")
+                return
+            ui_events.set_count(request, direct + zipped)
+        threading.Thread(target=work, daemon=True).start()
+
+    # Extract and Run all share one cancel event, so Stop ends whichever is running
+    pipeline = {"thread": None, "cancel": None}
+    def busy():
+        if pipeline["thread"] is not None and pipeline["thread"].is_alive():
+            messagebox.showinfo("Busy", "An extraction is already in progress.")
+            return True
+        return False
+
+    def start_extraction():
+        folder = folder_entry.get()
+        if not folder or not os.path.isdir(folder):
+            messagebox.showerror("Error", "Select a valid folder.")
+            return
+        if busy():
+            return
+        cancel = pipeline["cancel"] = threading.Event()
+        ui_events.set_progress(0, 1)
+        args = (folder, ui_events.set_progress, backend_var.get(), workers_var.get(), delta_var.get(),
+                True, cancel, identity_var.get(), None, cache_var.get())
+        pipeline["thread"] = start_reported("extract", extract_metadata, args, items="extract.files", folder=folder)
+
+    def run_trash_query():
+        args = (folder_entry.get(), workers_var.get())
+        start_reported("export-db", export_trashdb_to_csv, args, items="sqlite.rows", folder=args[0])
+
+    def run_merge():
+        start_reported("merge", merge_outputs, (), items="merge.rows")
+
+    def run_all():
+        folder = folder_entry.get()
+        if not folder or not os.path.isdir(folder):
+            messagebox.showerror("Error", "Select a valid folder.")
+            return
+        if busy():
+            return
+        cancel = pipeline["cancel"] = threading.Event()
+        ui_events.set_progress(0, 1)
+        args = (folder, ui_events.set_progress, backend_var.get(), workers_var.get(), delta_var.get())
+        # Tk variables are read here, never from the worker thread
+        identity, use_cache = identity_var.get(), cache_var.get()
+        def work():
+            timings = new_run_timings()
+            with timings.stage("run-all", items="extract.files", profile=PROFILE_MODE == "sample"):
+                asyncio.run(run_pipeline(*args, cancel=cancel, timings=timings, open_result=True,
+                                         identity=identity, use_cache=use_cache))
+            write_run_report(timings, command="run-all", folder=folder)
+        pipeline["thread"] = threading.Thread(target=work, daemon=True)
+        pipeline["thread"].start()
+
+    def stop_run():
+        if pipeline["cancel"] is not None:
+            pipeline["cancel"].set()
+
+    def open_exif_folder():
+        if os.path.exists(EXIFTOOL_PACKAGE):
+            subprocess.run(f'explorer "{EXIFTOOL_PACKAGE}"', shell=True)
+        else:
+            messagebox.showerror("Not Found", f"ExifTool folder missing:\n{EXIFTOOL_PACKAGE}")
+
+    run_frame = ttk.Frame(root, padding=(10, 0))
+    run_frame.pack()
+    ttk.Button(run_frame, text="▶️ Run All", command=run_all).pack(side=tk.LEFT, padx=5)
+    ttk.Button(run_frame, text="⏹️ Stop", command=stop_run).pack(side=tk.LEFT, padx=5)
+
+    ttk.Button(button_frame, text="🛠️ Extract Metadata", command=start_extraction).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="📊 Export trash.db", command=run_trash_query).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="🔗 Merge Outputs", command=run_merge).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="🧪 Open ExifTool Folder", command=open_exif_folder).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="🧹 Clear Cache", command=clear_metadata_cache).pack(side=tk.LEFT, padx=5)
 
-ttk.Button(button_frame, text="🛠️ Extract Metadata", command=start_extraction).pack(side=tk.LEFT, padx=5)
-ttk.Button(button_frame, text="📊 Export trash.db", command=run_trash_query).pack(side=tk.LEFT, padx=5)
-ttk.Button(button_frame, text="🔗 Merge Outputs", command=run_merge).pack(side=tk.LEFT, padx=5)
-ttk.Button(button_frame, text="🧪 Open ExifTool Folder", command=open_exif_folder).pack(side=tk.LEFT, padx=5)
+    log(f"📁 Script directory: {SCRIPT_DIR}")
+    download_exiftool()
+    pump()
+    root.mainloop()
 
-log(f"📁 Script directory: {SCRIPT_DIR}")
-download_exiftool()
-root.mainloop()
\ No newline at end of file
+# 🏁 Launch the CLI when given arguments, else the GUI (guarded so pool workers can re-import this script)
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    create_gui()
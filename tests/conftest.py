@@ -0,0 +1,9 @@
+import os
+import sys
+
+# 🧪 Tests import the trashpanda_* modules from the repo root and load the two scripts
+# by path through the benchmark helpers (their file names have spaces)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_DIR, os.path.join(REPO_DIR, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,55 @@
+import struct
+
+from trashpanda_exif import EXIF_IFD_POINTER, ASCII
+
+# 🧪 Hand-built image headers shared by the tests: TIFF/EXIF payloads, JPEGs and HEICs
+
+def ifd(order, entries, offset):
+    # Values longer than 4 bytes go in a data area right after the IFD
+    data_start = offset + 2 + len(entries) * 12 + 4
+    out, data = struct.pack(order + 'H', len(entries)), b''
+    for tag, value in entries.items():
+        if isinstance(value, int):
+            out += struct.pack(order + 'HHLL', tag, 4, 1, value)
+            continue
+        raw = value.encode('latin-1') + b'\0'
+        if len(raw) <= 4:
+            out += struct.pack(order + 'HHL', tag, ASCII, len(raw)) + raw.ljust(4, b'\0')
+        else:
+            out += struct.pack(order + 'HHLL', tag, ASCII, len(raw), data_start + len(data))
+            data += raw
+    return out + struct.pack(order + 'L', 0) + data
+
+def tiff(tags, sub_tags=None, order='<'):
+    head = (b'II*\0' if order == '<' else b'MM\0*') + struct.pack(order + 'L', 8)
+    entries = dict(tags)
+    if sub_tags is None:
+        return head + ifd(order, entries, 8)
+    entries[EXIF_IFD_POINTER] = 0
+    entries[EXIF_IFD_POINTER] = 8 + len(ifd(order, entries, 8))
+    return head + ifd(order, entries, 8) + ifd(order, sub_tags, entries[EXIF_IFD_POINTER])
+
+def segment(code, payload):
+    return bytes([0xFF, code]) + struct.pack('>H', len(payload) + 2) + payload
+
+def jpeg(exif=None, extra=b''):
+    app1 = segment(0xE1, b'Exif\0\0' + exif) if exif is not None else b''
+    return (b'\xff\xd8' + segment(0xE0, b'JFIF\0\x01\x01\0\0\x01\0\x01\0\0') + app1 + extra
+            + segment(0xDA, b'\x01\x01\0\0?\0') + b'\x00' * 64 + b'\xff\xd9')
+
+def box(kind, payload):
+    return struct.pack('>L', len(payload) + 8) + kind + payload
+
+def heic(exif=None, brand=b'heic'):
+    ftyp = box(b'ftyp', brand + b'\0\0\0\0' + b'mif1' + brand)
+    infe = [box(b'infe', b'\x02\0\0\0' + struct.pack('>HH', 1, 0) + b'hvc1' + b'\0')]
+    if exif is not None:
+        infe.append(box(b'infe', b'\x02\0\0\0' + struct.pack('>HH', 2, 0) + b'Exif' + b'\0'))
+    iinf = box(b'iinf', b'\0\0\0\0' + struct.pack('>H', len(infe)) + b''.join(infe))
+    item = b'\0\0\0\x06Exif\0\0' + (exif or b'')
+    def meta(offset):
+        iloc = box(b'iloc', b'\0\0\0\0' + bytes([0x44, 0x00]) + struct.pack('>H', 1)
+                   + struct.pack('>HHHLL', 2, 0, 1, offset, len(item)))
+        return box(b'meta', b'\0\0\0\0' + box(b'hdlr', b'\0' * 24) + iinf + iloc)
+    start = len(ftyp) + len(meta(0)) + 8
+    return ftyp + meta(start) + box(b'mdat', item)
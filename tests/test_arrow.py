@@ -0,0 +1,91 @@
+import csv
+import datetime
+import os
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from trashpanda_arrow import (EXIF_DATETIME, OUTPUT_FORMATS, SQL_DATETIME, ColumnarWriter, columnar_path,
+                              csv_to_columnar, fresh_columnar, iter_columnar_rows)
+
+# 🧪 Parquet / Feather copies read back as the rows the CSV writer would have written,
+# with typed columns, across several row groups
+
+COLUMNS = ["Title", "Unixepoch Timestamp", "Deleted_CST", "DateCreated"]
+TYPES = {"Unixepoch Timestamp": "int64", "Deleted_CST": SQL_DATETIME}
+PARSED = {"DateCreated": EXIF_DATETIME}
+FORMATS = [fmt for fmt in OUTPUT_FORMATS if fmt != "csv"]
+
+def sample_rows(count=25):
+    start = datetime.datetime(2022, 4, 15, 23, 59, 50)
+    rows = []
+    for i in range(count):
+        moment = start + datetime.timedelta(seconds=7 * i)
+        rows.append([f"IMG_{i:04d}_é.jpg", str(1650067190 + 7 * i), moment.strftime(SQL_DATETIME),
+                     moment.strftime(EXIF_DATETIME) + (".123+02:00" if i % 5 == 0 else "")])
+    rows.append(["", "", "", ""])
+    return rows
+
+def read_back(path, columns=COLUMNS):
+    return [[row[name] for name in columns] for row in iter_columnar_rows(path, columns, TYPES)]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip_matches_the_csv_rows(tmp_path, fmt):
+    rows = sample_rows()
+    path = str(tmp_path / f"out.{fmt}")
+    with ColumnarWriter(path, COLUMNS, fmt, TYPES, PARSED, row_group_rows=4) as writer:
+        writer.write_rows(rows)
+    assert writer.written == len(rows)
+    assert not os.path.exists(path + ".partial")
+    assert read_back(path) == rows
+    # a subset of the columns, in another order
+    assert read_back(path, COLUMNS[::-1]) == [row[::-1] for row in rows]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_typed_columns_and_parsed_timestamps(tmp_path, fmt):
+    path = str(tmp_path / f"out.{fmt}")
+    with ColumnarWriter(path, COLUMNS, fmt, TYPES, PARSED) as writer:
+        writer.write_rows(sample_rows(2) + [["x", "not a number", "not a date", "2022:13:45 99:00:00"]])
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.schema.field("Unixepoch Timestamp").type == pa.int64()
+    assert pa.types.is_timestamp(table.schema.field("Deleted_CST").type)
+    assert table.schema.field("DateCreated").type == pa.string()
+    assert pa.types.is_timestamp(table.schema.field("DateCreated_ts").type)
+    created = table.column("DateCreated_ts").to_pylist()
+    assert created[:2] == [datetime.datetime(2022, 4, 15, 23, 59, 50), datetime.datetime(2022, 4, 15, 23, 59, 57)]
+    assert created[2:] == [None, None]  # the empty row and the unparseable one
+    # unparseable typed values come back empty; the EXIF text stays verbatim
+    assert read_back(path)[-1] == ["x", "", "", "2022:13:45 99:00:00"]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_failed_write_keeps_the_previous_copy(tmp_path, fmt):
+    path = str(tmp_path / f"out.{fmt}")
+    with ColumnarWriter(path, COLUMNS, fmt, TYPES, PARSED) as writer:
+        writer.write_rows(sample_rows(3))
+    with pytest.raises(RuntimeError):
+        with ColumnarWriter(path, COLUMNS, fmt, TYPES, PARSED, row_group_rows=1) as writer:
+            writer.write_rows(sample_rows(10))
+            raise RuntimeError("interrupted")
+    assert not os.path.exists(path + ".partial")
+    assert read_back(path) == sample_rows(3)
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_csv_to_columnar_and_freshness(tmp_path, fmt):
+    csv_path = str(tmp_path / "output.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(sample_rows())
+    assert fresh_columnar(csv_path, fmt) is None
+    target = csv_to_columnar(csv_path, fmt, TYPES, PARSED)
+    assert target == columnar_path(csv_path, fmt)
+    assert fresh_columnar(csv_path, fmt) == target
+    assert read_back(target) == sample_rows()
+    later = os.path.getmtime(target) + 10
+    os.utime(csv_path, (later, later))  # the CSV was rewritten after the copy
+    assert fresh_columnar(csv_path, fmt) is None
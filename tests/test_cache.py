@@ -0,0 +1,57 @@
+import os
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+from common import load_merger
+from samples import jpeg, tiff
+from trashpanda_exif import MODEL
+
+# 🧪 Metadata cache: failed reads are retried rather than cached, ZIP members keep their key
+# whatever temp path they were extracted to, and the cache can be bypassed
+
+@pytest.fixture
+def merger(tmp_path):
+    merger = load_merger()
+    merger.set_output_dir(str(tmp_path / "out"))
+    return merger
+
+def read_chunk(merger, cache, keys, records):
+    future = Future()
+    future.set_result(records)
+    return merger.CachedChunk(cache, keys, cache.get_many(keys), list(range(len(keys))), future).result()
+
+def test_empty_reads_are_not_cached(merger):
+    cache = merger.MetadataCache()
+    try:
+        good = {'SourceFile': "a.jpg", 'Model': "X", 'FileTypeExtension': "jpg"}
+        assert read_chunk(merger, cache, ["a", "b", "c"], [good, {}, {'SHA256': "00"}]) == [
+            good, {}, {'SHA256': "00"}]
+        assert cache.get_many(["a", "b", "c"]) == [{'Model': "X", 'FileTypeExtension': "jpg"}, None, None]
+    finally:
+        cache.close()
+
+def test_zip_member_key_ignores_the_extraction_path(merger, tmp_path):
+    archive = str(tmp_path / "dump.zip")
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr("data/.trash/IMG_1.jpg", b"abc")
+    info = zipfile.ZipFile(archive).getinfo("data/.trash/IMG_1.jpg")
+    first = merger.cache_key("batch", "/tmp/exif_trash_a/data/.trash/IMG_1.jpg", False, info, archive)
+    second = merger.cache_key("batch", "/tmp/exif_trash_b/data/.trash/IMG_1.jpg", False, info, archive)
+    assert first == second
+    assert merger.cache_key("batch", info.filename, True, info, archive) != first  # read in place
+    assert merger.journal_item(archive, "/tmp/x/IMG_1.jpg", False, info) == merger.journal_item(
+        archive, info.filename, True, info)
+
+def test_cache_can_be_bypassed(merger, tmp_path):
+    folder = tmp_path / "case"
+    folder.mkdir()
+    (folder / "IMG_1.jpg").write_bytes(jpeg(tiff({MODEL: "X"})))
+    assert merger.extract_metadata(str(folder), lambda done, total: None, "native", 1, resume=False,
+                                   use_cache=False)
+    assert not os.path.exists(merger.CACHE_PATH)
+    assert merger.extract_metadata(str(folder), lambda done, total: None, "native", 1, resume=False)
+    assert os.path.exists(merger.CACHE_PATH)
+    merger.clear_metadata_cache()
+    assert not os.path.exists(merger.CACHE_PATH)
@@ -0,0 +1,110 @@
+import csv
+import time
+
+import pytest
+
+from common import load_merger
+from synthetic import build_case, write_trashdb
+from trashpanda_case import NOT_FOUND, CaseStore, file_name
+
+# 🧪 case.db: title/content matching, merged rows and date-range exports as queries, and a
+# merge through case.db giving the same CSV as the merge over the CSVs
+START = 1650000000000
+
+def file_row(path, camera="SM-G991B"):
+    return {'FilePath': path, 'DateCreated': "2022:01:01 10:00:00", 'DateModified': "2022:01:01 10:00:00",
+            'Camera': camera, 'Title': "", 'Extension': "jpg"}
+
+@pytest.fixture
+def store(tmp_path):
+    trash_db = str(tmp_path / "trash.db")
+    write_trashdb(trash_db, ["IMG_1.jpg", "IMG_2", "IMG_1.jpg", "IMG_9"], START)
+    case = CaseStore(str(tmp_path / "case.db"))
+    case.reset_trashes()
+    assert case.import_trashdb(trash_db) == 4
+    case.mark_complete("trashes")
+    case.reset_files()
+    case.add_files([file_row("/dump/IMG_1.jpg"), file_row("/dump/a.zip > trash/IMG_2.jpg"),
+                    file_row("/dump/IMG_3.jpg")])
+    case.mark_complete("files")
+    yield case
+    case.close()
+
+def test_file_name():
+    assert file_name("/dump/a.zip > data/.trash/IMG_2.jpg") == "IMG_2.jpg"
+    assert file_name("C:\\dump\\IMG_1.jpg") == "IMG_1.jpg"
+
+def test_reset_files_keeps_resume_prefix(store):
+    store.reset_files(keep=2)
+    assert store.file_count() == 2
+    assert store.completed("files") is None
+    assert store.completed("matches") is None
+
+def test_exact_match_takes_earliest_trash_row(store):
+    assert store.match_exact() == 2
+    rows = list(store.iter_merged())
+    assert [row[0] for row in rows] == ["IMG_1.jpg", "IMG_2", ""]
+    assert rows[0][1] == START  # the first of the two IMG_1.jpg rows
+    assert rows[2][1:3] == (NOT_FOUND, NOT_FOUND)
+    assert store.completed("matches") is not None
+
+def test_set_matches_replaces_earlier_matches(store):
+    store.match_exact()
+    pages = list(store.iter_file_path_pages(size=2))
+    assert [len(page) for page in pages] == [2, 1]
+    store.set_matches(iter([[(4, 3)], []]))
+    assert [row[0] for row in store.iter_merged()] == ["", "", "IMG_9"]
+    assert [row[0] for row in store.iter_merged(matched_only=True)] == ["IMG_9"]
+
+def test_date_range_is_half_open(store):
+    store.match_exact()
+    assert [row[0] for row in store.iter_merged(since=START + 1000)] == ["IMG_2"]
+    assert [row[0] for row in store.iter_merged(since=START, until=START + 1000)] == ["IMG_1.jpg"]
+    assert list(store.iter_merged(since=START + 2000)) == []
+
+def test_unmatched_copy_inherits_through_cluster(store):
+    store.add_files([file_row("/dump/copy_of_1.jpg")])
+    with store.conn:
+        store.conn.execute("UPDATE files SET sha256 = 'aa' WHERE file_id IN (1, 4)")
+    store.match_exact()
+    store.set_clusters({1: 1, 4: 1})
+    assert store.match_clusters() == 1
+    rows = list(store.iter_merged(identity=True))
+    assert rows[3][0] == "IMG_1.jpg"
+    assert rows[3][-1] == "content"
+    assert [row[:2] for row in store.iter_duplicates()] == [(1, "/dump/IMG_1.jpg"), (1, "/dump/copy_of_1.jpg")]
+
+@pytest.fixture
+def merged_case(tmp_path):
+    merger = load_merger()
+    folder = str(tmp_path / "case")
+    build_case(folder, 60)
+    merger.set_output_dir(str(tmp_path / "out"))
+    assert merger.extract_metadata(folder, lambda done, total: None, "native", 1, resume=False)
+    assert merger.export_trashdb_to_csv(folder)
+    assert merger.merge_outputs(False)
+    return merger
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+def test_case_merge_matches_csv_merge(merged_case, monkeypatch):
+    merger = merged_case
+    from_case = read_rows(merger.MERGED_OUTPUT)
+    monkeypatch.setattr(merger, "CASE_ENABLED", False)
+    assert merger.merge_outputs(False)
+    assert read_rows(merger.MERGED_OUTPUT) == from_case
+    assert len(from_case) == 1 + 60
+
+def test_date_range_export(merged_case, tmp_path):
+    merger = merged_case
+    since, until = START + 10 * 1000, START + 20 * 1000
+    target = str(tmp_path / "range.csv")
+    assert merger.export_case(target, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(since / 1000)),
+                              time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(until / 1000)))
+    header, *rows = read_rows(merger.MERGED_OUTPUT)
+    deleted = header.index("Unixepoch Timestamp")
+    expected = [row for row in rows if row[deleted] != NOT_FOUND and since <= int(row[deleted]) < until]
+    assert read_rows(target) == [header] + expected
+    assert len(expected) == 10
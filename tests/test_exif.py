@@ -0,0 +1,80 @@
+import struct
+
+from samples import heic, jpeg, segment, tiff
+from trashpanda_exif import DATE_TIME_ORIGINAL, MODIFY_DATE, MODEL, read_exif_buffer, read_exif_file
+
+# 🧪 Header-only EXIF parser on hand-built JPEG, TIFF and HEIC headers
+SHOT = "2021:06:01 10:20:30"
+SAVED = "2021:06:02 08:00:00"
+
+def sample_exif(order='<'):
+    return tiff({MODEL: "Galaxy S21", MODIFY_DATE: SAVED}, {DATE_TIME_ORIGINAL: SHOT}, order)
+
+EXPECTED = {MODEL: "Galaxy S21", MODIFY_DATE: SAVED, DATE_TIME_ORIGINAL: SHOT}
+
+def test_jpeg_little_endian():
+    assert read_exif_buffer(jpeg(sample_exif('<'))) == ('jpg', EXPECTED)
+
+def test_jpeg_big_endian():
+    assert read_exif_buffer(jpeg(sample_exif('>'))) == ('jpg', EXPECTED)
+
+def test_tiff_file_big_endian():
+    assert read_exif_buffer(sample_exif('>') + b'\0' * 32) == ('tif', EXPECTED)
+
+def test_exif_ifd_wins_over_ifd0():
+    exif = tiff({MODEL: "A1", DATE_TIME_ORIGINAL: "2000:01:01 00:00:00"}, {DATE_TIME_ORIGINAL: SHOT})
+    assert read_exif_buffer(jpeg(exif)) == ('jpg', {MODEL: "A1", DATE_TIME_ORIGINAL: SHOT})
+
+def test_jpeg_without_exif():
+    assert read_exif_buffer(jpeg()) == ('jpg', {})
+
+def test_heic():
+    assert read_exif_buffer(heic(sample_exif('>'))) == ('heic', EXPECTED)
+
+def test_heif_brand():
+    assert read_exif_buffer(heic(sample_exif(), brand=b'mif1')) == ('heif', EXPECTED)
+
+def test_heic_without_exif_item():
+    assert read_exif_buffer(heic()) == ('heic', {})
+
+def test_truncated_inside_exif_segment():
+    data = jpeg(sample_exif())
+    cut = data.index(b'Exif\0\0') + 20
+    assert read_exif_buffer(data[:cut]) is None
+
+def test_truncated_after_exif_segment_keeps_tags():
+    data = jpeg(sample_exif())
+    assert read_exif_buffer(data[:data.index(b'\xff\xda')]) == ('jpg', EXPECTED)
+
+def test_truncated_heic_item():
+    data = heic(sample_exif())
+    assert read_exif_buffer(data[:-10]) is None
+
+def test_multi_picture_jpeg_is_left_to_the_fallback():
+    assert read_exif_buffer(jpeg(sample_exif(), extra=segment(0xE2, b'MPF\0' + b'\0' * 16))) is None
+
+def test_malformed_ifd_count():
+    exif = bytearray(sample_exif())
+    exif[8:10] = struct.pack('<H', 0xFFFF)
+    assert read_exif_buffer(jpeg(bytes(exif))) is None
+
+def test_malformed_value_offset():
+    exif = bytearray(tiff({MODEL: "Galaxy S21"}))
+    exif[8 + 2 + 8:8 + 2 + 12] = struct.pack('<L', 10 ** 6)
+    assert read_exif_buffer(jpeg(bytes(exif))) is None
+
+def test_wanted_tag_not_ascii():
+    exif = bytearray(tiff({MODEL: "Galaxy S21"}))
+    exif[8 + 2 + 2:8 + 2 + 4] = struct.pack('<H', 7)
+    assert read_exif_buffer(jpeg(bytes(exif))) is None
+
+def test_not_an_image():
+    assert read_exif_buffer(b'') is None
+    assert read_exif_buffer(b'PK\x03\x04' + b'\0' * 64) is None
+    assert read_exif_buffer(b'\xff\xd8garbage') is None
+
+def test_file_matches_buffer(tmp_path):
+    path = tmp_path / "IMG_0001.jpg"
+    path.write_bytes(jpeg(sample_exif()))
+    assert read_exif_file(str(path)) == ('jpg', EXPECTED)
+    assert read_exif_file(str(tmp_path / "missing.jpg")) is None
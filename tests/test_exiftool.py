@@ -0,0 +1,117 @@
+import csv
+import os
+import zipfile
+
+import pytest
+
+from common import REPO_DIR, load_merger
+from samples import jpeg, tiff
+from trashpanda_exif import DATE_TIME_ORIGINAL, MODEL
+
+# 🧪 ExifTool readers against fake_exiftool.py: one process per file, a -stay_open session
+# and the per-thread pool return the same records, matched back to the requested paths
+
+@pytest.fixture
+def merger(monkeypatch):
+    monkeypatch.setenv("TRASHPANDA_EXIFTOOL", os.path.join(REPO_DIR, "fake_exiftool.py"))
+    return load_merger()
+
+@pytest.fixture
+def paths(tmp_path):
+    names = ["IMG_0001.jpg", "we{ird} }name.jpg", "ünïcode 写真.jpg", "no_date.png"]
+    paths = []
+    for i, name in enumerate(names):
+        path = tmp_path / name
+        if name.endswith(".png"):
+            path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 64)
+        else:
+            path.write_bytes(jpeg(tiff({MODEL: "X"}, {DATE_TIME_ORIGINAL: f"2021:06:01 10:20:{i:02d}"})))
+        paths.append(str(path))
+    (tmp_path / "folder.jpg").mkdir()  # exists, but cannot be read as a file
+    return paths + [str(tmp_path / "folder.jpg"), str(tmp_path / "missing.jpg")]
+
+def test_readers_agree(merger, paths):
+    per_file = [merger.read_metadata_per_file(p) for p in paths]
+    with merger.ExifToolSession() as session:
+        batch = session.read_metadata(paths)
+    pool = merger.ExifToolPool()
+    try:
+        pooled = pool.read_metadata(paths)
+    finally:
+        pool.close()
+    assert batch == per_file == pooled
+    assert [record.get('DateTimeOriginal') for record in batch] == [
+        "2021:06:01 10:20:00", "2021:06:01 10:20:01", "2021:06:01 10:20:02", None, None, None]
+    assert batch[-2:] == [{}, {}]
+    assert batch[3] == {'SourceFile': paths[3].replace('\\', '/'), 'FileTypeExtension': 'png'}
+
+def test_session_keeps_step_across_batches(merger, paths):
+    with merger.ExifToolSession() as session:
+        first = session.read_metadata(paths)
+        assert session.read_metadata(list(reversed(paths))) == list(reversed(first))
+        assert session.read_metadata([paths[-1]]) == [{}]
+        assert session.read_metadata(paths[:1]) == first[:1]
+
+def test_large_batch_streams(merger, tmp_path):
+    data = jpeg(tiff({MODEL: "X"}, {DATE_TIME_ORIGINAL: "2021:06:01 10:20:30"}))
+    paths = []
+    for i in range(400):
+        path = tmp_path / f"IMG_{i:04d}.jpg"
+        path.write_bytes(data)
+        paths.append(str(path))
+    with merger.ExifToolSession() as session:
+        records = session.read_metadata(paths)
+    assert [record['SourceFile'] for record in records] == [p.replace('\\', '/') for p in paths]
+
+def test_pool_restarts_a_dead_session(merger, paths):
+    pool = merger.ExifToolPool()
+    try:
+        first = pool.read_metadata(paths)
+        pool.local.session.proc.kill()
+        pool.local.session.proc.wait()
+        before = merger.metrics.counters.get("exiftool.restarts", 0)
+        assert pool.read_metadata(paths) == first
+        assert merger.metrics.counters["exiftool.restarts"] == before + 1
+        assert len(pool.sessions) == 1
+    finally:
+        pool.close()
+
+def test_backends_agree(merger, paths):
+    items = [(None, p, False, None) for p in paths]
+    results = {backend: [metadata for _, _, metadata in merger.iter_records(items, backend, 2)]
+               for backend in ("batch", "per-file", "async")}
+    assert results["batch"] == results["per-file"] == results["async"]
+
+def test_async_pool_restarts_a_dead_session(merger, paths):
+    pool = merger.AsyncExifToolPool(1)
+    async def kill_sessions():
+        for session in pool.sessions:
+            session.kill()
+            await session.proc.wait()
+    try:
+        first = pool.submit(paths).result()
+        pool.call(kill_sessions())
+        before = merger.metrics.counters.get("exiftool.restarts", 0)
+        assert pool.submit(paths).result() == first
+        assert merger.metrics.counters["exiftool.restarts"] == before + 1
+        assert len(pool.sessions) == 1
+    finally:
+        pool.close()
+
+def test_zip_members_keep_their_path_whichever_backend_reads_them(merger, tmp_path):
+    case = tmp_path / "case"
+    case.mkdir()
+    (case / "IMG_0001.jpg").write_bytes(jpeg(tiff({MODEL: "X"})))
+    archive = str(case / "dump.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"data/.trash/IMG_{i}.jpg", jpeg(tiff({MODEL: f"Cam {i}"})))
+    paths = {}
+    for backend in ("native", "batch", "per-file"):
+        merger.set_output_dir(str(tmp_path / backend))
+        assert merger.extract_metadata(str(case), lambda *a: None, backend, 2, use_cache=False)
+        with open(merger.OUTPUT_METADATA, newline="", encoding="utf-8") as f:
+            paths[backend] = sorted(row["FilePath"] for row in csv.DictReader(f))
+    assert paths["native"] == paths["batch"] == paths["per-file"]
+    assert paths["native"] == [str(case / "IMG_0001.jpg")] + [
+        f"{archive} > data/.trash/IMG_{i}.jpg" for i in range(3)]
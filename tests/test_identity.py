@@ -0,0 +1,132 @@
+import hashlib
+import io
+import random
+
+import pytest
+
+from common import load_merger
+from samples import jpeg, tiff
+from trashpanda_exif import MODEL
+from trashpanda_identity import (HASH_BITS, HASH_SIZE, RADIUS, MultiIndexHash, cluster_duplicates,
+                                 content_identity, perceptual_hash)
+from trashpanda_io import MMAP_MIN_SIZE, BufferReader, mapped
+
+# 🧪 Content identity: the difference hash, duplicate clusters (flat pictures left out) and
+# the multi-index lookup against a plain pairwise scan
+
+ALL_ONES = (1 << HASH_BITS) - 1
+
+def grid_image(rows, fmt="PNG", scale=1, quality=95):
+    Image = pytest.importorskip("PIL.Image")
+    im = Image.new("L", (HASH_SIZE + 1, HASH_SIZE))
+    im.putdata([value for row in rows for value in row])
+    if scale != 1:
+        im = im.resize(((HASH_SIZE + 1) * scale, HASH_SIZE * scale), Image.NEAREST)
+    out = io.BytesIO()
+    im.convert("RGB").save(out, fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return out.getvalue()
+
+# Neighbours differ by at least 90 levels, so scaling and JPEG noise cannot flip a bit
+def random_rows(seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(HASH_SIZE):
+        row = [rng.choice((20, 110, 200))]
+        while len(row) < HASH_SIZE + 1:
+            row.append(rng.choice([level for level in (20, 110, 200) if level != row[-1]]))
+        rows.append(row)
+    return rows
+
+def expected_hash(rows):
+    value = 0
+    for row in rows:
+        for left, right in zip(row, row[1:]):
+            value = value << 1 | (left > right)
+    return value
+
+def test_dhash_compares_neighbouring_pixels():
+    rows = random_rows(1)
+    assert perceptual_hash(io.BytesIO(grid_image(rows))) == expected_hash(rows)
+
+def test_dhash_survives_resizing_and_recompression():
+    rows = random_rows(2)
+    original = perceptual_hash(io.BytesIO(grid_image(rows)))
+    copy = perceptual_hash(io.BytesIO(grid_image(rows, "JPEG", scale=40, quality=70)))
+    assert original == expected_hash(rows)
+    assert bin(original ^ copy).count("1") <= RADIUS
+
+def test_flat_and_monotonic_pictures_hash_to_the_excluded_values():
+    assert perceptual_hash(io.BytesIO(grid_image([[128] * (HASH_SIZE + 1)] * HASH_SIZE))) == 0
+    falling = [list(range(250, 250 - 20 * (HASH_SIZE + 1), -20))] * HASH_SIZE
+    assert perceptual_hash(io.BytesIO(grid_image(falling))) == ALL_ONES
+
+def test_non_images_get_a_digest_and_no_hash():
+    data = b"not a picture" * 10
+    assert content_identity(data) == {"SHA256": hashlib.sha256(data).hexdigest(), "PHash": ""}
+
+def test_identity_is_the_same_from_bytes_views_and_mappings(tmp_path):
+    rows = random_rows(3)
+    data = grid_image(rows, "TIFF", scale=30)
+    assert len(data) >= MMAP_MIN_SIZE  # read through a real mapping
+    path = tmp_path / "big.tif"
+    path.write_bytes(data)
+    expected = {"SHA256": hashlib.sha256(data).hexdigest(), "PHash": f"{expected_hash(rows):016x}"}
+    assert content_identity(data) == expected
+    assert content_identity(memoryview(data)) == expected
+    with mapped(str(path)) as view:
+        assert content_identity(view) == expected
+        assert content_identity(view, BufferReader(view)) == expected
+
+def test_buffer_reader_reads_in_place():
+    data = bytearray(b"0123456789")
+    stream = BufferReader(data)
+    assert stream.read(3) == b"012" and stream.tell() == 3
+    stream.seek(-2, 2)
+    assert stream.read() == b"89" and stream.read(5) == b""
+    data[0:1] = b"X"  # the view is shared, not copied on construction
+    stream.seek(0)
+    assert stream.read(1) == b"X"
+    assert stream.getbuffer().obj is data
+
+def test_read_file_identity_reads_exif_and_hashes_from_one_mapping(tmp_path):
+    merger = load_merger()
+    merger.set_output_dir(str(tmp_path / "out"))
+    data = jpeg(tiff({MODEL: "Cam"})) + b"\0" * MMAP_MIN_SIZE
+    path = tmp_path / "IMG_0001.jpg"
+    path.write_bytes(data)
+    record = merger.read_file_identity(str(path), merger.read_metadata_native)
+    assert record["Model"] == "Cam"
+    assert record["SHA256"] == hashlib.sha256(data).hexdigest()
+
+def test_exact_copies_cluster_by_digest():
+    clusters = cluster_duplicates([(5, "aa", None), (2, "aa", None), (9, "bb", None)])
+    assert clusters == {5: 2, 2: 2}
+
+def test_near_hashes_cluster_transitively_and_far_ones_do_not():
+    base = 0x0123456789ABCDEF
+    step = base ^ 0b111  # 3 bits from base
+    chain = step ^ 0b111000  # 3 bits from step, 6 from base
+    far = base ^ ((1 << (RADIUS + 1)) - 1 << 20)
+    clusters = cluster_duplicates([(1, "a", base), (2, "b", step), (3, "c", chain), (4, "d", far)], radius=3)
+    assert clusters == {1: 1, 2: 1, 3: 1}
+
+def test_flat_pictures_are_not_clustered_by_hash():
+    entries = [(1, "a", 0), (2, "b", 0), (3, "c", ALL_ONES), (4, "d", ALL_ONES), (5, "e", 1), (6, "f", 1)]
+    assert cluster_duplicates(entries) == {5: 5, 6: 5}
+    # equal digests still join them
+    assert cluster_duplicates([(1, "a", 0), (2, "a", 0)]) == {1: 1, 2: 1}
+
+def test_multi_index_query_matches_a_pairwise_scan():
+    rng = random.Random(4)
+    values = []
+    for _ in range(300):
+        if values and rng.random() < 0.5:
+            flips = rng.sample(range(HASH_BITS), rng.randrange(RADIUS + 3))
+            values.append(rng.choice(values) ^ sum(1 << bit for bit in flips))
+        else:
+            values.append(rng.getrandbits(HASH_BITS))
+    index = MultiIndexHash(RADIUS)
+    for value in values:
+        expected = {i for i, other in enumerate(index.values) if bin(other ^ value).count("1") <= RADIUS}
+        assert index.query(value) == expected
+        index.add(value)
@@ -0,0 +1,109 @@
+import hashlib
+import io
+import random
+import zipfile
+
+import pytest
+
+from trashpanda_io import NeedsZipFile, copy_member, read_member_header, read_zip_headers
+
+# 🧪 ZIP member reads without extraction: stored and deflated members straight from the
+# archive (with or without data descriptors), other codecs through a ZipFile
+
+CODECS = [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA]
+
+def payload(seed, size):
+    rng = random.Random(seed)
+    # half noise, half repeats, so deflate has something to do
+    return rng.getrandbits(4 * size).to_bytes(size // 2, 'little') + b"trash" * (size // 10)
+
+class Unseekable(io.RawIOBase):
+    def __init__(self):
+        self.out = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.out.write(data)
+
+def build_zip(path, members, descriptors=False):
+    if not descriptors:
+        with zipfile.ZipFile(path, 'w') as zf:
+            for name, (data, codec) in members.items():
+                zf.writestr(zipfile.ZipInfo(name), data, compress_type=codec)
+        return
+    # Writing to a stream that cannot seek back makes zipfile follow each member with a
+    # data descriptor (flag bit 3) instead of patching sizes into its local header
+    stream = Unseekable()
+    with zipfile.ZipFile(stream, 'w') as zf:
+        for name, (data, codec) in members.items():
+            info = zipfile.ZipInfo(name)
+            info.compress_type = codec
+            with zf.open(info, 'w') as member:
+                member.write(data)
+    with open(path, 'wb') as f:
+        f.write(stream.out.getvalue())
+
+@pytest.fixture(params=[False, True], ids=["sizes", "descriptors"])
+def archive(tmp_path, request):
+    members = {f"data/.trash/IMG_{codec}.jpg": (payload(codec, 300_000), codec) for codec in CODECS}
+    members["data/.trash/tiny.jpg"] = (b"tiny", zipfile.ZIP_DEFLATED)
+    members["data/.trash/empty.jpg"] = (b"", zipfile.ZIP_STORED)
+    path = str(tmp_path / "dump.zip")
+    build_zip(path, members, request.param)
+    with zipfile.ZipFile(path) as zf:
+        assert all(bool(info.flag_bits & 0x8) == request.param for info in zf.infolist())
+    return path, {name: data for name, (data, _) in members.items()}
+
+@pytest.mark.parametrize("limit", [1, 4096, 128 * 1024, 10_000_000])
+def test_headers_match_the_member_bytes(archive, limit):
+    path, expected = archive
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+    for members in (infos, [info.filename for info in infos]):
+        headers = dict(read_zip_headers(path, members, limit))
+        assert headers == {name: data[:limit] for name, data in expected.items()}
+
+def test_stored_and_deflated_members_need_no_zipfile(archive):
+    path, expected = archive
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+    with open(path, 'rb') as raw:
+        for info in infos:
+            if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                assert read_member_header(None, raw, info, 1000) == expected[info.filename][:1000]
+            else:
+                with pytest.raises(NeedsZipFile):
+                    read_member_header(None, raw, info, 1000)
+
+def test_unsupported_codecs_fall_back_to_the_zipfile(archive):
+    path, expected = archive
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+        others = [info for info in infos if info.compress_type in (zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)]
+        with open(path, 'rb') as raw:
+            for info in others:
+                assert read_member_header(zf, raw, info, 500) == expected[info.filename][:500]
+    # raw-readable members after the fallback opened the ZipFile still come back, in order
+    order = others + infos + others
+    assert list(read_zip_headers(path, order, 500)) == [(info.filename, expected[info.filename][:500])
+                                                       for info in order]
+
+def test_unreadable_members_yield_none(tmp_path):
+    path = str(tmp_path / "broken.zip")
+    build_zip(path, {"a.jpg": (b"x" * 100, zipfile.ZIP_STORED)})
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo("a.jpg")
+    info.header_offset += 1  # no local header signature there
+    assert list(read_zip_headers(path, [info])) == [("a.jpg", None)]
+    assert list(read_zip_headers(path, ["missing.jpg"])) == [("missing.jpg", None)]
+
+def test_copy_member_writes_and_hashes_every_codec(archive, tmp_path):
+    path, expected = archive
+    with zipfile.ZipFile(path) as zf:
+        for n, info in enumerate(zf.infolist()):
+            target = tmp_path / f"out_{n}"
+            digest = copy_member(zf, info, str(target))
+            assert target.read_bytes() == expected[info.filename]
+            assert digest == hashlib.sha256(expected[info.filename]).hexdigest()
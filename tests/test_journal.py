@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from common import load_merger
+from samples import jpeg, tiff
+from trashpanda_exif import DATE_TIME_ORIGINAL, MODEL
+
+# 🧪 Job journal: a stopped extraction resumes only onto its own CSV, and delta runs reuse
+# unchanged rows in discovery order
+
+@pytest.fixture
+def merger():
+    return load_merger()
+
+def write_image(folder, i, model="Cam"):
+    exif = tiff({MODEL: f"{model} {i}"}, {DATE_TIME_ORIGINAL: f"2021:06:01 10:20:{i:02d}"})
+    with open(os.path.join(folder, f"IMG_{i:04d}.jpg"), 'wb') as f:
+        f.write(jpeg(exif))
+
+def make_case(root, count):
+    os.makedirs(root)
+    for i in range(count):
+        write_image(root, i)
+    return root
+
+# Returns (ok, progress values); stop_at sets the cancel event once that many items are done
+def extract(merger, folder, output, stop_at=None, **options):
+    merger.set_output_dir(output)
+    cancel, seen = threading.Event(), []
+    def progress(done, total):
+        seen.append(done)
+        if stop_at is not None and done >= stop_at:
+            cancel.set()
+    ok = merger.extract_metadata(folder, progress, "native", 1, cancel=cancel, **options)
+    return ok, seen
+
+def read_csv(output):
+    with open(os.path.join(output, "output_metadata.csv"), encoding='utf-8') as f:
+        return f.read()
+
+def statuses(output):
+    conn = sqlite3.connect(os.path.join(output, "job_journal.db"))
+    try:
+        return conn.execute("SELECT folder, status FROM runs ORDER BY run_id").fetchall()
+    finally:
+        conn.close()
+
+def test_stopped_run_resumes(merger, tmp_path):
+    case = make_case(str(tmp_path / "case"), 12)
+    out = str(tmp_path / "out")
+    ok, _ = extract(merger, case, out, stop_at=5)
+    assert not ok
+    assert len(read_csv(out).splitlines()) == 1 + 5
+    ok, seen = extract(merger, case, out)
+    assert ok
+    assert seen[0] == 6  # the five rows already written are skipped, not read again
+    extract(merger, case, str(tmp_path / "fresh"), resume=False)
+    assert read_csv(out) == read_csv(str(tmp_path / "fresh"))
+    assert [status for _, status in statuses(out)] == ["done"]
+
+def test_rewritten_csv_starts_over(merger, tmp_path):
+    case = make_case(str(tmp_path / "case"), 12)
+    out = str(tmp_path / "out")
+    extract(merger, case, out, stop_at=5)
+    text = read_csv(out)
+    with open(os.path.join(out, "output_metadata.csv"), 'w', encoding='utf-8') as f:
+        f.write(text.replace("Cam 1", "Cam X"))
+    ok, seen = extract(merger, case, out)
+    assert ok
+    assert seen[0] == 1
+    extract(merger, case, str(tmp_path / "fresh"), resume=False)
+    assert read_csv(out) == read_csv(str(tmp_path / "fresh"))
+
+def test_run_of_another_folder_abandons_the_stopped_one(merger, tmp_path):
+    first = make_case(str(tmp_path / "first"), 12)
+    second = make_case(str(tmp_path / "second"), 3)
+    out = str(tmp_path / "out")
+    extract(merger, first, out, stop_at=5)
+    assert extract(merger, second, out)[0]
+    assert [status for _, status in statuses(out)] == ["abandoned", "done"]
+    ok, seen = extract(merger, first, out)
+    assert ok
+    assert seen[0] == 1
+    extract(merger, first, str(tmp_path / "fresh"), resume=False)
+    assert read_csv(out) == read_csv(str(tmp_path / "fresh"))
+
+def test_delta_reuses_unchanged_rows_in_place(merger, tmp_path):
+    case = make_case(str(tmp_path / "case"), 12)
+    out = str(tmp_path / "out")
+    assert extract(merger, case, out)[0]
+    write_image(case, 4, model="Replaced camera")
+    write_image(case, 20)
+    before = dict(merger.metrics.counters)
+    ok, seen = extract(merger, case, out, delta=True)
+    assert ok
+    counters = merger.metrics.counters
+    assert counters["extract.reused"] - before.get("extract.reused", 0) == 11
+    assert counters["extract.files"] - before.get("extract.files", 0) == 2
+    assert seen[-1] == 13
+    extract(merger, case, str(tmp_path / "fresh"), resume=False)
+    assert read_csv(out) == read_csv(str(tmp_path / "fresh"))
+    assert "Replaced camera 4" in read_csv(out)
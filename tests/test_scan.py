@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import zipfile
+
+import pytest
+
+from common import load_merger
+from samples import jpeg, tiff
+from synthetic import write_trashdb
+from trashpanda_exif import MODEL
+
+# 🧪 The shared tree walk of "Run all": bounded hand-off, and the trash.db list still
+# arrives when extraction stops reading early
+
+@pytest.fixture
+def merger(tmp_path):
+    merger = load_merger()
+    merger.set_output_dir(str(tmp_path / "out"))
+    return merger
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "case"
+    (root / "zz").mkdir(parents=True)
+    for i in range(30):
+        (root / f"IMG_{i:04d}.jpg").write_bytes(jpeg(tiff({MODEL: f"Cam {i}"})))
+    write_trashdb(str(root / "zz" / "trash.db"), ["IMG_0001"])
+    return str(root)
+
+def finishes(fn, seconds=30):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "hung"
+    return result[0]
+
+def test_scan_matches_walk(merger, folder):
+    tree = merger.TreeScan(folder, maxsize=4)
+    walked = list(merger.iter_tree(folder))
+    assert finishes(lambda: list(tree)) == [entry for entry in walked if entry[0] != merger.TRASH_DB]
+    assert tree.trash_dbs() == [path for kind, path in walked if kind == merger.TRASH_DB]
+
+def test_queue_is_bounded(merger, folder):
+    tree = merger.TreeScan(folder, maxsize=4)
+    threading.Event().wait(0.5)
+    assert tree.entries.qsize() <= 4
+    assert not tree.finished.is_set()  # the walk waits for the consumer
+    tree.close()
+
+def test_consumer_stopping_early_releases_the_walk(merger, folder):
+    tree = merger.TreeScan(folder, maxsize=2)
+    entries = iter(tree)
+    next(entries)
+    entries.close()
+    assert finishes(tree.trash_dbs) == [os.path.join(folder, "zz", "trash.db")]
+
+def test_run_all_exports_when_extraction_fails_early(merger, folder, monkeypatch):
+    monkeypatch.setenv("TRASHPANDA_EXIFTOOL", os.path.join(folder, "missing-exiftool.py"))
+    monkeypatch.setattr(merger, "DISCOVERY_QUEUE_SIZE", 2)
+    ok = finishes(lambda: asyncio.run(merger.run_pipeline(folder, lambda done, total: None, "batch")))
+    assert not ok
+    assert os.path.exists(merger.OUTPUT_TRASHDB)
+
+def test_zip_inventory_is_bounded(merger, tmp_path, monkeypatch):
+    monkeypatch.setattr(merger, "ZIP_INVENTORY_MAX_ENTRIES", 4)
+    archives = []
+    for n in range(3):
+        path = tmp_path / f"part{n}.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            for i in range(2):
+                archive.writestr(f".Trashes/IMG_{i}.jpg", jpeg(tiff({})))
+        archives.append(str(path))
+    for path in archives:
+        assert len(merger.list_targeted_infos(path)) == 2
+    keys = list(merger.zip_inventory)
+    assert keys == [merger.path_key(p) for p in archives[1:]]
+    assert merger.zip_inventory_size[0] == 4
+    merger.list_targeted_infos(archives[1])
+    assert list(merger.zip_inventory)[-1] == merger.path_key(archives[1])
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+
+import pytest
+
+from bench_timestamps import original_convert_timestamp, synthetic_titles
+from common import load_extractor
+
+# 🧪 Trash-title timestamps: compat mode reproduces the original four-pass conversion, and
+# the column-at-once conversion agrees with the per-title one in both modes
+EDGE_TITLES = ["", "no digits", "20221399_999999", "1700000000123_1700000000",
+               "20230102_030405 and 2023-01-02-030405", "IMG_20230102_030405_1", "x" * 40 + "1234567890"]
+
+@pytest.fixture(scope="module")
+def extractor():
+    return load_extractor()
+
+@pytest.fixture(scope="module")
+def titles():
+    return synthetic_titles(3000) + EDGE_TITLES
+
+def test_compat_matches_original(extractor, titles):
+    assert [extractor.convert_timestamp(t, compat=True) for t in titles] == [
+        original_convert_timestamp(t) for t in titles]
+
+@pytest.mark.parametrize("compat", [False, True])
+def test_batch_matches_scalar(extractor, titles, compat):
+    expected = [extractor.cached_timestamp(t, compat) for t in titles]
+    assert extractor.convert_timestamps(titles, compat=compat) == expected
+
+def test_batch_tolerates_non_text(extractor):
+    assert extractor.convert_timestamps([None, 20230102, "20230102_030405"], compat=False) == [
+        None, None, "2023/01/02 03:04:05"]
+
+def test_modes_differ_on_overlaps(extractor):
+    title = "1700000000123"
+    assert extractor.convert_timestamp(title, compat=False).count(",") == 0
+    assert extractor.convert_timestamp(title, compat=True).count(",") == 1  # also read as 10-digit epoch
+
+def test_timestamp_compat_flag(extractor, tmp_path):
+    parser = extractor.build_arg_parser()
+    assert parser.parse_args(["batch", str(tmp_path), "--timestamp-compat"]).timestamp_compat is True
+    assert parser.parse_args(["process", str(tmp_path)]).timestamp_compat is extractor.TIMESTAMP_COMPAT
+
+@pytest.mark.parametrize("compat", [False, True])
+def test_update_database_uses_compat(extractor, tmp_path, compat):
+    db_path = str(tmp_path / "trash.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE trashes (_id INTEGER PRIMARY KEY, title TEXT, date_deleted INTEGER)")
+    conn.execute("INSERT INTO trashes (title, date_deleted) VALUES ('1700000000123', 0)")
+    conn.commit()
+    conn.close()
+    os.makedirs(tmp_path / "images")
+    assert extractor.update_database(db_path, str(tmp_path / "images"), mode="alter", compat=compat)
+    conn = sqlite3.connect(db_path)
+    (converted,), = conn.execute("SELECT converted_title FROM trashes")
+    conn.close()
+    assert converted == extractor.convert_timestamp("1700000000123", compat=compat)
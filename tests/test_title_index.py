@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from common import load_merger
+
+# 🧪 TitleIndex against the nested scan it replaced: the first trash row, in table order,
+# whose title occurs anywhere in the path
+
+@pytest.fixture(scope="module")
+def merger():
+    return load_merger()
+
+def naive_match(rows, path):
+    for row in rows:
+        title = row.get("title", "")
+        if title and title in path:
+            return row
+    return None
+
+def check(merger, rows, paths):
+    index = merger.TitleIndex(rows)
+    for path in paths:
+        assert index.match(path) is naive_match(rows, path), path
+
+def test_first_row_wins_over_longer_and_earlier_matches(merger):
+    rows = [{"title": "IMG_12"}, {"title": "IMG_1234"}, {"title": "34"}, {"title": "IMG_12"}]
+    check(merger, rows, ["/a/IMG_1234.jpg", "/a/IMG_34.jpg", "/a/IMG_9.jpg", "/34/IMG_9.jpg"])
+    index = merger.TitleIndex(rows)
+    assert index.match("/a/IMG_1234.jpg") is rows[0]  # duplicates keep the earliest row
+
+def test_overlapping_and_nested_titles(merger):
+    rows = [{"title": "abcd"}, {"title": "bcde"}, {"title": "cd"}, {"title": "bc"}, {"title": ""}]
+    check(merger, rows, ["xabcdex", "xbcdex", "xabcx", "xcdx", "bcd", "abc", "e", ""])
+
+def test_titles_spanning_the_folder_and_file_name(merger):
+    rows = [{"title": "dump.zip > data/IMG_1"}, {"title": "data\\IMG_2"}, {"title": "IMG_1"}]
+    paths = ["/c/dump.zip > data/IMG_1.jpg", "/c/other.zip > data/IMG_1.jpg",
+             "C:\\case\\data\\IMG_2.jpg", "/c/data/IMG_2.jpg"]
+    check(merger, rows, paths + paths)  # again, through the cached prefixes
+
+def test_random_tables_match_the_nested_scan(merger):
+    rng = random.Random(7)
+    alphabet = "ab/_\\é"
+    for _ in range(40):
+        rows = [{"title": "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 5)))}
+                for _ in range(rng.randrange(1, 30))]
+        paths = ["".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 16))) for _ in range(60)]
+        check(merger, rows, paths)
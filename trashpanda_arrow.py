@@ -0,0 +1,176 @@
+import os
+import csv
+
+# 🏛️ Optional columnar outputs (Parquet / Feather v2) next to the CSVs, via pyarrow.
+# Rows are buffered into record batches and appended one row group at a time, so memory
+# is bounded by ROW_GROUP_ROWS. Typed columns: int64 epochs and timestamps; free-text
+# EXIF dates stay verbatim strings with a parsed "<column>_ts" timestamp beside them.
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # columnar output is optional
+    pa = pc = pq = None
+
+OUTPUT_FORMATS = ("csv", "parquet", "feather")
+COLUMNAR_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather"}
+ROW_GROUP_ROWS = 64 * 1024
+SQL_DATETIME = "%Y-%m-%d %H:%M:%S"  # SQLite datetime()
+EXIF_DATETIME = "%Y:%m:%d %H:%M:%S"
+
+def columnar_available():
+    return pa is not None
+
+def columnar_path(csv_path, fmt):
+    return os.path.splitext(csv_path)[0] + COLUMNAR_EXTENSIONS[fmt]
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_times(values, fmt):
+    text = pa.array([v if isinstance(v, str) else None for v in values], pa.string())
+    if fmt == EXIF_DATETIME:
+        text = pc.utf8_slice_codeunits(text, 0, 19)  # drop sub-seconds / UTC offsets
+    return pc.strptime(text, format=fmt, unit="s", error_is_null=True)
+
+# ✍️ Append rows (sequences in `columns` order) as row groups / IPC record batches.
+# types: {column: "int64" or a strptime format} retypes a column;
+# parsed: {column: strptime format} keeps the column as text and adds "<column>_ts".
+class ColumnarWriter:
+    def __init__(self, path, columns, fmt, types=None, parsed=None, row_group_rows=None):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        self.path, self.fmt, self.columns = path, fmt, list(columns)
+        self.types, self.parsed = types or {}, parsed or {}
+        self.row_group_rows = row_group_rows or ROW_GROUP_ROWS
+        fields = []
+        for name in self.columns:
+            kind = self.types.get(name)
+            fields.append(pa.field(name, pa.string() if kind is None else
+                                   pa.int64() if kind == "int64" else pa.timestamp("s")))
+            if name in self.parsed:
+                fields.append(pa.field(f"{name}_ts", pa.timestamp("s")))
+        self.schema = pa.schema(fields)
+        self.rows = []
+        self.written = 0
+        # Written under a temporary name; an interrupted run never leaves a truncated file in place
+        self.partial = path + ".partial"
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(self.partial, self.schema)
+        elif fmt == "feather":
+            self.sink = pa.OSFile(self.partial, "wb")
+            self.writer = pa.ipc.new_file(self.sink, self.schema)
+        else:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def batch(self, rows):
+        arrays = []
+        for idx, name in enumerate(self.columns):
+            values = [row[idx] for row in rows]
+            kind = self.types.get(name)
+            if kind is None:
+                arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+            elif kind == "int64":
+                arrays.append(pa.array([to_int(v) for v in values], pa.int64()))
+            else:
+                arrays.append(parse_times(values, kind))
+            if name in self.parsed:
+                arrays.append(parse_times(values, self.parsed[name]))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_batch(self.batch(self.rows))
+            self.written += len(self.rows)
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if self.fmt == "feather":
+            self.sink.close()
+        os.replace(self.partial, self.path)
+
+    # Abandon a failed write: the partial file is removed, any older copy stays untouched
+    def discard(self):
+        try:
+            self.writer.close()
+            if self.fmt == "feather":
+                self.sink.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.partial)
+        except OSError:
+            pass
+
+# 📖 Stream a columnar file back as dicts of CSV-equivalent strings, one record batch at a
+# time; typed columns are formatted the way the CSV writer would have written them
+def iter_columnar_rows(path, columns, types=None):
+    types = types or {}
+    if path.endswith(".parquet"):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=ROW_GROUP_ROWS, columns=list(columns))
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i).select(list(columns)) for i in range(reader.num_record_batches))
+    for batch in batches:
+        lists = []
+        for name in columns:
+            array = batch.column(name)
+            kind = types.get(name)
+            if kind == "int64":
+                array = pc.cast(array, pa.string())
+            elif kind is not None:
+                # Parquet stores seconds as milliseconds; back to seconds so %S has no fraction
+                array = pc.cast(array, pa.timestamp("s"))
+                if kind == SQL_DATETIME:
+                    array = pc.cast(array, pa.string())  # same text, much faster than strftime
+                else:
+                    array = pc.strftime(array, format=kind)
+            lists.append(pc.fill_null(array, "").to_pylist())
+        for values in zip(*lists):
+            yield dict(zip(columns, values))
+
+# Columnar copy is usable for handoff if it exists and is not older than its CSV
+def fresh_columnar(csv_path, fmt):
+    if fmt not in COLUMNAR_EXTENSIONS or pa is None:
+        return None
+    path = columnar_path(csv_path, fmt)
+    if os.path.exists(path) and (not os.path.exists(csv_path) or
+                                 os.path.getmtime(path) >= os.path.getmtime(csv_path)):
+        return path
+    return None
+
+# Rebuild a columnar copy from a finished CSV (e.g. after a resumed run)
+def csv_to_columnar(csv_path, fmt, types=None, parsed=None):
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return None
+        target = columnar_path(csv_path, fmt)
+        with ColumnarWriter(target, header, fmt, types, parsed) as writer:
+            writer.write_rows(reader)
+    return target
@@ -0,0 +1,206 @@
+import os
+import time
+import sqlite3
+from pathlib import Path
+
+# 🗄️ Case database: the metadata of every discovered file and the rows of every source
+# trash.db (copied in through ATTACH, read-only) in one SQLite file, indexed on title, file
+# stem and date_deleted. The merge is a join over it, and every export is a streaming query,
+# so re-exporting a date range does not re-run extraction or re-read any CSV.
+
+CASE_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, completed REAL)",
+    "CREATE TABLE IF NOT EXISTS sources (source_id INTEGER PRIMARY KEY, path TEXT)",
+    "CREATE TABLE IF NOT EXISTS trashes (trash_id INTEGER PRIMARY KEY, source_id INTEGER, title TEXT, "
+    "date_deleted, deleted_local TEXT)",
+    "CREATE TABLE IF NOT EXISTS files (file_id INTEGER PRIMARY KEY, file_path TEXT, name TEXT, stem TEXT, "
+    "date_created TEXT, date_modified TEXT, camera TEXT, title TEXT, extension TEXT, trash_id INTEGER)",
+    "CREATE INDEX IF NOT EXISTS trashes_title ON trashes (title)",
+    "CREATE INDEX IF NOT EXISTS trashes_date_deleted ON trashes (date_deleted)",
+    "CREATE INDEX IF NOT EXISTS files_stem ON files (stem)",
+    "CREATE INDEX IF NOT EXISTS files_trash_id ON files (trash_id)",
+]
+# Content identity columns (added to case files created before them); matched_by is
+# "title" or "content" once merge has run
+IDENTITY_FIELDS = {"sha256": "TEXT", "phash": "TEXT", "cluster": "INTEGER", "matched_by": "TEXT"}
+IDENTITY_INDEXES = ["CREATE INDEX IF NOT EXISTS files_cluster ON files (cluster)",
+                    "CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256)"]
+# Same columns and conversion as the trash.db CSV export
+TRASH_SELECT = "title, date_deleted, datetime(date_deleted / 1000, 'unixepoch', 'localtime')"
+FILE_FIELDS = ('DateCreated', 'DateModified', 'Camera', 'Title', 'Extension')
+NOT_FOUND = "Not found"
+
+def file_name(file_path):
+    # "archive.zip > folder/IMG_1.jpg" and plain paths alike
+    member = file_path.rsplit(" > ", 1)[-1]
+    return member[max(member.rfind('/'), member.rfind('\\')) + 1:]
+
+class CaseStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        # Extraction and the trash.db import write concurrently under "Run all"; wait, don't fail
+        self.conn = sqlite3.connect(path, uri=True, check_same_thread=False, timeout=120)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        for statement in CASE_SCHEMA:
+            self.conn.execute(statement)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(files)")}
+        for name, kind in IDENTITY_FIELDS.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE files ADD COLUMN {name} {kind}")
+        for statement in IDENTITY_INDEXES:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # Completion times per part ("files", "trashes", "matches"); None while it is being rewritten
+    def completed(self, key):
+        row = self.conn.execute("SELECT completed FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def mark_complete(self, key):
+        self.conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?)", (key, time.time()))
+        self.conn.commit()
+
+    def mark_incomplete(self, *keys):
+        self.conn.executemany("DELETE FROM state WHERE key = ?", [(key,) for key in keys])
+        self.conn.commit()
+
+    # 📸 Files, in the same order as output_metadata.csv; keep= drops rows past a resume point
+    def reset_files(self, keep=0):
+        self.conn.execute("DELETE FROM files WHERE file_id > ?", (keep,))
+        self.mark_incomplete("files", "matches")
+
+    def add_files(self, rows):
+        self.conn.executemany(
+            "INSERT INTO files (file_path, name, stem, date_created, date_modified, camera, title, extension, "
+            "sha256, phash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((row['FilePath'], name, os.path.splitext(name)[0]) + tuple(row.get(f, '') for f in FILE_FIELDS)
+             + (row.get('SHA256') or None, row.get('PHash') or None)
+             for row, name in ((row, file_name(row['FilePath'])) for row in rows)))
+        self.conn.commit()
+
+    def file_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # 🗃️ Trash rows of every source, in export order
+    def reset_trashes(self):
+        self.conn.execute("DELETE FROM trashes")
+        self.conn.execute("DELETE FROM sources")
+        self.mark_incomplete("trashes", "matches")
+
+    def import_trashdb(self, db_path):
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        with self.conn:
+            source_id = self.conn.execute("INSERT INTO sources (path) VALUES (?)", (str(db_path),)).lastrowid
+        self.conn.execute("ATTACH DATABASE ? AS source", (uri,))
+        try:
+            with self.conn:
+                cursor = self.conn.execute(f"INSERT INTO trashes (source_id, title, date_deleted, deleted_local) "
+                                           f"SELECT ?, {TRASH_SELECT} FROM source.trashes", (source_id,))
+            return cursor.rowcount
+        finally:
+            self.conn.execute("DETACH DATABASE source")
+
+    def iter_titles(self):
+        for trash_id, title in self.conn.execute("SELECT trash_id, title FROM trashes ORDER BY trash_id"):
+            yield trash_id, "" if title is None else str(title)
+
+    def iter_trashes(self, with_source=True):
+        source = ", s.path" if with_source else ""
+        return self.conn.execute(f"SELECT t.title, t.date_deleted, t.deleted_local{source} FROM trashes t "
+                                 f"JOIN sources s ON s.source_id = t.source_id ORDER BY t.trash_id")
+
+    # 🔗 Matches: file_id -> trash_id pairs computed by the caller, or an exact title join.
+    # File paths come in pages (keyset on file_id), so no cursor is open while matches are written.
+    def iter_file_path_pages(self, size=5000):
+        last = 0
+        while True:
+            page = self.conn.execute("SELECT file_id, file_path FROM files WHERE file_id > ? ORDER BY file_id "
+                                     "LIMIT ?", (last, size)).fetchall()
+            if not page:
+                return
+            yield page
+            last = page[-1][0]
+
+    # chunks: lists of (trash_id, file_id) pairs, each written as it arrives
+    def set_matches(self, chunks):
+        self.mark_incomplete("matches")
+        with self.conn:
+            self.conn.execute("UPDATE files SET trash_id = NULL, matched_by = NULL")
+        for pairs in chunks:
+            with self.conn:
+                self.conn.executemany("UPDATE files SET trash_id = ?, matched_by = 'title' WHERE file_id = ?", pairs)
+        self.mark_complete("matches")
+
+    def match_exact(self):
+        # Title equal to the file name or its stem, earliest trash row first; both sides indexed
+        with self.conn:
+            self.conn.execute("UPDATE files SET trash_id = (SELECT MIN(t.trash_id) FROM trashes t "
+                              "WHERE t.title IN (files.name, files.stem))")
+            self.conn.execute("UPDATE files SET matched_by = CASE WHEN trash_id IS NULL THEN NULL ELSE 'title' END")
+        self.mark_complete("matches")
+        return self.conn.execute("SELECT COUNT(*) FROM files WHERE trash_id IS NOT NULL").fetchone()[0]
+
+    # 🧬 Duplicate clusters from the content hashes; files without a title match take the trash
+    # row of a title-matched byte-identical file, else of their cluster (the earliest, if several)
+    def has_identity(self):
+        return self.conn.execute("SELECT 1 FROM files WHERE sha256 IS NOT NULL LIMIT 1").fetchone() is not None
+
+    def iter_identities(self):
+        return self.conn.execute("SELECT file_id, sha256, phash FROM files WHERE sha256 IS NOT NULL")
+
+    def set_clusters(self, clusters):
+        with self.conn:
+            self.conn.execute("UPDATE files SET cluster = NULL")
+            self.conn.executemany("UPDATE files SET cluster = ? WHERE file_id = ?",
+                                  ((cluster, file_id) for file_id, cluster in clusters.items()))
+
+    def match_clusters(self):
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE files SET matched_by = 'content', trash_id = COALESCE("
+                "(SELECT MIN(d.trash_id) FROM files d WHERE d.sha256 = files.sha256 AND d.matched_by = 'title'), "
+                "(SELECT MIN(d.trash_id) FROM files d WHERE d.cluster = files.cluster AND d.matched_by = 'title')) "
+                "WHERE trash_id IS NULL AND cluster IS NOT NULL AND EXISTS (SELECT 1 FROM files d "
+                "WHERE d.cluster = files.cluster AND d.matched_by = 'title')")
+        return cursor.rowcount
+
+    def iter_duplicates(self):
+        return self.conn.execute("SELECT cluster, file_path, sha256, phash, COALESCE(matched_by, '') FROM files "
+                                 "WHERE cluster IS NOT NULL ORDER BY cluster, file_id")
+
+    # 📤 Merged rows (MERGED_COLUMNS order); since/until are epoch milliseconds on date_deleted.
+    # identity=True appends SHA256, PHash, Cluster and MatchedBy
+    def iter_merged(self, since=None, until=None, matched_only=False, identity=False):
+        where, params = [], []
+        if since is not None:
+            where.append("t.date_deleted >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("t.date_deleted < ?")
+            params.append(until)
+        if where:
+            # Driven from the date_deleted index, then files by trash_id
+            join = "FROM trashes t JOIN files f ON f.trash_id = t.trash_id WHERE " + " AND ".join(where)
+        elif matched_only:
+            join = "FROM files f JOIN trashes t ON t.trash_id = f.trash_id"
+        else:
+            join = "FROM files f LEFT JOIN trashes t ON t.trash_id = f.trash_id"
+        extra = (", COALESCE(f.sha256, ''), COALESCE(f.phash, ''), COALESCE(f.cluster, ''), "
+                 "COALESCE(f.matched_by, '')") if identity else ""
+        return self.conn.execute(
+            f"SELECT COALESCE(t.title, ''), "
+            f"CASE WHEN t.trash_id IS NULL THEN '{NOT_FOUND}' ELSE t.date_deleted END, "
+            f"CASE WHEN t.trash_id IS NULL THEN '{NOT_FOUND}' ELSE t.deleted_local END, "
+            f"f.date_created, f.date_modified, f.camera, f.extension, f.file_path{extra} "
+            f"{join} ORDER BY f.file_id", params)
@@ -0,0 +1,263 @@
+import struct
+
+from trashpanda_io import mapped, MADV_RANDOM
+
+# ⚡ Header-only EXIF reader for the handful of tags Trashes Panda needs.
+# Walks JPEG APP1, TIFF IFD0 + Exif IFD, or a HEIC Exif item, and jumps straight to
+# the wanted tags. Anything it cannot decode returns None so callers fall back to
+# Pillow/ExifTool; a decodable file without EXIF returns its type and no tags.
+
+DATE_TIME_ORIGINAL = 0x9003
+MODIFY_DATE = 0x0132
+MODEL = 0x0110
+WANTED_TAGS = (DATE_TIME_ORIGINAL, MODIFY_DATE, MODEL)
+EXIF_IFD_POINTER = 0x8769
+ASCII = 2
+MAX_IFD_ENTRIES = 1024
+MAX_EXIF_BYTES = 256 * 1024
+HEIC_BRANDS = {b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx'}
+HEIF_BRANDS = HEIC_BRANDS | {b'mif1', b'msf1'}
+
+class NotDecodable(Exception):
+    pass
+
+def read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise NotDecodable("truncated")
+    return data
+
+# 🏷️ Tags from a TIFF structure (EXIF payload or a .tif file); Exif IFD values win,
+# matching Pillow's sub_ifd.get(tag, ifd0.get(tag))
+def parse_tiff(tiff):
+    if tiff[:4] == b'II*\0':
+        order = '<'
+    elif tiff[:4] == b'MM\0*':
+        order = '>'
+    else:
+        raise NotDecodable("bad TIFF header")
+    ifd0 = read_ifd(tiff, order, struct.unpack_from(order + 'L', tiff, 4)[0])
+    tags = {tag: value for tag, value in ifd0.items() if tag in WANTED_TAGS}
+    pointer = ifd0.get(EXIF_IFD_POINTER)
+    if isinstance(pointer, int) and pointer:
+        sub_ifd = read_ifd(tiff, order, pointer)
+        tags.update((tag, value) for tag, value in sub_ifd.items() if tag in WANTED_TAGS)
+    return tags
+
+def read_ifd(tiff, order, offset):
+    if offset + 2 > len(tiff):
+        raise NotDecodable("IFD outside the header bytes")
+    count = struct.unpack_from(order + 'H', tiff, offset)[0]
+    if count > MAX_IFD_ENTRIES or offset + 2 + count * 12 > len(tiff):
+        raise NotDecodable("IFD outside the header bytes")
+    values = {}
+    for pos in range(offset + 2, offset + 2 + count * 12, 12):
+        tag, kind, n = struct.unpack_from(order + 'HHL', tiff, pos)
+        if tag == EXIF_IFD_POINTER:
+            values[tag] = struct.unpack_from(order + 'L', tiff, pos + 8)[0]
+        elif tag in WANTED_TAGS:
+            if kind != ASCII:
+                raise NotDecodable(f"tag {tag:#06x} is not ASCII")
+            start = pos + 8 if n <= 4 else struct.unpack_from(order + 'L', tiff, pos + 8)[0]
+            if start + n > len(tiff):
+                raise NotDecodable("value outside the header bytes")
+            raw = bytes(tiff[start:start + n])
+            if raw.endswith(b'\0'):
+                raw = raw[:-1]
+            values[tag] = raw.decode('latin-1', 'replace')
+    return values
+
+# 📷 JPEG: markers up to SOS; the first APP1 "Exif" segment is parsed
+def parse_jpeg(f):
+    tags = {}
+    found = False
+    while True:
+        try:
+            marker = bytes(read_exact(f, 2))
+            while marker[0] == 0xFF and marker[1] == 0xFF:  # fill bytes
+                marker = marker[1:] + bytes(read_exact(f, 1))
+        except NotDecodable:
+            if found:
+                return 'jpg', tags  # header bytes ended after the EXIF segment
+            raise
+        if marker[0] != 0xFF:
+            raise NotDecodable("lost JPEG marker sync")
+        code = marker[1]
+        if code in (0xDA, 0xD9):  # start of scan / end of image
+            return 'jpg', tags
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue
+        try:
+            length = struct.unpack('>H', read_exact(f, 2))[0] - 2
+        except NotDecodable:
+            if found:
+                return 'jpg', tags
+            raise
+        if code == 0xE1 and not found:
+            payload = read_exact(f, length)
+            if payload[:6] == b'Exif\0\0':
+                tags = parse_tiff(payload[6:])
+                found = True
+        elif code == 0xE2:
+            payload = f.read(length)
+            if payload[:4] == b'MPF\0':
+                raise NotDecodable("multi-picture JPEG")  # Pillow reports these as MPO
+        else:
+            f.seek(length, 1)
+
+# 📦 HEIC/HEIF: ftyp brand, then meta → iinf (find the Exif item) + iloc (find its bytes)
+def iter_boxes(data, start, end):
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>L4s', data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise NotDecodable("box outside the header bytes")
+        yield kind, pos + header, pos + size
+        pos += size
+
+def read_box(f):
+    head = f.read(8)
+    if len(head) < 8:
+        return None, None
+    size, kind = struct.unpack('>L4s', head)
+    header = 8
+    if size == 1:
+        size = struct.unpack('>Q', read_exact(f, 8))[0]
+        header = 16
+    return kind, size - header if size else None
+
+def uint(data, pos, size):
+    if size == 0:
+        return 0, pos
+    fmt = {2: '>H', 4: '>L', 8: '>Q'}.get(size)
+    if fmt is None:
+        raise NotDecodable("unsupported iloc field size")
+    return struct.unpack_from(fmt, data, pos)[0], pos + size
+
+def exif_item_id(data, start, end):
+    version = data[start]
+    pos = start + 4
+    count, pos = uint(data, pos, 2 if version == 0 else 4)
+    for kind, body, box_end in iter_boxes(data, pos, end):
+        if kind != b'infe' or data[body] < 2:
+            continue
+        id_size = 2 if data[body] == 2 else 4
+        item_id, p = uint(data, body + 4, id_size)
+        if data[p + 2:p + 6] == b'Exif':
+            return item_id
+    return None
+
+def item_extents(data, start, end, wanted):
+    version = data[start]
+    pos = start + 4
+    offset_size, length_size = data[pos] >> 4, data[pos] & 0x0F
+    base_size, index_size = data[pos + 1] >> 4, (data[pos + 1] & 0x0F if version in (1, 2) else 0)
+    pos += 2
+    count, pos = uint(data, pos, 2 if version < 2 else 4)
+    for _ in range(count):
+        item_id, pos = uint(data, pos, 2 if version < 2 else 4)
+        method = 0
+        if version in (1, 2):
+            method = struct.unpack_from('>H', data, pos)[0] & 0x0F
+            pos += 2
+        pos += 2  # data_reference_index
+        base, pos = uint(data, pos, base_size)
+        extents = []
+        (extent_count,), pos = struct.unpack_from('>H', data, pos), pos + 2
+        for _ in range(extent_count):
+            _, pos = uint(data, pos, index_size)
+            offset, pos = uint(data, pos, offset_size)
+            length, pos = uint(data, pos, length_size)
+            extents.append((base + offset, length))
+        if item_id == wanted:
+            if method != 0:
+                raise NotDecodable("Exif item not stored by file offset")
+            return extents
+    return None
+
+def parse_heif(f, brand):
+    kind, size = read_box(f)
+    while kind is not None and kind != b'meta':
+        if size is None:
+            return None
+        f.seek(size, 1)
+        kind, size = read_box(f)
+    if kind is None or size is None or size > MAX_EXIF_BYTES:
+        raise NotDecodable("no usable meta box")
+    meta = read_exact(f, size)
+    item_id, extents = None, None
+    boxes = {kind: (body, box_end) for kind, body, box_end in iter_boxes(meta, 4, len(meta))}
+    if b'iinf' in boxes:
+        item_id = exif_item_id(meta, *boxes[b'iinf'])
+    extension = 'heic' if brand in HEIC_BRANDS else 'heif'
+    if item_id is None:
+        return extension, {}
+    if b'iloc' in boxes:
+        extents = item_extents(meta, *boxes[b'iloc'], item_id)
+    if not extents:
+        raise NotDecodable("Exif item has no location")
+    payload = b''
+    for offset, length in extents:
+        if len(payload) + length > MAX_EXIF_BYTES:
+            raise NotDecodable("Exif item too large")
+        f.seek(offset)
+        payload += read_exact(f, length)
+    # Exif item: 4-byte offset to the TIFF header (normally past "Exif\0\0")
+    skip = struct.unpack_from('>L', payload, 0)[0] + 4
+    return extension, parse_tiff(payload[skip:])
+
+# 🪟 File-like reads over a memoryview (e.g. an mmap); slices are views, not copies
+class ViewReader:
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size < 0 else min(len(self.view), self.pos + size)
+        chunk = self.view[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def seek(self, offset, whence=0):
+        base = (0, self.pos, len(self.view))[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+# 🔎 (extension, {tag: str}) for a seekable binary file object, or None if undecodable
+def read_exif_tags(f):
+    try:
+        head = bytes(f.read(12))
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            return parse_jpeg(f)
+        if head[:4] in (b'II*\0', b'MM\0*'):
+            f.seek(0)
+            return 'tif', parse_tiff(f.read(MAX_EXIF_BYTES))
+        if head[4:8] == b'ftyp' and head[8:12] in HEIF_BRANDS:
+            f.seek(0)
+            kind, size = read_box(f)
+            f.seek(size, 1)
+            return parse_heif(f, head[8:12])
+        return None
+    except (NotDecodable, struct.error, IndexError, ValueError, OSError):
+        return None
+
+def read_exif_buffer(view):
+    return read_exif_tags(ViewReader(memoryview(view)))
+
+# Loose files are mapped, so only the header pages are ever faulted in
+def read_exif_file(path):
+    try:
+        with mapped(path, MADV_RANDOM) as view:
+            return read_exif_buffer(view)
+    except OSError:
+        return None
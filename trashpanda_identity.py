@@ -0,0 +1,125 @@
+import hashlib
+
+from trashpanda_io import BufferReader
+
+try:
+    from PIL import Image
+except ImportError:  # SHA-256 still works; perceptual hashes need Pillow
+    Image = None
+
+# 🧬 Content identity: SHA-256 of the file bytes (exact copies, whatever their name) and a
+# 64-bit difference hash of the picture (the same image renamed, recompressed or resized),
+# computed from one buffer. Near-duplicates are found with multi-index hashing: the hash
+# is cut into blocks, and two hashes within RADIUS bits agree within RADIUS // BLOCKS bits
+# on at least one block (pigeonhole), so only a few buckets are probed per hash instead of
+# comparing every pair.
+
+HASH_SIZE = 8  # 8x8 gradients -> 64-bit dHash
+HASH_BITS = HASH_SIZE * HASH_SIZE
+INDEX_BLOCKS = 4
+RADIUS = 6  # Hamming distance still counted as the same picture
+DRAFT_SIZE = (HASH_SIZE * 8, HASH_SIZE * 8)  # JPEG decodes at 1/2..1/8 scale, enough for 9x8
+
+def perceptual_hash(stream):
+    if Image is None:
+        return None
+    try:
+        with Image.open(stream) as im:
+            im.draft("L", DRAFT_SIZE)
+            small = im.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+            pixels = list(small.getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(HASH_SIZE):
+        line = pixels[row * (HASH_SIZE + 1):(row + 1) * (HASH_SIZE + 1)]
+        for left, right in zip(line, line[1:]):
+            value = value << 1 | (left > right)
+    return value
+
+# {"SHA256": hex, "PHash": 16 hex digits or ""} for the bytes of one image; stream may be
+# a file object over the same bytes that the caller already has open
+def content_identity(data, stream=None):
+    if stream is None:
+        stream = BufferReader(data)
+    stream.seek(0)
+    phash = perceptual_hash(stream)
+    return {"SHA256": hashlib.sha256(data).hexdigest(), "PHash": "" if phash is None else f"{phash:016x}"}
+
+def parse_phash(text):
+    try:
+        return int(text, 16) if text else None
+    except ValueError:
+        return None
+
+def flip_masks(width, radius):
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted({m | 1 << bit for m in masks for bit in range(width)} | set(masks))
+    return masks
+
+# 🔢 Multi-index hash over fixed-width integers: INDEX_BLOCKS tables keyed by one block each
+class MultiIndexHash:
+    def __init__(self, radius=RADIUS, bits=HASH_BITS, blocks=INDEX_BLOCKS):
+        self.radius, self.blocks = radius, blocks
+        self.width = bits // blocks
+        self.block_mask = (1 << self.width) - 1
+        self.tables = [{} for _ in range(blocks)]
+        self.masks = flip_masks(self.width, radius // blocks)
+        self.values = []
+
+    def add(self, value):
+        item = len(self.values)
+        self.values.append(value)
+        for block, table in enumerate(self.tables):
+            table.setdefault(value >> (block * self.width) & self.block_mask, []).append(item)
+        return item
+
+    # Indexes of stored values within `radius` bits of value
+    def query(self, value):
+        candidates = []
+        for block, table in enumerate(self.tables):
+            key = value >> (block * self.width) & self.block_mask
+            for bucket in map(table.get, [key ^ mask for mask in self.masks]):
+                if bucket:
+                    candidates.extend(bucket)
+        values, radius = self.values, self.radius
+        return {item for item in candidates if bin(values[item] ^ value).count("1") <= radius}
+
+# 🧩 Duplicate clusters over (item_id, sha256, phash) entries: equal SHA-256, or perceptual
+# hashes within radius (transitively). Returns {item_id: cluster_id} for items in clusters
+# of two or more; a cluster is named by its smallest item_id.
+def cluster_duplicates(entries, radius=RADIUS):
+    parent = {}
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    by_sha, by_phash = {}, {}
+    for item_id, sha256, phash in entries:
+        parent[item_id] = item_id
+        if sha256:
+            union(item_id, by_sha.setdefault(sha256, item_id))
+        # 0 and all-ones are flat pictures (blank, single colour): no gradient to compare
+        if phash and phash != (1 << HASH_BITS) - 1:
+            by_phash.setdefault(phash, []).append(item_id)
+    index = MultiIndexHash(radius)
+    owners = []
+    for phash, items in by_phash.items():
+        for item_id in items[1:]:
+            union(items[0], item_id)
+        # Each distinct hash is compared only with the ones indexed before it
+        for match in index.query(phash):
+            union(items[0], owners[match])
+        index.add(phash)
+        owners.append(items[0])
+    roots = {item_id: find(item_id) for item_id in parent}
+    sizes = {}
+    for root in roots.values():
+        sizes[root] = sizes.get(root, 0) + 1
+    return {item_id: root for item_id, root in roots.items() if sizes[root] > 1}
@@ -0,0 +1,177 @@
+import os
+import io
+import mmap
+import hashlib
+import zlib
+import struct
+import zipfile
+from contextlib import contextmanager
+
+# 📚 Shared I/O helpers for the Trashes Panda scripts
+
+EXIF_HEADER_BYTES = 128 * 1024  # APP1/EXIF sits in the first 64 KB of a JPEG
+INFLATE_CHUNK = 16 * 1024
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')  # zip local file header
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# A member whose codec (bzip2, lzma, encryption) the raw reader does not decode; its
+# header has to go through a ZipFile instead
+class NeedsZipFile(Exception):
+    pass
+
+def member_data_offset(raw, info):
+    raw.seek(info.header_offset)
+    fields = LOCAL_HEADER.unpack(raw.read(LOCAL_HEADER.size))
+    if fields[0] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_len, extra_len = fields[-2], fields[-1]
+    return info.header_offset + LOCAL_HEADER.size + name_len + extra_len
+
+# 🎯 Read only the first `limit` bytes of a ZIP member, never the whole file.
+# Stored and deflated members are read straight from `raw` using the ZipInfo's offsets,
+# so callers that already scanned the central directory need no ZipFile at all.
+def read_member_header(zf, raw, info, limit=EXIF_HEADER_BYTES):
+    limit = min(limit, info.file_size)
+    encrypted = info.flag_bits & 0x1
+    if info.compress_type == zipfile.ZIP_STORED and not encrypted:
+        raw.seek(member_data_offset(raw, info))
+        return raw.read(limit)
+    if info.compress_type == zipfile.ZIP_DEFLATED and not encrypted:
+        raw.seek(member_data_offset(raw, info))
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        remaining = info.compress_size
+        out = []
+        produced = 0
+        while produced < limit and remaining > 0:
+            block = raw.read(min(INFLATE_CHUNK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            piece = inflater.decompress(block, limit - produced)
+            out.append(piece)
+            produced += len(piece)
+        return b''.join(out)[:limit]
+    if zf is None:
+        raise NeedsZipFile(f"Compression {info.compress_type} needs a ZipFile")
+    with zf.open(info) as member:
+        return member.read(limit)
+
+# 📦 Yield (name, header bytes or None) for the requested members of one archive.
+# Passing ZipInfo objects (from an earlier infolist()) skips re-reading the central directory.
+def read_zip_headers(zip_path, members, limit=EXIF_HEADER_BYTES):
+    if all(isinstance(m, zipfile.ZipInfo) for m in members):
+        zf = None  # only opened if some member uses a codec other than stored/deflate
+        with open(zip_path, 'rb') as raw:
+            try:
+                for info in members:
+                    try:
+                        try:
+                            yield info.filename, read_member_header(zf, raw, info, limit)
+                        except NeedsZipFile:
+                            zf = zipfile.ZipFile(zip_path, 'r')
+                            yield info.filename, read_member_header(zf, raw, info, limit)
+                    except Exception:
+                        yield info.filename, None
+            finally:
+                if zf is not None:
+                    zf.close()
+        return
+    with zipfile.ZipFile(zip_path, 'r') as zf, open(zip_path, 'rb') as raw:
+        for name in members:
+            try:
+                yield name, read_member_header(zf, raw, zf.getinfo(name), limit)
+            except Exception:
+                yield name, None
+
+# 🪟 Memory-mapped reads: callers get a read-only memoryview of the whole file and only
+# the pages they touch are faulted in (no read() copies). MADV_RANDOM keeps header-only
+# parsers from pulling readahead; MADV_SEQUENTIAL suits hashing.
+MADV_RANDOM = getattr(mmap, "MADV_RANDOM", None)
+MADV_SEQUENTIAL = getattr(mmap, "MADV_SEQUENTIAL", None)
+MMAP_MIN_SIZE = 64 * 1024  # smaller files are cheaper to read in one call than to map
+
+@contextmanager
+def mapped(path, advice=None):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            yield memoryview(f.read())
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if advice is not None and hasattr(mm, "madvise"):
+            mm.madvise(advice)
+        view = memoryview(mm)
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                mm.close()
+            except BufferError:
+                pass  # a caller still holds a slice; the mapping goes with it
+
+# 📖 Read-only file object over a buffer (bytes, memoryview, mmap). io.BytesIO copies a
+# memoryview or mapping whole on construction; here each read copies only what it returns.
+class BufferReader(io.RawIOBase):
+    def __init__(self, data):
+        super().__init__()
+        self.view = memoryview(data).cast('B')
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(len(self.view), self.pos + size)
+        chunk = self.view[self.pos:end].tobytes()
+        self.pos = max(self.pos, end)
+        return chunk
+
+    def readinto(self, buffer):
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def seek(self, offset, whence=0):
+        base = (0, self.pos, len(self.view))[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def getbuffer(self):
+        return self.view
+
+def sha256_file(path):
+    with mapped(path, MADV_SEQUENTIAL) as view:
+        return hashlib.sha256(view).hexdigest()
+
+# 📦 Copy one ZIP member to disk and return its SHA-256. Stored members are written
+# straight from a mapping of the archive and hashed from the same view; compressed
+# members stream through zf.open and are hashed block by block as they are written.
+def copy_member(zf, info, target_path):
+    digest = hashlib.sha256()
+    encrypted = info.flag_bits & 0x1
+    if info.compress_type == zipfile.ZIP_STORED and not encrypted and zf.filename:
+        with open(zf.filename, 'rb') as raw:
+            start = member_data_offset(raw, info)
+        with mapped(zf.filename, MADV_SEQUENTIAL) as view, open(target_path, 'wb') as target:
+            data = view[start:start + info.file_size]
+            digest.update(data)
+            target.write(data)
+            data.release()
+        return digest.hexdigest()
+    with zf.open(info) as source, open(target_path, 'wb') as target:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+            target.write(block)
+    return digest.hexdigest()
+
+# Same for a loose file: one mapping feeds both the copy and the hash
+def copy_file(source_path, target_path):
+    with mapped(source_path, MADV_SEQUENTIAL) as view, open(target_path, 'wb') as target:
+        target.write(view)
+        return hashlib.sha256(view).hexdigest()
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+# 🧭 Single-pass discovery: one os.scandir traversal classifies images, ZIPs and trash.db
+# files. Directory listings are fetched ahead of the consumer by a thread pool (one task per
+# directory, which pays off on network shares and slow disks) and handed out in os.walk's
+# top-down order, so results stream from the first directory and stay reproducible.
+# An optional index reuses the listing of every directory whose mtime has not changed.
+
+IMAGE, ZIP, TRASH_DB = "image", "zip", "trash.db"
+SCAN_WORKERS = 8  # directory listings in flight; mostly waiting on the filesystem
+INDEX_SETTLE_NS = 2 * 10**9  # listings this close to the scan start are not trusted later
+
+def classify(name, image_extensions, trash_name="trash.db"):
+    lowered = name.lower()
+    if lowered.endswith(trash_name):
+        return TRASH_DB
+    ext = os.path.splitext(lowered)[1]
+    if ext == ".zip":
+        return ZIP
+    if ext in image_extensions:
+        return IMAGE
+    return None
+
+# 🗂️ Directory listings keyed by absolute path + mtime. A directory's mtime changes when an
+# entry is added, removed or renamed in it, so an unchanged mtime means an unchanged listing;
+# subdirectories are still stat'ed (each one carries its own mtime).
+class DirIndex:
+    def __init__(self, path, signature):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER, "
+                          "files TEXT, subdirs TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != signature:
+            # Listings only hold the files that classified; a different classifier starts over
+            with self.conn:
+                self.conn.execute("DELETE FROM dirs")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (signature,))
+        self.entries = {path: (mtime, files, subdirs)
+                        for path, mtime, files, subdirs in self.conn.execute("SELECT * FROM dirs")}
+        self.updates = {}
+        self.seen = set()
+        self.started = time.time_ns()
+        self.reused = 0
+
+    def lookup(self, path, mtime):
+        self.seen.add(path)
+        cached = self.entries.get(path)
+        if cached is None or cached[0] != mtime:
+            return None
+        self.reused += 1
+        return [tuple(f) for f in json.loads(cached[1])], json.loads(cached[2])
+
+    def store(self, path, mtime, files, subdirs):
+        # A listing taken in the same clock tick as a later change would look current; skip it
+        if mtime < self.started - INDEX_SETTLE_NS:
+            self.updates[path] = (mtime, json.dumps(files), json.dumps(subdirs))
+
+    def close(self, root=None):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                                  [(path,) + entry for path, entry in self.updates.items()])
+            if root is not None:
+                # Finished scan: forget directories under root that no longer exist
+                prefix = root.rstrip(os.sep) + os.sep
+                stale = [(p,) for p in self.entries if (p == root or p.startswith(prefix)) and p not in self.seen]
+                self.conn.executemany("DELETE FROM dirs WHERE path = ?", stale)
+        self.conn.close()
+
+# Files that classify, and subdirectory names, of one directory; None if it cannot be read
+def list_directory(path, image_extensions, trash_name, index=None):
+    try:
+        mtime = os.stat(path).st_mtime_ns if index is not None else None
+        if index is not None:
+            cached = index.lookup(path, mtime)
+            if cached is not None:
+                return cached
+        files, subdirs = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if not entry.is_symlink():  # like os.walk(followlinks=False)
+                        subdirs.append(entry.name)
+                    continue
+                kind = classify(entry.name, image_extensions, trash_name)
+                if kind is not None:
+                    files.append((entry.name, kind))
+    except OSError:
+        return None
+    if index is not None:
+        index.store(path, mtime, files, subdirs)
+    return files, subdirs
+
+# 🔍 (kind, path) for every image, ZIP and trash.db under root, as they are found
+def scan_tree(root, image_extensions, workers=None, index_path=None, trash_name="trash.db"):
+    image_extensions = frozenset(e.lower() for e in image_extensions)
+    index = None
+    if index_path:
+        root = os.path.abspath(root)
+        index = DirIndex(index_path, json.dumps([sorted(image_extensions), trash_name]))
+    pool = ThreadPoolExecutor(max(1, workers or SCAN_WORKERS))
+    submit = lambda path: (path, pool.submit(list_directory, path, image_extensions, trash_name, index))
+    stack = [submit(root)]
+    finished = False
+    try:
+        while stack:
+            path, future = stack.pop()
+            listing = future.result()
+            if listing is None:
+                continue
+            files, subdirs = listing
+            for name, kind in files:
+                yield kind, os.path.join(path, name)
+            # Depth-first like os.walk; the pool is already listing the subdirectories
+            stack.extend(reversed([submit(os.path.join(path, d)) for d in subdirs]))
+        finished = True
+    finally:
+        for _, future in stack:
+            future.cancel()
+        pool.shutdown(wait=True)
+        if index is not None:
+            index.close(root if finished else None)
@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# ⏱️ Per-stage wall/CPU/RSS measurements shared by the CLIs and the benchmark suite,
+# plus run metrics (counters, latency histograms, slowest archives) and optional profiling
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+def cpu_seconds():
+    # Own CPU plus finished worker processes (pool children), where the OS reports it
+    total = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+PROFILE_MODES = ("cprofile", "sample")
+PROFILE_TOP = 15  # functions listed per profile in the report
+SAMPLE_INTERVAL = 0.005
+# Leaf frames of threads parked on a lock, queue, selector or child process; they stay in
+# the folded stacks but are left out of the "top" list, which is about where CPU goes
+IDLE_FRAMES = {"threading.py:wait", "threading.py:_wait_for_tstate_lock", "selectors.py:select",
+               "unix_events.py:_do_waitpid", "thread.py:_worker", "queue.py:get", "connection.py:_recv"}
+SLOWEST_KEYS = 5  # slowest archives / databases listed per span
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 0.001:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds * 1000000:.0f}µs"
+
+# 📊 Latency histogram with power-of-two microsecond buckets: fixed memory however many
+# items are observed; percentiles are the upper edge of their bucket (within 2x)
+class Histogram:
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds, n=1):
+        self.buckets[int(seconds * 1000000).bit_length()] += n
+        self.count += n
+        self.total += seconds * n
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1000000, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "total_s": round(self.total, 4),
+                "mean_s": round(self.total / self.count, 6) if self.count else 0.0,
+                "p50_s": self.percentile(0.5), "p95_s": self.percentile(0.95), "p99_s": self.percentile(0.99),
+                "max_s": round(self.max, 6),
+                "buckets_us": {str(1 << b): n for b, n in sorted(self.buckets.items())}}
+
+# 🧮 Counters (bytes, files, subprocess spawns, cache hits), latency histograms and
+# per-key time spans for one run; shared by every thread of the run, so all updates lock
+class RunMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        self.histograms = {}
+        self.spans = {}
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def merge_counters(self, counts):
+        # Counts a worker process gathered for one task
+        if counts:
+            with self.lock:
+                self.counters.update(counts)
+
+    def observe(self, name, seconds, n=1, key=None):
+        # n items that took `seconds` together count as n samples of seconds / n;
+        # key (an archive, a trash.db) also adds the time to that key's span
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            if n:
+                histogram.add(seconds / n, n)
+            if key is not None:
+                span = self.spans.setdefault(name, Counter())
+                span[key] += seconds
+
+    @contextmanager
+    def timer(self, name, n=1, key=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, n, key)
+
+    def slowest(self, name, top=SLOWEST_KEYS):
+        with self.lock:
+            return self.spans.get(name, Counter()).most_common(top)
+
+    def report(self):
+        with self.lock:
+            return {"counters": dict(sorted(self.counters.items())),
+                    "histograms": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+                    "slowest": {name: [{"key": key, "seconds": round(seconds, 4)}
+                                       for key, seconds in span.most_common(SLOWEST_KEYS)]
+                                for name, span in sorted(self.spans.items())}}
+
+    def summary_lines(self):
+        report = self.report()
+        if report["counters"]:
+            yield "🧮 " + ", ".join(f"{name} {value:,}" for name, value in report["counters"].items())
+        for name, h in report["histograms"].items():
+            if h["count"] == 1:
+                yield f"📊 {name}: {format_seconds(h['total_s'])}"
+                continue
+            yield (f"📊 {name}: {h['count']:,} × mean {format_seconds(h['mean_s'])}, p50 {format_seconds(h['p50_s'])}, "
+                   f"p95 {format_seconds(h['p95_s'])}, p99 {format_seconds(h['p99_s'])}, max {format_seconds(h['max_s'])}")
+        for name, keys in report["slowest"].items():
+            if len(keys) > 1:
+                yield f"🐌 slowest {name}: " + ", ".join(f"{os.path.basename(k['key']) or k['key']} "
+                                                         f"{format_seconds(k['seconds'])}" for k in keys)
+
+# 🔬 Statistical profiler: samples the Python stack of every thread of this process (stage
+# threads, pool threads, the discovery thread) at a fixed interval; written in the
+# "folded" format that flamegraph.pl and speedscope read
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        me = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self, target):
+        self.stop_event.set()
+        self.thread.join()
+        with open(target, 'w', encoding='utf-8') as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        own = Counter()
+        for stack, n in self.stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            if leaf not in IDLE_FRAMES:
+                own[leaf] += n
+        busy = sum(own.values())
+        return [{"function": name, "samples": n, "share": round(n / max(busy, 1), 3)}
+                for name, n in own.most_common(PROFILE_TOP)]
+
+def cprofile_top(profiler):
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]
+    return [{"function": f"{os.path.basename(path)}:{line}({func})", "calls": calls,
+             "own_s": round(own, 4), "cum_s": round(cumulative, 4)}
+            for (path, line, func), (_, calls, own, cumulative, _) in rows]
+
+class StageTimings:
+    # profile: None, "cprofile" (each stage's own thread, deterministic) or "sample"
+    # (all threads, from the first stage until it ends); files go to profile_dir
+    def __init__(self, profile=None, profile_dir=None):
+        if profile not in (None,) + PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile}")
+        self.stages = []
+        self.metrics = RunMetrics()
+        self.profile = profile
+        self.profile_dir = profile_dir or os.getcwd()
+        self.sampler = None
+
+    # items= names a counter; the stage records how much it grew and the rate per second
+    @contextmanager
+    def stage(self, name, items=None, profile=True, **extra):
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        record = {"stage": name}
+        record.update(extra)
+        start_items = self.metrics.counters[items] if items else 0
+        profiler = sampler = None
+        if profile and self.profile == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is active in this interpreter
+                profiler = None
+        elif profile and self.profile == "sample" and self.sampler is None:
+            sampler = self.sampler = StackSampler().start()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall, 4)
+            record["cpu_s"] = round(cpu_seconds() - cpu, 4)
+            rss = peak_rss_mb()
+            record["peak_rss_mb"] = round(rss, 1) if rss is not None else None
+            if items:
+                record["items"] = self.metrics.counters[items] - start_items
+                record["items_per_s"] = round(record["items"] / max(record["wall_s"], 1e-9), 1)
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record["profile"] = os.path.join(self.profile_dir, f"profile_{name}.prof")
+                profiler.dump_stats(record["profile"])
+                record["profile_top"] = cprofile_top(profiler)
+            if sampler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record["profile"] = os.path.join(self.profile_dir, f"profile_{name}.folded")
+                record["profile_top"] = sampler.stop(record["profile"])
+                self.sampler = None
+            self.stages.append(record)
+
+    def summary_lines(self):
+        for r in self.stages:
+            rss = f"{r['peak_rss_mb']:.1f} MB" if r.get("peak_rss_mb") is not None else "n/a"
+            rate = f", {r['items']:,} items at {r['items_per_s']:,.0f}/s" if "items" in r else ""
+            yield f"⏱️ {r['stage']}: {r['wall_s']:.2f}s wall, {r['cpu_s']:.2f}s CPU, peak RSS {rss}{rate}"
+        yield from self.metrics.summary_lines()
+        for r in self.stages:
+            if r.get("profile_top"):
+                top = r["profile_top"][0]
+                yield f"🔬 {r['stage']} profile: {r['profile']} (top: {top['function']})"
+
+    def write_json(self, target, **meta):
+        report = dict(meta, stages=self.stages, **self.metrics.report())
+        text = json.dumps(report, indent=2)
+        if target == "-":
+            print(text)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")